@@ -0,0 +1,123 @@
+"""
+Bảng quyền xem dự án phi chuẩn hóa: ProjectAccess(user, project, role) = chủ dự án + thành viên.
+
+"User thấy những dự án nào" / "user có thấy dự án X không" thành EXISTS trên index project_access_unique
+(user, project), thay cho OR-join owner / members rồi DISTINCT trên mỗi request danh sách.
+
+Bảng được giữ khớp bởi:
+- signals: tạo dự án / đổi chủ (post_save Project), Project.members.add / remove / set / clear (m2m_changed)
+- thao tác hàng loạt trên bảng trung gian gọi thẳng grant / revoke (members.py, seed_data)
+- xóa dự án thu hồi toàn bộ quyền ngay (revoke_all), purge chỉ dọn phần còn lại
+Lệnh `check_project_access [--fix]` so bảng với owner + members và sửa chỗ lệch.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import Project, ProjectAccess
+
+Role = ProjectAccess.Role
+Membership = Project.members.through
+# Số dự án mỗi lượt khi kiểm tra cả bảng
+CHECK_BATCH_SIZE = 1000
+
+
+# SECTION: Truy vấn quyền xem
+def visible_projects(user):
+    """Điều kiện lọc Project.objects: các dự án user là chủ hoặc thành viên."""
+    return Exists(ProjectAccess.objects.filter(user=user, project=OuterRef('pk')))
+
+
+def can_view(user, project_id):
+    """Điều kiện không tương quan (EXISTS chạy một lần trong cùng câu query): user thấy dự án project_id."""
+    return Exists(ProjectAccess.objects.filter(user=user, project_id=project_id))
+
+
+def project_ids(user):
+    return ProjectAccess.objects.filter(user=user).values('project_id')
+
+
+# SECTION: Giữ bảng khớp với owner + members
+def grant(project_id, user_ids):
+    """Thành viên mới; dòng đã có (vd: chủ dự án) giữ nguyên vai trò."""
+    ProjectAccess.objects.bulk_create(
+        [ProjectAccess(user_id=user_id, project_id=project_id, role=Role.MEMBER) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+
+
+def revoke(project_id, user_ids):
+    """Thành viên bị gỡ; chủ dự án vẫn giữ quyền dù không còn trong members."""
+    ProjectAccess.objects.filter(project_id=project_id, user_id__in=list(user_ids), role=Role.MEMBER).delete()
+
+
+def revoke_all(project_id):
+    """Xóa dự án: thu hồi mọi quyền, trả về id các user vừa mất quyền."""
+    user_ids = list(ProjectAccess.objects.filter(project_id=project_id).values_list('user_id', flat=True))
+    if user_ids:
+        ProjectAccess.objects.filter(project_id=project_id).delete()
+    return user_ids
+
+
+def sync_owner(project, created=False):
+    """Dự án mới hoặc vừa đổi chủ: chủ mới có vai trò owner, chủ cũ còn là thành viên thì xuống member, không thì mất quyền."""
+    owner = ProjectAccess(user_id=project.owner_id, project_id=project.pk, role=Role.OWNER)
+    if created:
+        ProjectAccess.objects.bulk_create([owner], ignore_conflicts=True)
+        return
+    with transaction.atomic():
+        former = ProjectAccess.objects.filter(project_id=project.pk, role=Role.OWNER).exclude(user_id=project.owner_id)
+        former.filter(user_id__in=Membership.objects.filter(project_id=project.pk).values('user_id')).update(role=Role.MEMBER)
+        former.delete()
+        ProjectAccess.objects.bulk_create(
+            [owner], update_conflicts=True, unique_fields=['user', 'project'], update_fields=['role'],
+        )
+
+
+# SECTION: Kiểm tra / sửa lệch
+def expected(project_ids):
+    """{(user_id, project_id): role} tính từ owner + members của các dự án chưa xóa."""
+    rows = {
+        (user_id, project_id): Role.MEMBER
+        for project_id, user_id in Membership.objects.filter(project_id__in=project_ids, project__deleted_at__isnull=True)
+        .values_list('project_id', 'user_id')
+    }
+    for project_id, owner_id in Project.objects.filter(pk__in=project_ids).values_list('id', 'owner_id'):
+        rows[(owner_id, project_id)] = Role.OWNER
+    return rows
+
+
+def check(fix=False, project_ids=None, batch_size=CHECK_BATCH_SIZE):
+    """
+    So ProjectAccess với owner + members theo từng lượt dự án. Trả về {'missing', 'extra', 'wrong_role'}: danh sách
+    (user_id, project_id). fix=True: xóa dòng thừa / sai vai trò và thêm dòng thiếu trong cùng lượt.
+    """
+    report = {'missing': [], 'extra': [], 'wrong_role': []}
+    if project_ids is None:
+        project_ids = Project.all_objects.order_by('pk').values_list('pk', flat=True)
+    project_ids = list(project_ids)
+    for start in range(0, len(project_ids), batch_size):
+        batch = project_ids[start:start + batch_size]
+        wanted = expected(batch)
+        actual = {
+            (user_id, project_id): role
+            for user_id, project_id, role in ProjectAccess.objects.filter(project_id__in=batch).values_list('user_id', 'project_id', 'role')
+        }
+        missing = [key for key in wanted if key not in actual]
+        extra = [key for key in actual if key not in wanted]
+        wrong = [key for key in wanted if key in actual and actual[key] != wanted[key]]
+        report['missing'] += missing
+        report['extra'] += extra
+        report['wrong_role'] += wrong
+        if fix and (missing or extra or wrong):
+            with transaction.atomic():
+                stale = extra + wrong
+                for project_id in {project_id for _user_id, project_id in stale}:
+                    ProjectAccess.objects.filter(
+                        project_id=project_id, user_id__in=[user_id for user_id, pk in stale if pk == project_id],
+                    ).delete()
+                ProjectAccess.objects.bulk_create(
+                    [ProjectAccess(user_id=user_id, project_id=project_id, role=wanted[(user_id, project_id)])
+                     for user_id, project_id in missing + wrong],
+                    batch_size=batch_size,
+                )
+    return report
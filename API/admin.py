@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Project, Task, Comment, Attachment, ActivityLog, PasswordResetToken, Notification
+from .models import User, Project, Task, Comment, Attachment, ActivityLog, PasswordResetToken, Notification, ProjectDailyStat, TaskCycleStat, SyncChange
 
 # Đăng ký các model để hiển thị trong trang admin
 admin.site.register(User)
@@ -10,3 +10,6 @@ admin.site.register(Attachment)
 admin.site.register(ActivityLog)
 admin.site.register(PasswordResetToken)
 admin.site.register(Notification)
+admin.site.register(ProjectDailyStat)
+admin.site.register(TaskCycleStat)
+admin.site.register(SyncChange)
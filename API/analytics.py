@@ -0,0 +1,188 @@
+"""
+Analytics cho dự án: burndown, throughput theo tuần, thời gian In Progress.
+
+Dữ liệu được gộp dần (incremental) từ luồng sự kiện ActivityLog vào hai bảng rollup:
+- ProjectDailyStat: mỗi (dự án, ngày) một dòng, cộng dồn bằng UPDATE ... SET x = x + n
+- TaskCycleStat: mỗi task một dòng, cộng dồn thời gian ở trạng thái INPR
+
+Các API chỉ đọc rollup (tối đa vài trăm dòng cho một năm), không quét lịch sử task.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Max, Sum
+from django.utils import timezone
+
+from .models import ActivityLog, ProjectDailyStat, Task, TaskCycleStat
+
+DONE = Task.Status.DONE
+IN_PROGRESS = Task.Status.IN_PROGRESS
+
+
+def record_event(log):
+    """Cập nhật rollup từ một sự kiện vừa ghi. Bỏ qua sự kiện không liên quan đến task dự án."""
+    if log.project_id is None or log.target_type != ActivityLog.TargetType.TASK:
+        return
+    when = log.timestamp
+    day = timezone.localdate(when)
+
+    if log.verb == ActivityLog.Verb.TASK_CREATED:
+        status = log.to_status
+        _bump(log.project_id, day, created=1, completed=int(status == DONE), open_delta=int(status != DONE))
+        if status == IN_PROGRESS:
+            _transition(log, None, status)
+
+    elif log.verb == ActivityLog.Verb.TASK_UPDATED and 'status' in log.changes:
+        old, new = log.changes['status']
+        if new == DONE and old != DONE:
+            _bump(log.project_id, day, completed=1, open_delta=-1)
+        elif old == DONE and new != DONE:
+            _bump(log.project_id, day, reopened=1, open_delta=1)
+        _transition(log, old, new)
+
+    elif log.verb == ActivityLog.Verb.TASK_DELETED:
+        old = log.changes.get('status', [None])[0]
+        _bump(log.project_id, day, deleted=1, open_delta=-int(old is not None and old != DONE))
+
+
+def _bump(project_id, day, **deltas):
+    """Cộng dồn vào dòng (project, day); tạo dòng nếu chưa có (1 query trong trường hợp thường gặp)."""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if ProjectDailyStat.objects.filter(project_id=project_id, date=day).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            ProjectDailyStat.objects.create(project_id=project_id, date=day, **deltas)
+    except IntegrityError:
+        # Request khác vừa tạo dòng này -> cộng dồn như bình thường
+        ProjectDailyStat.objects.filter(project_id=project_id, date=day).update(**updates)
+
+
+def _transition(log, old, new):
+    """Cập nhật thời gian In Progress của task khi trạng thái đổi từ old -> new."""
+    # log.task_id = None khi task đã bị xóa (phát lại lịch sử) -> không còn gì để cập nhật.
+    # Mở lại task (DONE -> khác) phải xóa completed_at để task không còn tính là đã hoàn thành.
+    if log.task_id is None or not {old, new} & {IN_PROGRESS, DONE}:
+        return
+    when = log.timestamp
+    stat, _ = TaskCycleStat.objects.get_or_create(task_id=log.task_id, defaults={'project_id': log.project_id})
+    if old == IN_PROGRESS and stat.inpr_since:
+        stat.inpr_seconds += max(int((when - stat.inpr_since).total_seconds()), 0)
+        stat.inpr_since = None
+    if new == IN_PROGRESS:
+        stat.inpr_since = when
+        stat.started_at = stat.started_at or when
+    stat.completed_at = when if new == DONE else None
+    stat.save()
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _daily_rows(project, start, end):
+    return ProjectDailyStat.objects.filter(project=project, date__gte=start, date__lte=end).order_by('date')
+
+
+def burndown_series(project, start, end):
+    """Số task chưa xong ở cuối mỗi ngày trong [start, end], kèm số tạo mới / hoàn thành."""
+    remaining = ProjectDailyStat.objects.filter(
+        project=project, date__lt=start
+    ).aggregate(total=Sum('open_delta'))['total'] or 0
+    rows = {row.date: row for row in _daily_rows(project, start, end)}
+
+    series = []
+    day = start
+    while day <= end:
+        row = rows.get(day)
+        if row:
+            remaining += row.open_delta
+        series.append({
+            'date': day,
+            'remaining': remaining,
+            'created': row.created if row else 0,
+            'completed': row.completed if row else 0,
+        })
+        day += timedelta(days=1)
+    return series
+
+
+def throughput_series(project, start, end):
+    """Số task hoàn thành theo tuần (tuần bắt đầu từ thứ Hai)."""
+    first_week = start - timedelta(days=start.weekday())
+    weeks = {}
+    week = first_week
+    while week <= end:
+        weeks[week] = 0
+        week += timedelta(weeks=1)
+    for row in _daily_rows(project, first_week, end).only('date', 'completed'):
+        weeks[row.date - timedelta(days=row.date.weekday())] += row.completed
+    return [{'week_start': week, 'completed': count} for week, count in weeks.items()]
+
+
+def cycle_time_summary(project, start, end, limit=50):
+    """
+    Thời gian In Progress:
+    - summary: thống kê cho các task hoàn thành trong [start, end]
+    - in_progress: các task đang INPR lâu nhất (tính đến hiện tại)
+    """
+    now = timezone.now()
+    completed = TaskCycleStat.objects.filter(
+        project=project,
+        completed_at__gte=_start_of(start),
+        completed_at__lt=_start_of(end + timedelta(days=1)),
+    )
+    summary = completed.aggregate(
+        count=Count('task_id'),
+        avg_seconds=Avg('inpr_seconds'),
+        max_seconds=Max('inpr_seconds'),
+    )
+    count = summary['count']
+    for name, fraction in (('p50_seconds', 0.5), ('p85_seconds', 0.85)):
+        summary[name] = None
+        if count:
+            summary[name] = completed.order_by('inpr_seconds').values_list(
+                'inpr_seconds', flat=True
+            )[min(int(count * fraction), count - 1)]
+    if summary['avg_seconds'] is not None:
+        summary['avg_seconds'] = int(summary['avg_seconds'])
+
+    in_progress = [
+        {
+            'task': stat.task_id,
+            'title': stat.task.title,
+            'inpr_seconds': stat.inpr_seconds + int((now - stat.inpr_since).total_seconds()),
+            'inpr_since': stat.inpr_since,
+        }
+        for stat in TaskCycleStat.objects.filter(
+            project=project, inpr_since__isnull=False
+        ).select_related('task').only('task_id', 'task__title', 'inpr_seconds', 'inpr_since').order_by('inpr_since')[:limit]
+    ]
+    return {'summary': summary, 'in_progress': in_progress}
+
+
+def rebuild(project_ids=None):
+    """Dựng lại rollup từ đầu bằng cách phát lại các sự kiện có cấu trúc (dùng cho backfill)."""
+    logs = ActivityLog.objects.filter(
+        project__isnull=False,
+        target_type=ActivityLog.TargetType.TASK,
+        verb__in=[ActivityLog.Verb.TASK_CREATED, ActivityLog.Verb.TASK_UPDATED, ActivityLog.Verb.TASK_DELETED],
+    )
+    stats = ProjectDailyStat.objects.all()
+    cycles = TaskCycleStat.objects.all()
+    if project_ids:
+        logs = logs.filter(project_id__in=project_ids)
+        stats = stats.filter(project_id__in=project_ids)
+        cycles = cycles.filter(project_id__in=project_ids)
+
+    with transaction.atomic():
+        stats.delete()
+        cycles.delete()
+        replayed = 0
+        for log in logs.order_by('timestamp', 'id').iterator(chunk_size=2000):
+            record_event(log)
+            replayed += 1
+    return replayed
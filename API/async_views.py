@@ -0,0 +1,242 @@
+"""
+Phiên bản async của các endpoint đọc nhiều nhất (bật bằng ASYNC_VIEWS_ENABLED khi chạy ASGI).
+
+DRF chưa hỗ trợ view async nên AsyncAPIView tự cài dispatch async:
+- xác thực JWT: giải mã token (CPU) rồi lấy user bằng ORM async (aget)
+- quyền: dùng ahas_permission / ahas_object_permission nếu permission có (tra cứu DB async),
+  còn lại gọi bản đồng bộ (các permission đó không truy vấn DB)
+- queryset được duyệt bằng `async for` trước khi serialize -> serializer không chạm DB
+  (mọi quan hệ serializer cần đều đã select_related)
+
+Mỗi view async kế thừa view đồng bộ tương ứng (quyền, query_budget, serializer giữ nguyên);
+các method ghi (POST / PUT / PATCH / DELETE) chạy lại code đồng bộ qua sync_to_async.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions, status
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import notifications, recurrence
+from .instrumentation import span
+from .models import ActivityLog, Notification, Project, Task
+from .permissions import CanViewTaskList
+from .filters import TaskFilter
+from .serializers import ActivityLogSerializer, NotificationSerializer, TaskSerializer
+from .views import (
+    ActivityLogProjectView,
+    ActivityLogTaskView,
+    BaseAPIView,
+    NotificationListView,
+    PersonalTaskListView,
+    TaskDetailView,
+    TaskListView,
+)
+
+
+# SECTION: Xác thực
+class AsyncJWTAuthentication(JWTAuthentication):
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """Giống JWTAuthentication.get_user nhưng dùng ORM async."""
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise exceptions.AuthenticationFailed("Token không chứa thông tin người dùng.", code='token_not_valid')
+        try:
+            user = await self.user_model.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Người dùng không tồn tại.", code='user_not_found')
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise exceptions.AuthenticationFailed("Tài khoản đã bị khóa.", code='user_inactive')
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise exceptions.AuthenticationFailed("Mật khẩu đã thay đổi.", code='password_changed')
+        return user
+
+
+# SECTION: APIView async
+class AsyncAPIView(BaseAPIView):
+    authentication_classes = [AsyncJWTAuthentication]
+
+    @staticmethod
+    def run_sync(handler):
+        """Dùng lại một handler đồng bộ (vd: method ghi của view cũ) trong view async."""
+        async def wrapper(self, request, *args, **kwargs):
+            return await sync_to_async(handler)(self, request, *args, **kwargs)
+        return wrapper
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        with span('view'):
+            try:
+                await self.ainitial(request, *args, **kwargs)
+                if request.method.lower() in self.http_method_names:
+                    handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+                else:
+                    handler = self.http_method_not_allowed
+                response = handler(request, *args, **kwargs)
+                if asyncio.iscoroutine(response):
+                    response = await response
+            except Exception as exc:
+                response = self.handle_exception(exc)
+
+            self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        # Giống APIView.initial, phần có I/O chạy async
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        await self.acheck_permissions(request)
+        if self.get_throttles():
+            await sync_to_async(self.check_throttles)(request)
+
+    async def aperform_authentication(self, request):
+        try:
+            for authenticator in request.authenticators:
+                if hasattr(authenticator, 'aauthenticate'):
+                    user_auth = await authenticator.aauthenticate(request)
+                else:
+                    user_auth = await sync_to_async(authenticator.authenticate)(request)
+                if user_auth is not None:
+                    request._authenticator = authenticator
+                    request.user, request.auth = user_auth
+                    return
+        except exceptions.APIException:
+            request._not_authenticated()
+            raise
+        request._not_authenticated()
+
+    async def acheck_permissions(self, request):
+        with span('perm'):
+            for permission in self.get_permissions():
+                if hasattr(permission, 'ahas_permission'):
+                    allowed = await permission.ahas_permission(request, self)
+                else:
+                    allowed = permission.has_permission(request, self)
+                if not allowed:
+                    self.permission_denied(
+                        request,
+                        message=getattr(permission, 'message', None),
+                        code=getattr(permission, 'code', None),
+                    )
+
+    async def acheck_object_permissions(self, request, obj):
+        with span('perm'):
+            for permission in self.get_permissions():
+                if hasattr(permission, 'ahas_object_permission'):
+                    allowed = await permission.ahas_object_permission(request, self, obj)
+                else:
+                    allowed = permission.has_object_permission(request, self, obj)
+                if not allowed:
+                    self.permission_denied(
+                        request,
+                        message=getattr(permission, 'message', None),
+                        code=getattr(permission, 'code', None),
+                    )
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def alist_tasks(request, queryset, filterset):
+    """Task đã lọc; khi có due_date_before thì kèm lần lặp ảo (phần chiếu chạy đồng bộ)."""
+    if recurrence.window(filterset.form.cleaned_data) is None:
+        return await alist(filterset.qs)
+    return await sync_to_async(recurrence.with_occurrences)(request, queryset, filterset)
+
+
+# SECTION: Task
+class AsyncTaskListView(AsyncAPIView, TaskListView):
+    async def get(self, request, pk):
+        tasks = CanViewTaskList().filter_queryset(request, pk).select_related('assignee').order_by('status', 'rank', 'id')
+        filterset = TaskFilter(request.GET, queryset=tasks, request=request)
+        if filterset.is_valid():
+            return Response(TaskSerializer(await alist_tasks(request, tasks, filterset), many=True).data, status=status.HTTP_200_OK)
+        return Response(TaskSerializer(await alist(tasks), many=True).data, status=status.HTTP_200_OK)
+
+    post = AsyncAPIView.run_sync(TaskListView.post)
+
+
+class AsyncPersonalTaskListView(AsyncAPIView, PersonalTaskListView):
+    async def get(self, request):
+        tasks = Task.objects.filter(created_by=request.user, is_personal=True).select_related('assignee').order_by('status', 'rank', 'id')
+        filterset = TaskFilter(request.GET, queryset=tasks, request=request)
+        if filterset.is_valid():
+            return Response(TaskSerializer(await alist_tasks(request, tasks, filterset), many=True).data, status=status.HTTP_200_OK)
+        return Response(TaskSerializer(await alist(tasks), many=True).data, status=status.HTTP_200_OK)
+
+    post = AsyncAPIView.run_sync(PersonalTaskListView.post)
+
+
+class AsyncTaskDetailView(AsyncAPIView, TaskDetailView):
+    async def get(self, request, pk):
+        try:
+            task = await Task.objects.select_related('project', 'assignee').aget(pk=pk)
+        except Task.DoesNotExist:
+            raise NotFound("Công việc không tồn tại.")
+        await self.acheck_object_permissions(request, task)
+        return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
+
+    put = AsyncAPIView.run_sync(TaskDetailView.put)
+    patch = AsyncAPIView.run_sync(TaskDetailView.patch)
+    delete = AsyncAPIView.run_sync(TaskDetailView.delete)
+
+
+# SECTION: Nhật ký hoạt động
+class AsyncActivityLogProjectView(AsyncAPIView, ActivityLogProjectView):
+    async def get(self, request, pk):
+        try:
+            project = await Project.objects.aget(pk=pk)
+        except Project.DoesNotExist:
+            return Response({"error": "Dự án không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
+        await self.acheck_object_permissions(request, project)
+        logs = ActivityLog.objects.filter(project=project).select_related('actor', 'project').order_by('-timestamp')
+        return Response(ActivityLogSerializer(await alist(logs), many=True).data)
+
+
+class AsyncActivityLogTaskView(AsyncAPIView, ActivityLogTaskView):
+    async def get(self, request, task_pk):
+        try:
+            task = await Task.objects.select_related('project').aget(pk=task_pk)
+        except Task.DoesNotExist:
+            return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
+        await self.acheck_object_permissions(request, task)
+        logs = ActivityLog.objects.filter(task=task).select_related('actor', 'project').order_by('-timestamp')
+        return Response(ActivityLogSerializer(await alist(logs), many=True).data)
+
+
+# SECTION: Thông báo
+class AsyncNotificationListView(AsyncAPIView, NotificationListView):
+    async def get(self, request):
+        queryset = Notification.objects.filter(recipient=request.user, pending_digest=False).select_related('project', 'task').order_by('-created_at')
+        items = await alist(notifications.with_read_state(queryset, await notifications.aread_state(request.user)))
+        unread_count = sum(not notification.read for notification in items)
+        return Response({
+            'unread_count': unread_count,
+            'notifications': NotificationSerializer(items, many=True).data,
+        }, status=status.HTTP_200_OK)
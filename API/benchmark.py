@@ -0,0 +1,235 @@
+"""
+Bộ đo độ trễ endpoint (dùng bởi lệnh `manage.py benchmark`).
+
+Phát lại một tập request có trọng số (giống tỉ lệ truy cập thực tế) qua test client của Django,
+chạy trong cùng process nên kết quả phản ánh chi phí của view / serializer / ORM / DB,
+không tính mạng hay web server. Mỗi user được xác thực bằng JWT thật (có cả lần tra user).
+
+Hai chế độ chạy với `concurrency` client đồng thời:
+- wsgi: handler đồng bộ (Client), mỗi client một thread - giống worker WSGI nhiều thread
+- asgi: handler ASGI (AsyncClient) trên một event loop - giống một worker uvicorn;
+  chạy với ASYNC_VIEWS_ENABLED=True để so sánh view async với view đồng bộ
+
+Kết quả gồm p50 / p95 / p99, số query trung bình / tối đa mỗi request và throughput,
+tính theo từng endpoint và tổng thể, xuất ra JSON để so sánh giữa các lần chạy.
+"""
+import asyncio
+import json
+import math
+import platform
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import instrumentation
+from .models import Comment, Notification, Project, Task, User
+
+# SECTION: Tập request
+# (tên, trọng số, method, url name, hàm sinh kwargs cho URL, có ghi dữ liệu hay không)
+ENDPOINTS = [
+    ('project-list', 10, 'get', 'project-list', lambda rng, ctx: {}, False),
+    ('project-detail', 6, 'get', 'project-detail', lambda rng, ctx: {'pk': rng.choice(ctx['projects'])}, False),
+    ('project-task-list', 18, 'get', 'project-task-list', lambda rng, ctx: {'pk': rng.choice(ctx['projects'])}, False),
+    ('personal-task-list', 6, 'get', 'personal-task-list', lambda rng, ctx: {}, False),
+    ('task-detail', 14, 'get', 'task-detail', lambda rng, ctx: {'pk': rng.choice(ctx['tasks'])}, False),
+    ('task-comment-list', 8, 'get', 'task-comment-list', lambda rng, ctx: {'task_pk': rng.choice(ctx['tasks'])}, False),
+    ('task-attachment-list', 3, 'get', 'task-attachment-list', lambda rng, ctx: {'task_pk': rng.choice(ctx['tasks'])}, False),
+    ('project-activity-log', 4, 'get', 'project-activity-log', lambda rng, ctx: {'pk': rng.choice(ctx['projects'])}, False),
+    ('task-activity-log', 3, 'get', 'task-activity-log', lambda rng, ctx: {'task_pk': rng.choice(ctx['tasks'])}, False),
+    ('notification-list', 12, 'get', 'notification-list', lambda rng, ctx: {}, False),
+    ('user-list', 3, 'get', 'user-list', lambda rng, ctx: {}, False),
+    ('sync', 5, 'get', 'sync', lambda rng, ctx: {}, False),
+    ('project-analytics-burndown', 2, 'get', 'project-analytics-burndown', lambda rng, ctx: {'pk': rng.choice(ctx['projects'])}, False),
+    ('task-update', 3, 'patch', 'task-detail', lambda rng, ctx: {'pk': rng.choice(ctx['tasks'])}, True),
+    ('task-create', 2, 'post', 'project-task-list', lambda rng, ctx: {'pk': rng.choice(ctx['projects'])}, True),
+    ('notification-mark-all-read', 1, 'post', 'notification-mark-all-read', lambda rng, ctx: {}, True),
+]
+
+
+def request_body(name, rng):
+    if name == 'task-update':
+        return {'status': rng.choice([Task.Status.TODO, Task.Status.IN_PROGRESS, Task.Status.DONE])}
+    if name == 'task-create':
+        return {'title': f'Benchmark task {rng.randint(0, 10 ** 9)}', 'priority': Task.Priority.MEDIUM}
+    return None
+
+
+# SECTION: Chuẩn bị
+def user_context(user, max_ids=200):
+    """Các dự án / task user truy cập được (lấy mẫu) để sinh URL hợp lệ."""
+    project_ids = list(
+        Project.objects.filter(members=user).values_list('id', flat=True).order_by('id')[:max_ids]
+    ) or list(Project.objects.filter(owner=user).values_list('id', flat=True)[:max_ids])
+    task_ids = list(Task.objects.filter(project_id__in=project_ids).values_list('id', flat=True).order_by('?')[:max_ids])
+    return {'projects': project_ids, 'tasks': task_ids}
+
+
+def pick_users(rng, count, prefix=None):
+    """Chọn user có ít nhất một dự án có task (ưu tiên user có tiền tố do seed_data sinh ra)."""
+    users = User.objects.filter(projects__tasks__isnull=False).distinct().order_by('id')
+    if prefix:
+        users = users.filter(username__startswith=f'{prefix}_')
+    candidates = list(users.values_list('id', flat=True))
+    if not candidates:
+        return []
+    chosen = rng.sample(candidates, min(count, len(candidates)))
+    return list(User.objects.filter(id__in=chosen).order_by('id'))
+
+
+def build_clients(users):
+    """[(user, header Authorization, context)] - client HTTP được tạo riêng cho từng luồng khi chạy."""
+    clients = []
+    for user in users:
+        context = user_context(user)
+        if not context['projects'] or not context['tasks']:
+            continue
+        clients.append((user, f'Bearer {RefreshToken.for_user(user).access_token}', context))
+    return clients
+
+
+def build_plan(rng, clients, requests, include_writes=True, only=None):
+    """Danh sách request cố định (cùng seed -> cùng thứ tự) để các lần chạy so sánh được."""
+    endpoints = [
+        endpoint for endpoint in ENDPOINTS
+        if (include_writes or not endpoint[5]) and (not only or endpoint[0] in only)
+    ]
+    weights = [endpoint[1] for endpoint in endpoints]
+    plan = []
+    for _ in range(requests):
+        name, _weight, method, url_name, kwargs_for, _writes = rng.choices(endpoints, weights=weights)[0]
+        user, authorization, context = rng.choice(clients)
+        url = reverse(url_name, kwargs=kwargs_for(rng, context))
+        plan.append((name, method, url, request_body(name, rng), authorization))
+    return plan
+
+
+# SECTION: Chạy và tổng hợp
+def percentile(sorted_values, fraction):
+    """Percentile kiểu nearest-rank trên danh sách đã sắp xếp."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def send(client, method, url, body, authorization):
+    """Gửi 1 request (JSON). Với AsyncClient trả về coroutine."""
+    return client.generic(
+        method.upper(), url,
+        json.dumps(body) if body is not None else '',
+        content_type='application/json',
+        headers={'Authorization': authorization},
+    )
+
+
+def run_plan(plan, warmup=0, server='wsgi', concurrency=1):
+    """Chạy plan với `concurrency` client đồng thời; trả về [(tên, giây, số query, status)] và tổng thời gian chạy."""
+    instrumentation.install_db_instrumentation()
+    runner = run_asgi if server == 'asgi' else run_wsgi
+    # Tắt giới hạn tần suất: đo chi phí xử lý, không đo 429
+    with override_settings(ALLOWED_HOSTS=['testserver'], RATE_LIMITS={}):
+        runner(plan[:warmup], concurrency)
+        started = time.perf_counter()
+        samples = runner(plan[warmup:], concurrency)
+        wall = time.perf_counter() - started
+    return samples, wall
+
+
+def run_wsgi(plan, concurrency):
+    local = threading.local()
+
+    def execute(item):
+        name, method, url, body, authorization = item
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        with instrumentation.collecting(spans=False) as request_metrics:
+            response = send(local.client, method, url, body, authorization)
+        return name, request_metrics.elapsed(), request_metrics.db_queries, response.status_code
+
+    if concurrency <= 1:
+        return [execute(item) for item in plan]
+
+    def release(_):
+        # Mỗi thread worker giữ kết nối DB riêng (như worker WSGI với CONN_MAX_AGE); đóng khi chạy xong
+        barrier.wait()
+        connections.close_all()
+
+    barrier = threading.Barrier(concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(execute, plan))
+        list(pool.map(release, range(concurrency)))
+    return samples
+
+
+def run_asgi(plan, concurrency):
+    async def main():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def execute(item):
+            name, method, url, body, authorization = item
+            async with semaphore:
+                with instrumentation.collecting(spans=False) as request_metrics:
+                    response = await send(client, method, url, body, authorization)
+            return name, request_metrics.elapsed(), request_metrics.db_queries, response.status_code
+
+        return await asyncio.gather(*(execute(item) for item in plan))
+
+    return asyncio.run(main())
+
+
+def summarize_samples(samples):
+    latencies = sorted(seconds for _name, seconds, _queries, _status in samples)
+    queries = [count for _name, _seconds, count, _status in samples]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for *_rest, status in samples if status >= 400),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        'queries_mean': round(sum(queries) / len(queries), 2) if queries else 0.0,
+        'queries_max': max(queries, default=0),
+    }
+
+
+def summarize(samples, wall, **meta):
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample[0]].append(sample)
+    overall = summarize_samples(samples)
+    overall['wall_seconds'] = round(wall, 3)
+    overall['throughput_rps'] = round(len(samples) / wall, 2) if wall else 0.0
+    return {
+        'meta': {
+            'started_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'async_views': settings.ASYNC_VIEWS_ENABLED,
+            'dataset': dataset_size(),
+            **meta,
+        },
+        'overall': overall,
+        'endpoints': {name: summarize_samples(items) for name, items in sorted(by_endpoint.items())},
+    }
+
+
+def dataset_size():
+    return {
+        'users': User.objects.count(),
+        'projects': Project.objects.count(),
+        'tasks': Task.objects.count(),
+        'comments': Comment.objects.count(),
+        'notifications': Notification.objects.count(),
+    }
@@ -0,0 +1,84 @@
+"""
+Bảng Kanban của dự án (GET projects/<pk>/board/).
+
+Một query duy nhất cho mọi cột: hàm cửa sổ theo status tính tổng số task của cột (COUNT OVER) và số thứ tự
+của task trong trang (SUM OVER theo rank, id), rồi chỉ lấy `limit + 1` dòng đầu mỗi cột (dòng thừa cho
+biết còn trang sau). Dự án lớn mở ngay vì không bao giờ tải cả cột.
+
+Trang tiếp của một cột: ?status=<cột>&cursor=<next_cursor>. Cursor là vị trí (rank, id) của task cuối trang
+trước (keyset) nên không lệch khi task được thêm / kéo thả giữa hai lần tải.
+"""
+import base64
+import json
+
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When, Window
+from django.db.models.expressions import RowRange
+from django.db.models.functions import RowNumber
+
+from .models import Task
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def encode_cursor(task):
+    raw = json.dumps([task.rank, task.pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """-> (rank, id); ValueError nếu cursor hỏng."""
+    try:
+        rank, pk = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(value) from e
+    if not isinstance(rank, str) or not isinstance(pk, int):
+        raise ValueError(value)
+    return rank, pk
+
+
+def after(cursor):
+    rank, pk = cursor
+    return Q(rank__gt=rank) | Q(rank=rank, pk__gt=pk)
+
+
+def build_columns(queryset, limit=DEFAULT_LIMIT, cursor=None, statuses=None):
+    """
+    queryset: task của dự án (đã lọc quyền / bộ lọc). Trả về danh sách cột theo thứ tự Task.Status:
+    {'status', 'label', 'total', 'tasks': [Task], 'next_cursor'}.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    if statuses is not None:
+        # Chỉ đọc các cột được yêu cầu (cursor / bộ lọc không tự giới hạn trạng thái)
+        queryset = queryset.filter(status__in=statuses)
+    column = {'partition_by': [F('status')]}
+    ordered = {**column, 'order_by': [F('rank').asc(), F('id').asc()]}
+    # Task trước cursor có thứ tự 0 (chúng đứng đầu cột nên tổng lũy kế chưa tăng)
+    in_page = Case(When(after(cursor), then=Value(1)), default=Value(0), output_field=IntegerField()) if cursor else Value(1)
+    rows = (
+        queryset
+        .annotate(
+            column_total=Window(Count('id'), **column),
+            column_row=Window(RowNumber(), **ordered),
+            page_position=Window(Sum(in_page), frame=RowRange(start=None, end=0), **ordered),
+        )
+        # Dòng đầu cột luôn được lấy để biết tổng số task, kể cả khi trang sau cursor đã hết
+        .filter(Q(page_position__gte=1, page_position__lte=limit + 1) | Q(column_row=1))
+        .order_by('status', 'rank', 'id')
+    )
+
+    columns = {
+        value: {'status': value, 'label': label, 'total': 0, 'tasks': [], 'next_cursor': None}
+        for value, label in Task.Status.choices
+        if statuses is None or value in statuses
+    }
+    for task in rows:
+        current = columns[task.status]
+        current['total'] = task.column_total
+        if task.page_position == 0:
+            continue
+        if task.page_position <= limit:
+            current['tasks'].append(task)
+        else:
+            current['next_cursor'] = encode_cursor(current['tasks'][-1])
+    return list(columns.values())
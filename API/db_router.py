@@ -0,0 +1,216 @@
+"""
+Định tuyến đọc sang replica (DATABASE_REPLICAS) với đảm bảo read-your-writes.
+
+- Chỉ request GET / HEAD / OPTIONS đi qua ReplicaRoutingMiddleware mới được đọc từ replica;
+  management command, worker, migrate... luôn dùng 'default'.
+- Mỗi request chọn 1 replica khỏe (ngẫu nhiên) và dùng nó cho mọi lần đọc trong request.
+- Sau khi user ghi (request không an toàn thành công, hoặc có câu ghi trong request), user bị
+  "ghim" vào primary trong DB_READ_YOUR_WRITES_SECONDS giây (lưu trong cache -> cần REDIS_URL
+  khi chạy nhiều worker). Trong request, sau câu ghi đầu tiên / trong transaction: đọc từ primary.
+- Replica được kiểm tra sức khỏe + độ trễ sao chép tối đa mỗi REPLICA_HEALTH_CHECK_INTERVAL giây
+  (ngay trong request đầu tiên sau chu kỳ). Lỗi kết nối hoặc trễ quá REPLICA_MAX_LAG_SECONDS ->
+  tạm bỏ khỏi vòng quay cho tới lần kiểm tra sau.
+
+Quyết định định tuyến được gắn vào Server-Timing / log (tag 'db_route') và metric db_route_total.
+"""
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import instrumentation, metrics
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_KEY = 'db-pin:{user_id}'
+
+# Độ trễ sao chép (giây); 0 nếu replica đã áp dụng hết WAL nhận được (tránh báo trễ giả khi primary rảnh)
+LAG_SQL = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+# SECTION: Sức khỏe replica
+class ReplicaHealth:
+    """Trạng thái từng replica trong process: khỏe hay không, độ trễ, lần kiểm tra gần nhất."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.status = {}
+
+    def healthy(self):
+        now = time.monotonic()
+        healthy = []
+        for alias in replica_aliases():
+            status = self.status.get(alias)
+            if status is None or now - status['checked_at'] >= settings.REPLICA_HEALTH_CHECK_INTERVAL:
+                status = self.check(alias, now)
+            if status['healthy']:
+                healthy.append(alias)
+        return healthy
+
+    def check(self, alias, now):
+        # Chỉ một thread kiểm tra; các thread khác dùng trạng thái cũ (mặc định khỏe nếu chưa từng kiểm tra)
+        if not self.lock.acquire(blocking=False):
+            return self.status.get(alias) or {'healthy': True, 'lag': 0.0, 'checked_at': 0.0}
+        try:
+            connection = connections[alias]
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(LAG_SQL if connection.vendor == 'postgresql' else 'SELECT 0')
+                    lag = float(cursor.fetchone()[0] or 0)
+                healthy = lag <= settings.REPLICA_MAX_LAG_SECONDS
+            except Exception:
+                connection.close()
+                lag, healthy = None, False
+            status = self.status[alias] = {'healthy': healthy, 'lag': lag, 'checked_at': now}
+            return status
+        finally:
+            self.lock.release()
+
+
+health = ReplicaHealth()
+
+
+@metrics.register_collector
+def _replica_gauges(registry):
+    for alias, status in list(health.status.items()):
+        registry.set_gauge('db_replica_healthy', 1 if status['healthy'] else 0, alias=alias)
+        if status['lag'] is not None:
+            registry.set_gauge('db_replica_lag_seconds', status['lag'], alias=alias)
+
+
+# SECTION: Ghim read-your-writes
+def pin_user(user_id):
+    cache.set(PIN_KEY.format(user_id=user_id), 1, timeout=settings.DB_READ_YOUR_WRITES_SECONDS)
+
+
+def is_pinned(user_id):
+    pinned = cache.get(PIN_KEY.format(user_id=user_id)) is not None
+    metrics.observe_cache('db_pin', pinned)
+    return pinned
+
+
+def _user_id_from_token(request):
+    """Đọc user id từ JWT trong header (không truy vấn DB) - xác thực DRF chạy sau middleware."""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.settings import api_settings
+
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token)[api_settings.USER_ID_CLAIM]
+    except Exception:
+        return None
+
+
+# SECTION: Trạng thái theo request
+class RoutingState:
+    __slots__ = ('request', 'read_alias', 'wrote')
+
+    def __init__(self, request):
+        self.request = request
+        self.read_alias = None
+        self.wrote = False
+
+    def decide(self):
+        """Chọn nơi đọc cho cả request (gọi ở lần đọc đầu tiên)."""
+        if self.request.method not in SAFE_METHODS:
+            return self.route(DEFAULT_DB_ALIAS, 'unsafe_method')
+        user_id = _user_id_from_token(self.request)
+        if user_id is not None and is_pinned(user_id):
+            return self.route(DEFAULT_DB_ALIAS, 'pinned')
+        healthy = health.healthy()
+        if not healthy:
+            return self.route(DEFAULT_DB_ALIAS, 'no_healthy_replica')
+        return self.route(random.choice(healthy), 'replica')
+
+    def route(self, alias, reason):
+        self.read_alias = alias
+        instrumentation.tag('db_route', f'{alias}:{reason}')
+        metrics.registry.inc('db_route_total', target=alias, reason=reason)
+        return alias
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state.read_alias or state.decide()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and not state.wrote:
+            state.wrote = True
+            if state.read_alias not in (None, DEFAULT_DB_ALIAS):
+                state.route(DEFAULT_DB_ALIAS, 'wrote')
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replica là bản sao của default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+# --- MIDDLEWARE ---
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = RoutingState(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.finish(request, response, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.finish(request, response, state)
+        return response
+
+    def finish(self, request, response, state):
+        wrote = state.wrote or (request.method not in SAFE_METHODS and response.status_code < 400)
+        if not wrote:
+            return
+        # DRF gán request.user sau khi xác thực JWT; fallback đọc trực tiếp token
+        user = getattr(request, 'user', None)
+        user_id = user.pk if user is not None and getattr(user, 'is_authenticated', False) else _user_id_from_token(request)
+        if user_id is not None:
+            pin_user(user_id)
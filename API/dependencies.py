@@ -0,0 +1,201 @@
+"""
+Đồ thị phụ thuộc giữa các task ("bị chặn bởi"): cạnh blocked_by -> task.
+
+Chống chu trình bằng thứ tự topo tăng dần (Task.topo_order, thuật toán Pearce-Kelly), không duyệt cả đồ thị:
+- task mới vào đồ thị nhận thứ tự ở đầu (blocked_by) hoặc cuối (task bị chặn) -> cạnh mới luôn đúng chiều
+- thêm x -> y với ord(x) < ord(y): không thể tạo chu trình, không phải làm gì thêm
+- ngược lại chỉ xét vùng ord(y)..ord(x): một query lấy các cạnh trong vùng, DFS xuôi từ y (gặp x = chu trình
+  -> từ chối), DFS ngược từ x, rồi chia lại đúng các giá trị thứ tự của những task đã đi qua
+Các thay đổi đồ thị của một dự án chạy tuần tự (khóa dòng dự án).
+
+Đường găng (chuỗi dài nhất các task chưa xong) và task đang bị chặn được tính theo nhóm (Task.dependency_group:
+hai đầu của mọi cạnh luôn cùng nhóm) và cache theo nhóm. Thêm / xóa cạnh hoặc lưu một task trong nhóm chỉ xóa
+cache của nhóm đó. Xóa cạnh không tách nhóm: nhóm chỉ cần chứa đủ các cạnh, không cần liên thông tối thiểu.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Min
+
+from . import metrics
+from .models import Project, Task, TaskDependency
+
+
+class CycleError(Exception):
+    """Cạnh mới tạo chu trình; cycle = [blocked_by, task, ..., blocked_by]."""
+
+    def __init__(self, cycle):
+        super().__init__(cycle)
+        self.cycle = cycle
+
+
+def cache_key(project_id, group):
+    return f'deps:{project_id}:{group}'
+
+
+def invalidate(project_id, *groups):
+    keys = [cache_key(project_id, group) for group in groups if group is not None]
+    if keys:
+        # Xóa ngay và xóa lại sau commit: request đọc chen giữa có thể đã cache lại dữ liệu trước commit
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+# SECTION: Thêm / xóa cạnh
+def add_dependency(task, blocked_by, user=None):
+    """Trả về (TaskDependency, đã tạo mới hay chưa). CycleError nếu cạnh tạo chu trình."""
+    project_id = task.project_id
+    with transaction.atomic():
+        list(Project.objects.select_for_update().filter(pk=project_id).values_list('pk', flat=True))
+        existing = TaskDependency.objects.filter(task=task, blocked_by=blocked_by).first()
+        if existing is not None:
+            return existing, False
+        nodes = {
+            node.pk: node
+            for node in Task.all_objects.filter(pk__in=[task.pk, blocked_by.pk]).only('id', 'topo_order', 'dependency_group')
+        }
+        x, y = nodes[blocked_by.pk], nodes[task.pk]
+        orders = {}
+        if x.topo_order is None or y.topo_order is None:
+            bounds = Task.all_objects.filter(project_id=project_id).aggregate(low=Min('topo_order'), high=Max('topo_order'))
+            if x.topo_order is None:
+                orders[x.pk] = x.topo_order = (bounds['low'] or 0) - 1
+            if y.topo_order is None:
+                orders[y.pk] = y.topo_order = (bounds['high'] or 0) + 1
+        elif x.topo_order > y.topo_order:
+            orders.update(reorder(project_id, x, y))
+        if orders:
+            Task.all_objects.bulk_update([Task(pk=pk, topo_order=order) for pk, order in orders.items()], ['topo_order'])
+
+        group_x, group_y = x.dependency_group, y.dependency_group
+        group = group_x if group_x is not None else group_y if group_y is not None else x.pk
+        if group_x is not None and group_y is not None and group_x != group_y:
+            # Gộp hai nhóm: đổi nhãn nhóm của y
+            Task.all_objects.filter(project_id=project_id, dependency_group=group_y).update(dependency_group=group)
+        elif group_x is None or group_y is None:
+            Task.all_objects.filter(pk__in=[x.pk, y.pk]).update(dependency_group=group)
+        dependency = TaskDependency.objects.create(task=task, blocked_by=blocked_by, project_id=project_id, created_by=user)
+    invalidate(project_id, group_x, group_y, group)
+    return dependency, True
+
+
+def reorder(project_id, x, y):
+    """Cạnh x -> y với ord(x) > ord(y): DFS trong vùng ord(y)..ord(x), trả về {task id: thứ tự mới}."""
+    low, high = y.topo_order, x.topo_order
+    order = {x.pk: high, y.pk: low}
+    successors, predecessors = defaultdict(list), defaultdict(list)
+    for source, source_order, target, target_order in TaskDependency.objects.filter(
+        project_id=project_id,
+        blocked_by__topo_order__gte=low, blocked_by__topo_order__lte=high,
+        task__topo_order__gte=low, task__topo_order__lte=high,
+    ).values_list('blocked_by_id', 'blocked_by__topo_order', 'task_id', 'task__topo_order'):
+        order[source], order[target] = source_order, target_order
+        successors[source].append(target)
+        predecessors[target].append(source)
+
+    # Xuôi từ y: mọi task y chặn (trực tiếp / gián tiếp) có thứ tự <= ord(x); gặp x là chu trình
+    forward, parent, stack = {y.pk}, {}, [y.pk]
+    while stack:
+        node = stack.pop()
+        for successor in successors[node]:
+            if successor == x.pk:
+                cycle = [x.pk, node]
+                while cycle[-1] != y.pk:
+                    cycle.append(parent[cycle[-1]])
+                raise CycleError([x.pk] + cycle[:0:-1] + [x.pk])
+            if successor not in forward and order[successor] < high:
+                forward.add(successor)
+                parent[successor] = node
+                stack.append(successor)
+    # Ngược từ x: mọi task chặn x có thứ tự >= ord(y)
+    backward, stack = {x.pk}, [x.pk]
+    while stack:
+        node = stack.pop()
+        for predecessor in predecessors[node]:
+            if predecessor not in backward and order[predecessor] > low:
+                backward.add(predecessor)
+                stack.append(predecessor)
+
+    # Nhóm chặn x lên trước nhóm bị y chặn, giữ thứ tự tương đối trong từng nhóm, dùng lại các giá trị cũ
+    moved = sorted(backward, key=order.get) + sorted(forward, key=order.get)
+    pool = sorted(order[node] for node in moved)
+    x.topo_order, y.topo_order = pool[len(backward) - 1], pool[len(backward)]
+    return {node: value for node, value in zip(moved, pool) if order[node] != value}
+
+
+def remove_dependency(dependency):
+    group = Task.all_objects.filter(pk=dependency.task_id).values_list('dependency_group', flat=True).first()
+    dependency.delete()
+    # Bỏ cạnh không làm sai thứ tự topo, chỉ cần tính lại nhóm
+    invalidate(dependency.project_id, group)
+
+
+# SECTION: Đường găng / task bị chặn (cache theo nhóm)
+def analyze_group(nodes, edges):
+    """
+    nodes: {id: (title, status, topo_order)}, edges: [(blocked_by, task)].
+    Đường găng = chuỗi dài nhất tính theo số task chưa xong (task đã xong nằm giữa chuỗi có độ dài 0).
+    """
+    predecessors = defaultdict(list)
+    for source, target in edges:
+        predecessors[target].append(source)
+    is_open = {pk: status != Task.Status.DONE for pk, (_title, status, _order) in nodes.items()}
+    length, previous = {}, {}
+    for pk in sorted(nodes, key=lambda pk: nodes[pk][2]):
+        best = max(predecessors[pk], key=lambda source: length[source], default=None)
+        previous[pk] = best
+        length[pk] = (length[best] if best is not None else 0) + is_open[pk]
+    end = max(nodes, key=lambda pk: (length[pk], -nodes[pk][2]))
+    path = []
+    while end is not None:
+        if is_open[end]:
+            path.append({'id': end, 'title': nodes[end][0], 'status': nodes[end][1]})
+        end = previous[end]
+    return {
+        'length': len(path),
+        'path': path[::-1],
+        'blocked': sorted(pk for pk in nodes if is_open[pk] and any(is_open[source] for source in predecessors[pk])),
+    }
+
+
+def project_analysis(project):
+    """Đường găng dài nhất và danh sách task bị chặn của cả dự án; chỉ tính lại các nhóm chưa có cache."""
+    groups = list(
+        Task.objects.filter(project=project, dependency_group__isnull=False)
+        .values_list('dependency_group', flat=True).distinct()
+    )
+    results = {
+        int(key.rsplit(':', 1)[1]): value
+        for key, value in cache.get_many([cache_key(project.pk, group) for group in groups]).items()
+    }
+    missing = [group for group in groups if group not in results]
+    metrics.observe_cache('task_dependencies', True, len(results))
+    metrics.observe_cache('task_dependencies', False, len(missing))
+    if missing:
+        nodes = defaultdict(dict)
+        for pk, title, task_status, order, group in Task.objects.filter(project=project, dependency_group__in=missing).values_list(
+            'id', 'title', 'status', 'topo_order', 'dependency_group',
+        ):
+            nodes[group][pk] = (title, task_status, order)
+        edges = defaultdict(list)
+        for source, target, group in TaskDependency.objects.filter(
+            project=project, task__dependency_group__in=missing,
+        ).values_list('blocked_by_id', 'task_id', 'task__dependency_group'):
+            # Bỏ cạnh tới task đã xóa (chờ purge dọn)
+            if source in nodes[group] and target in nodes[group]:
+                edges[group].append((source, target))
+        computed = {group: analyze_group(nodes[group], edges[group]) for group in missing if nodes[group]}
+        cache.set_many(
+            {cache_key(project.pk, group): value for group, value in computed.items()},
+            timeout=settings.TASK_DEPENDENCY_CACHE_SECONDS,
+        )
+        results.update(computed)
+
+    critical = max(results.values(), key=lambda result: result['length'], default={'length': 0, 'path': []})
+    return {
+        'critical_path': critical['path'],
+        'critical_path_length': critical['length'],
+        'blocked_task_ids': sorted(pk for result in results.values() for pk in result['blocked']),
+    }
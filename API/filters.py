@@ -1,10 +1,25 @@
+"""
+FilterSet cho các endpoint danh sách (django-filter).
+
+Span 'filter' trong Server-Timing chỉ đo phần kiểm tra tham số và dựng queryset đã lọc. Queryset vẫn lười,
+câu SQL chạy sau đó (lúc phân trang / serialize) nên thời gian query nằm trong span 'db', không nằm trong 'filter'.
+"""
 import django_filters
 from django.db.models import Q
 from .models import Task, Project, User
+from .instrumentation import span
+
+
+# FilterSet gốc: đo thời gian kiểm tra tham số + dựng queryset đã lọc (span 'filter', không gồm chạy query)
+class BaseFilterSet(django_filters.FilterSet):
+    @property
+    def qs(self):
+        with span('filter'):
+            return super().qs
 
 
 # Filter cho Task
-class TaskFilter(django_filters.FilterSet):
+class TaskFilter(BaseFilterSet):
     status = django_filters.CharFilter(field_name='status', lookup_expr='iexact')
     priority = django_filters.CharFilter(field_name='priority', lookup_expr='iexact')
     assignee = django_filters.CharFilter(method='filter_assignee')
@@ -31,7 +46,7 @@ class TaskFilter(django_filters.FilterSet):
 
 
 
-class ProjectFilter(django_filters.FilterSet):
+class ProjectFilter(BaseFilterSet):
     search = django_filters.CharFilter(method='filter_search')
     role = django_filters.CharFilter(method='filter_role')
     
@@ -55,7 +70,7 @@ class ProjectFilter(django_filters.FilterSet):
 
 
 
-class UserFilter(django_filters.FilterSet):
+class UserFilter(BaseFilterSet):
     search = django_filters.CharFilter(method='filter_search')
     
     class Meta:
@@ -0,0 +1,132 @@
+"""
+Băm / kiểm tra mật khẩu (PBKDF2) trong một process pool riêng, có giới hạn.
+
+PBKDF2 (1 triệu vòng) tốn vài trăm ms CPU mỗi lần; khi nhiều người đăng nhập cùng lúc, thread
+xử lý request bị chiếm hết và các request khác cũng bị chậm theo. PooledPBKDF2PasswordHasher
+(đứng đầu PASSWORD_HASHERS, cùng thuật toán 'pbkdf2_sha256' nên hash cũ vẫn dùng được) chuyển
+phần tính toán sang HASH_POOL_WORKERS process:
+- login (ModelBackend -> check_password), signup (create_user), set / reset password đều đi qua đây
+- tối đa HASH_POOL_WORKERS + HASH_POOL_MAX_QUEUE việc cùng lúc; đầy -> trả 503 ngay (Retry-After)
+  thay vì để request xếp hàng tới timeout
+- HASH_POOL_WORKERS=0: băm ngay trên thread request như mặc định của Django
+
+Metric: password_hash_duration_seconds (thời gian tính trong worker), password_hash_queue_wait_seconds
+(thời gian chờ trong hàng đợi), password_hash_rejected_total, password_hash_in_flight.
+"""
+import base64
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.utils.crypto import constant_time_compare
+from django.utils.encoding import force_bytes
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import metrics
+
+
+class HashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Hệ thống đang quá tải, vui lòng thử lại sau ít giây."
+    default_code = 'hashing_unavailable'
+    # DRF gắn header Retry-After theo thuộc tính này
+    wait = 1
+
+
+def _pbkdf2(password, salt, iterations, digest_name):
+    """Chạy trong process worker: chỉ dùng thư viện chuẩn, trả về (hash, thời gian tính)."""
+    started = time.perf_counter()
+    digest = hashlib.pbkdf2_hmac(digest_name, password, salt, iterations)
+    return digest, time.perf_counter() - started
+
+
+# SECTION: Pool
+class HashPool:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+        self.slots = None
+        self.in_flight = 0
+
+    def get_executor(self):
+        # Tạo lười và tạo lại sau fork (gunicorn --preload) hoặc khi worker chết
+        with self.lock:
+            if self.executor is None or self.pid != os.getpid():
+                workers = settings.HASH_POOL_WORKERS
+                self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+                self.pid = os.getpid()
+                self.slots = threading.BoundedSemaphore(workers + settings.HASH_POOL_MAX_QUEUE)
+            return self.executor, self.slots
+
+    def reset(self, executor):
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, operation, password, salt, iterations, digest_name):
+        executor, slots = self.get_executor()
+        if not slots.acquire(blocking=False):
+            metrics.registry.inc('password_hash_rejected_total', reason='queue_full')
+            raise HashingUnavailable()
+        submitted = time.perf_counter()
+        with self.lock:
+            self.in_flight += 1
+        try:
+            future = executor.submit(_pbkdf2, password, salt, iterations, digest_name)
+            digest, compute = future.result(timeout=settings.HASH_POOL_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            metrics.registry.inc('password_hash_rejected_total', reason='timeout')
+            raise HashingUnavailable()
+        except BrokenProcessPool:
+            self.reset(executor)
+            metrics.registry.inc('password_hash_rejected_total', reason='pool_broken')
+            raise HashingUnavailable()
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+            slots.release()
+        metrics.registry.observe('password_hash_duration_seconds', compute, operation=operation)
+        metrics.registry.observe('password_hash_queue_wait_seconds', max(0.0, time.perf_counter() - submitted - compute))
+        return digest
+
+
+pool = HashPool()
+
+
+@metrics.register_collector
+def _hash_pool_gauges(registry):
+    if pool.executor is not None:
+        registry.set_gauge('password_hash_in_flight', pool.in_flight)
+
+
+# SECTION: Password hasher
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 của Django, phần tính hash chạy trong HashPool."""
+
+    def encode(self, password, salt, iterations=None):
+        return self._encode(password, salt, iterations, operation='hash')
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self._encode(password, decoded['salt'], decoded['iterations'], operation='verify')
+        return constant_time_compare(encoded, encoded_2)
+
+    def _encode(self, password, salt, iterations, operation):
+        if not settings.HASH_POOL_WORKERS:
+            return super().encode(password, salt, iterations)
+        self._check_encode_args(password, salt)
+        iterations = iterations or self.iterations
+        digest = pool.run(operation, force_bytes(password), force_bytes(salt), iterations, self.digest().name)
+        hash = base64.b64encode(digest).decode('ascii').strip()
+        return "%s$%d$%s$%s" % (self.algorithm, iterations, salt, hash)
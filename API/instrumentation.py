@@ -0,0 +1,279 @@
+"""
+Đo hiệu năng theo từng request.
+
+- ServerTimingMiddleware: bật khi PERF_INSTRUMENTATION_ENABLED=True, lấy mẫu theo PERF_SAMPLE_RATE.
+  Với request được lấy mẫu: gắn header `Server-Timing` và ghi 1 dòng log JSON (logger 'API.performance').
+- span(name): đo thời gian một đoạn code (perm / filter / serialize / view ...) và cộng dồn theo tên.
+- Số query + thời gian DB được đếm qua execute_wrapper gắn sẵn vào mỗi kết nối.
+
+Khi tắt: middleware không được nạp (MiddlewareNotUsed), execute_wrapper không được gắn,
+span() chỉ tốn một lần đọc ContextVar và trả về context rỗng dùng chung.
+
+MetricsMiddleware / benchmark chỉ cần thời gian tổng + số query: collecting(spans=False) không đo span / tag
+(span() vẫn trả context rỗng dùng chung), nên khi tắt Server-Timing mỗi request chỉ tốn thêm một
+RequestMetrics và hai lần perf_counter quanh mỗi query.
+
+QueryBudgetMiddleware (dev, QUERY_BUDGET_MODE=warn|raise): so số query của request với
+`query_budget` khai báo trên view và phát hiện cùng một dạng SQL bị lặp quá QUERY_REPEAT_LIMIT lần (N+1).
+"""
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('API.performance')
+
+_current = ContextVar('request_metrics', default=None)
+_NOOP = nullcontext()
+
+
+class RequestMetrics:
+    """Số liệu của một request; chỉ tồn tại khi request được lấy mẫu. detailed=False: chỉ thời gian tổng + DB."""
+    __slots__ = ('started', 'spans', 'db_queries', 'db_seconds', 'tags', 'detailed')
+
+    def __init__(self, detailed=True):
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.tags = {}
+        self.detailed = detailed
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def _timed(metrics, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, time.perf_counter() - start)
+
+
+@contextmanager
+def collecting(spans=True):
+    """
+    Bật thu thập số liệu cho request hiện tại (dùng lại nếu middleware bọc ngoài đã bật; spans=True thì từ đó
+    span / tag cũng được đo).
+    """
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.detailed = metrics.detailed or spans
+        yield metrics
+        return
+    metrics = RequestMetrics(detailed=spans)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def span(name):
+    metrics = _current.get()
+    if metrics is None or not metrics.detailed:
+        return _NOOP
+    return _timed(metrics, name)
+
+
+def tag(name, value):
+    """Gắn thêm thông tin vào dòng log / Server-Timing của request hiện tại (nếu được lấy mẫu)."""
+    metrics = _current.get()
+    if metrics is not None and metrics.detailed:
+        metrics.tags[name] = value
+
+
+# --- DB ---
+def _db_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_seconds += time.perf_counter() - start
+
+
+def _attach_db_wrapper(connection, **kwargs):
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+def install_db_instrumentation():
+    """Gắn execute_wrapper vào các kết nối đã mở và mọi kết nối mở sau này (mọi thread / alias)."""
+    connection_created.connect(_attach_db_wrapper, dispatch_uid='API.instrumentation.db')
+    for connection in connections.all(initialized_only=True):
+        _attach_db_wrapper(connection)
+
+
+# --- MIDDLEWARE ---
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PERF_SAMPLE_RATE
+        install_db_instrumentation()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+        with collecting() as metrics:
+            response = self.get_response(request)
+        self.finish(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+        with collecting() as metrics:
+            response = await self.get_response(request)
+        self.finish(request, response, metrics)
+        return response
+
+    def finish(self, request, response, metrics):
+        total = metrics.elapsed()
+        parts = [f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.db_queries} queries"']
+        parts += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in metrics.spans.items()]
+        parts.append(f'total;dur={total * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(parts)
+
+        match = getattr(request, 'resolver_match', None)
+        user = getattr(request, 'user', None)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.url_name if match else None,
+            'status': response.status_code,
+            'user': user.pk if user is not None and user.is_authenticated else None,
+            'total_ms': round(total * 1000, 2),
+            'db_queries': metrics.db_queries,
+            'db_ms': round(metrics.db_seconds * 1000, 2),
+            'spans_ms': {name: round(seconds * 1000, 2) for name, seconds in metrics.spans.items()},
+            **metrics.tags,
+        }))
+
+
+# --- QUERY BUDGET (dev) ---
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+_query_shapes = ContextVar('query_shapes', default=None)
+# IN (%s, %s, ...) có độ dài thay đổi theo dữ liệu -> gom về một dạng
+_IN_LIST = re.compile(r'\((?:%s|\?)(?:,\s*(?:%s|\?))*\)')
+
+
+def sql_shape(sql):
+    return _IN_LIST.sub('(...)', sql)
+
+
+def _shape_wrapper(execute, sql, params, many, context):
+    shapes = _query_shapes.get()
+    if shapes is not None:
+        shapes[sql_shape(sql)] += 1
+    return execute(sql, params, many, context)
+
+
+def _attach_shape_wrapper(connection, **kwargs):
+    if _shape_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_shape_wrapper)
+
+
+def query_budget_for(view_class, method):
+    """`query_budget` của view: số nguyên (mọi method) hoặc dict {method: số query}."""
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        return budget.get(method)
+    return budget
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.mode = settings.QUERY_BUDGET_MODE
+        if self.mode not in ('warn', 'raise'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.repeat_limit = settings.QUERY_REPEAT_LIMIT
+        connection_created.connect(_attach_shape_wrapper, dispatch_uid='API.instrumentation.shapes')
+        for connection in connections.all(initialized_only=True):
+            _attach_shape_wrapper(connection)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        shapes = Counter()
+        token = _query_shapes.set(shapes)
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_shapes.reset(token)
+        self.check(request, shapes)
+        return response
+
+    async def __acall__(self, request):
+        shapes = Counter()
+        token = _query_shapes.set(shapes)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_shapes.reset(token)
+        self.check(request, shapes)
+        return response
+
+    def check(self, request, shapes):
+        match = getattr(request, 'resolver_match', None)
+        view_class = getattr(match.func, 'view_class', None) if match else None
+        problems = []
+        total = sum(shapes.values())
+        budget = query_budget_for(view_class, request.method)
+        if budget is not None and total > budget:
+            problems.append(f"{total} query, vượt ngân sách {budget}")
+        for shape, count in shapes.most_common():
+            if count <= self.repeat_limit:
+                break
+            problems.append(f"lặp {count} lần: {shape[:300]}")
+        if not problems:
+            return
+        message = f"{request.method} {request.path} ({match.url_name if match else '-'}): " + '; '.join(problems)
+        if self.mode == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,67 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from API import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo độ trễ các endpoint bằng một tập request có trọng số (chạy trong process, JWT thật). "
+        "Xuất p50/p95/p99, số query mỗi request và throughput dạng JSON. Chạy seed_data trước. "
+        "So sánh ASGI với WSGI: chạy `--server wsgi` rồi `--server asgi` (đặt ASYNC_VIEWS_ENABLED=True) "
+        "với cùng --concurrency và --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--warmup', type=int, default=100)
+        parser.add_argument('--users', type=int, default=50, help="Số user được lấy mẫu để gửi request.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', help="Chỉ dùng user do seed_data sinh với tiền tố này.")
+        parser.add_argument('--read-only', action='store_true', help="Bỏ các request ghi dữ liệu.")
+        parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi',
+                            help="wsgi: handler đồng bộ, mỗi client một thread; asgi: AsyncClient trên một event loop.")
+        parser.add_argument('--concurrency', type=int, default=1, help="Số client gửi request đồng thời.")
+        parser.add_argument('--only', action='append', help="Chỉ chạy endpoint này (có thể lặp lại).")
+        parser.add_argument('--label', default='', help="Nhãn ghi vào kết quả (vd: tên nhánh).")
+        parser.add_argument('--output', help="Ghi JSON ra file thay vì stdout.")
+
+    def handle(self, *args, **options):
+        known = {endpoint[0] for endpoint in benchmark.ENDPOINTS}
+        unknown = set(options['only'] or []) - known
+        if unknown:
+            raise CommandError(f"Endpoint không tồn tại: {', '.join(sorted(unknown))}. Có: {', '.join(sorted(known))}")
+
+        rng = random.Random(options['seed'])
+        clients = benchmark.build_clients(benchmark.pick_users(rng, options['users'], options['prefix']))
+        if not clients:
+            raise CommandError("Không có user nào thuộc dự án có task. Chạy `manage.py seed_data` trước.")
+
+        plan = benchmark.build_plan(
+            rng, clients, options['requests'] + options['warmup'],
+            include_writes=not options['read_only'], only=options['only'],
+        )
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency phải >= 1.")
+        samples, wall = benchmark.run_plan(
+            plan, warmup=options['warmup'], server=options['server'], concurrency=options['concurrency'],
+        )
+        result = benchmark.summarize(
+            samples, wall,
+            label=options['label'], seed=options['seed'], users=len(clients), warmup=options['warmup'],
+            read_only=options['read_only'], server=options['server'], concurrency=options['concurrency'],
+        )
+
+        output = json.dumps(result, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output + '\n')
+            overall = result['overall']
+            self.stdout.write(self.style.SUCCESS(
+                f"{overall['requests']} request, p50={overall['p50_ms']}ms p95={overall['p95_ms']}ms "
+                f"p99={overall['p99_ms']}ms, {overall['throughput_rps']} req/s -> {options['output']}"
+            ))
+        else:
+            self.stdout.write(output)
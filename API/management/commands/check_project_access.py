@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from API import access
+
+
+class Command(BaseCommand):
+    help = "Kiểm tra bảng quyền xem dự án (ProjectAccess) khớp với chủ dự án + thành viên."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Sửa các dòng thiếu / thừa / sai vai trò.")
+        parser.add_argument('--batch-size', type=int, default=access.CHECK_BATCH_SIZE,
+                            help="Số dự án mỗi lượt kiểm tra.")
+
+    def handle(self, *args, **options):
+        report = access.check(fix=options['fix'], batch_size=options['batch_size'])
+        labels = {'missing': "Thiếu", 'extra': "Thừa", 'wrong_role': "Sai vai trò"}
+        for key, rows in report.items():
+            for user_id, project_id in rows[:20]:
+                self.stdout.write(f"{labels[key]}: user #{user_id} / dự án #{project_id}")
+        total = sum(len(rows) for rows in report.values())
+        if not total:
+            self.stdout.write(self.style.SUCCESS("Bảng quyền xem khớp với owner + members."))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Đã sửa {total} dòng lệch."))
+        else:
+            self.stdout.write(self.style.ERROR(f"{total} dòng lệch (chạy lại với --fix để sửa)."))
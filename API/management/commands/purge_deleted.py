@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from API import purge
+
+
+class Command(BaseCommand):
+    help = "Dọn dữ liệu của dự án / task đã xóa theo lô (DeletionJob)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Số dòng mỗi lô (mặc định: PURGE_BATCH_SIZE).")
+        parser.add_argument('--watch', action='store_true',
+                            help="Chạy liên tục, kiểm tra job mới mỗi --interval giây.")
+        parser.add_argument('--interval', type=float, default=5.0)
+        parser.add_argument('--retry-failed', action='store_true',
+                            help="Chạy lại các job bị lỗi trước đó.")
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            self.stdout.write(f"Chạy lại {purge.retry_failed()} job lỗi.")
+        while True:
+            for job in purge.run_pending(options['batch_size']):
+                style = self.style.SUCCESS if job.status == job.Status.DONE else self.style.ERROR
+                self.stdout.write(style(
+                    f"{job.kind} #{job.object_id}: {job.get_status_display()} "
+                    f"({job.rows_deleted} dòng, {job.files_deleted} tệp)"
+                ))
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
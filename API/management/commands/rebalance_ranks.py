@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from API import ranking
+
+
+class Command(BaseCommand):
+    help = "Viết lại vị trí (Task.rank) của các cột Kanban có khóa quá dài thành các khóa ngắn, cách đều."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--length', type=int, default=None,
+                            help="Ngưỡng độ dài khóa (mặc định: TASK_RANK_REBALANCE_LENGTH).")
+
+    def handle(self, *args, **options):
+        done = ranking.rebalance_long_columns(options['length'])
+        for label, count in done:
+            self.stdout.write(f"{label}: {count} task")
+        self.stdout.write(self.style.SUCCESS(f"Đã viết lại {len(done)} cột."))
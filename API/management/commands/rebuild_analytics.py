@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from API import analytics
+
+
+class Command(BaseCommand):
+    help = "Dựng lại bảng rollup analytics (ProjectDailyStat, TaskCycleStat) từ nhật ký hoạt động."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='projects',
+                            help="Chỉ dựng lại cho dự án này (có thể lặp lại).")
+
+    def handle(self, *args, **options):
+        replayed = analytics.rebuild(options['projects'])
+        self.stdout.write(self.style.SUCCESS(f"Đã phát lại {replayed} sự kiện."))
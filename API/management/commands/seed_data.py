@@ -0,0 +1,201 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from API import access, analytics, ranking, sync
+from API.models import ActivityLog, Comment, Notification, Project, SyncChange, Task, User
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Sinh dữ liệu giả lập (có seed để tái lập) bằng bulk_create: user, dự án với số thành viên "
+        "lệch (vài dự án rất đông, đa số ít người), task, bình luận, thông báo và nhật ký hoạt động."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--projects', type=int, default=200)
+        parser.add_argument('--tasks-per-project', type=int, default=50, help="Trung bình, phân bố lệch theo quy mô dự án.")
+        parser.add_argument('--personal-tasks-per-user', type=int, default=5)
+        parser.add_argument('--comments-per-task', type=int, default=2)
+        parser.add_argument('--notifications-per-user', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='bench', help="Tiền tố username (phải chưa tồn tại).")
+        parser.add_argument('--password', default='benchmark123', help="Mật khẩu chung cho mọi user sinh ra.")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Đã có user với tiền tố '{prefix}_'. Dùng --prefix khác.")
+
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+        with transaction.atomic(), sync.suppressed():
+            users = self.create_users(prefix, options['users'], options['password'])
+            projects, members = self.create_projects(rng, prefix, users, options['projects'])
+            tasks = self.create_tasks(rng, projects, members, users, options)
+            self.create_comments(rng, tasks, members, options['comments_per_task'])
+            self.create_notifications(rng, users, tasks, options['notifications_per_user'])
+            self.create_activity(rng, tasks)
+            self.record_sync(users, projects)
+        analytics.rebuild([project.pk for project in projects])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Đã sinh {len(users)} user, {len(projects)} dự án, {len(tasks)} task "
+            f"trong {time.perf_counter() - started:.1f}s (seed={options['seed']})."
+        ))
+
+    def create_users(self, prefix, count, password):
+        # Băm mật khẩu 1 lần rồi dùng chung: băm PBKDF2 cho từng user sẽ chiếm gần hết thời gian sinh dữ liệu
+        password_hash = make_password(password)
+        User.objects.bulk_create([
+            User(
+                username=f'{prefix}_{i}',
+                email=f'{prefix}_{i}@example.com',
+                first_name=f'User{i}',
+                last_name=prefix.capitalize(),
+                password=password_hash,
+            )
+            for i in range(count)
+        ], batch_size=BATCH_SIZE)
+        return list(User.objects.filter(username__startswith=f'{prefix}_').order_by('id'))
+
+    def create_projects(self, rng, prefix, users, count):
+        owners = [rng.choice(users) for _ in range(count)]
+        Project.objects.bulk_create([
+            Project(name=f'{prefix.capitalize()} Project {i}', description='Dữ liệu benchmark', owner=owner)
+            for i, owner in enumerate(owners)
+        ], batch_size=BATCH_SIZE)
+        projects = list(Project.objects.filter(name__startswith=f'{prefix.capitalize()} Project ').order_by('id'))
+
+        # Quy mô dự án theo luật lũy thừa (Pareto): đa số 3-10 người, một số ít hàng trăm người.
+        # User "nổi tiếng" (id nhỏ) được chọn nhiều hơn -> một số user thuộc rất nhiều dự án.
+        user_weights = [1.0 / (rank + 1) ** 0.8 for rank in range(len(users))]
+        members = {}
+        through = Project.members.through
+        rows = []
+        for project in projects:
+            size = min(len(users), max(2, int(rng.paretovariate(1.3) * 3)))
+            chosen = {project.owner_id}
+            for user in rng.choices(users, weights=user_weights, k=size):
+                chosen.add(user.pk)
+            members[project.pk] = sorted(chosen)
+            rows.extend(through(project_id=project.pk, user_id=user_id) for user_id in chosen)
+        through.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        # bulk_create không qua signals -> dựng bảng quyền xem cho các dự án vừa tạo
+        access.check(fix=True, project_ids=[project.pk for project in projects])
+        return projects, members
+
+    def create_tasks(self, rng, projects, members, users, options):
+        now = timezone.now()
+        statuses = [Task.Status.TODO, Task.Status.IN_PROGRESS, Task.Status.DONE]
+        priorities = [Task.Priority.LOW, Task.Priority.MEDIUM, Task.Priority.HIGH]
+        rows = []
+        for project in projects:
+            # Dự án đông người thì nhiều task hơn
+            scale = len(members[project.pk]) / 5
+            count = max(1, int(options['tasks_per_project'] * min(scale, 20) * rng.uniform(0.5, 1.5)))
+            # Khóa tăng dần theo thứ tự tạo -> mỗi cột Kanban giữ thứ tự tạo
+            ranks = ranking.spread(count)
+            for i in range(count):
+                rows.append(Task(
+                    rank=ranks[i],
+                    title=f'Task {i} của {project.name}',
+                    status=rng.choices(statuses, weights=[5, 2, 3])[0],
+                    priority=rng.choice(priorities),
+                    due_date=now + timedelta(days=rng.randint(-30, 60)) if rng.random() < 0.7 else None,
+                    project=project,
+                    is_personal=False,
+                    created_by_id=rng.choice(members[project.pk]),
+                    assignee_id=rng.choice(members[project.pk]) if rng.random() < 0.8 else None,
+                ))
+        ranks = ranking.spread(options['personal_tasks_per_user'])
+        for user in users:
+            for i in range(options['personal_tasks_per_user']):
+                rows.append(Task(
+                    rank=ranks[i],
+                    title=f'Việc cá nhân {i}',
+                    status=rng.choices(statuses, weights=[5, 2, 3])[0],
+                    priority=rng.choice(priorities),
+                    due_date=now + timedelta(days=rng.randint(-10, 30)) if rng.random() < 0.5 else None,
+                    project=None,
+                    is_personal=True,
+                    created_by=user,
+                    assignee=user,
+                ))
+        return Task.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+    def create_comments(self, rng, tasks, members, per_task):
+        rows = []
+        for task in tasks:
+            authors = members[task.project_id] if task.project_id else [task.created_by_id]
+            for i in range(rng.randint(0, per_task * 2)):
+                rows.append(Comment(task=task, author_id=rng.choice(authors), body=f'Bình luận {i}'))
+        Comment.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+    def create_notifications(self, rng, users, tasks, per_user):
+        project_tasks = [task for task in tasks if task.project_id]
+        if not project_tasks:
+            return
+        rows = []
+        for user in users:
+            for i in range(rng.randint(0, per_user * 2)):
+                task = rng.choice(project_tasks)
+                rows.append(Notification(
+                    recipient=user,
+                    title=f"Bình luận mới trong công việc '{task.title}'",
+                    message=f'Thông báo benchmark {i}',
+                    project_id=task.project_id,
+                    task=task,
+                    is_read=rng.random() < 0.6,
+                ))
+        Notification.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+    def create_activity(self, rng, tasks):
+        rows = []
+        for task in tasks:
+            if not task.project_id:
+                continue
+            rows.append(ActivityLog(
+                actor_id=task.created_by_id, verb=ActivityLog.Verb.TASK_CREATED,
+                target_type=ActivityLog.TargetType.TASK, target_id=task.pk, target_name=task.title,
+                to_status=Task.Status.TODO, project_id=task.project_id, task=task,
+            ))
+            # Đi qua các trạng thái trung gian cho tới trạng thái hiện tại
+            path = {Task.Status.TODO: [], Task.Status.IN_PROGRESS: ['INPR'], Task.Status.DONE: ['INPR', 'DONE']}[task.status]
+            previous = Task.Status.TODO
+            for new_status in path:
+                rows.append(ActivityLog(
+                    actor_id=task.assignee_id or task.created_by_id, verb=ActivityLog.Verb.TASK_UPDATED,
+                    target_type=ActivityLog.TargetType.TASK, target_id=task.pk, target_name=task.title,
+                    changes={'status': [previous, new_status]}, to_status=new_status,
+                    project_id=task.project_id, task=task,
+                ))
+                previous = new_status
+        ActivityLog.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+    def record_sync(self, users, projects):
+        """bulk_create không phát signal -> tự ghi chuỗi thay đổi để /sync/ thấy dữ liệu mới."""
+        Entity, Op = SyncChange.Entity, SyncChange.Op
+        project_ids = [project.pk for project in projects]
+        user_ids = [user.pk for user in users]
+        # (entity, cột phạm vi, queryset trả về (id, giá trị phạm vi))
+        batches = (
+            (Entity.TASK, 'project_id', Task.objects.filter(project_id__in=project_ids).values_list('id', 'project_id')),
+            (Entity.TASK, 'user_id', Task.objects.filter(created_by_id__in=user_ids, is_personal=True).values_list('id', 'created_by_id')),
+            (Entity.COMMENT, 'project_id', Comment.objects.filter(task__project_id__in=project_ids).values_list('id', 'task__project_id')),
+            (Entity.COMMENT, 'user_id', Comment.objects.filter(task__created_by_id__in=user_ids, task__is_personal=True).values_list('id', 'task__created_by_id')),
+            (Entity.NOTIFICATION, 'user_id', Notification.objects.filter(recipient_id__in=user_ids).values_list('id', 'recipient_id')),
+        )
+        rows = []
+        for entity, scope, values in batches:
+            for object_id, scope_id in values.iterator(chunk_size=BATCH_SIZE):
+                rows.append(SyncChange(entity=entity, object_id=object_id, op=Op.UPSERT, **{scope: scope_id}))
+        SyncChange.objects.bulk_create(rows, batch_size=BATCH_SIZE)
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from API import reminders
+
+
+class Command(BaseCommand):
+    help = "Gửi thông báo nhắc hạn cho task sắp đến hạn / quá hạn (mỗi task chỉ nhắc một lần cho mỗi hạn)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Số task mỗi lô (mặc định: REMINDER_BATCH_SIZE).")
+        parser.add_argument('--watch', action='store_true',
+                            help="Chạy liên tục, kiểm tra mỗi --interval giây.")
+        parser.add_argument('--interval', type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        while True:
+            sent = reminders.send_due_reminders(batch_size=options['batch_size'])
+            if any(sent.values()) or not options['watch']:
+                self.stdout.write(self.style.SUCCESS(
+                    ", ".join(f"{reminders.Kind(kind).label}: {count}" for kind, count in sent.items())
+                ))
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from API import notifications
+
+
+class Command(BaseCommand):
+    help = "Gom thông báo đang chờ của các user chọn nhận tóm tắt (đến hạn) thành bản tóm tắt."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Số user mỗi lô (mặc định: NOTIFICATION_DIGEST_BATCH).")
+
+    def handle(self, *args, **options):
+        sent = notifications.send_digests(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Đã tạo {sent} bản tóm tắt."))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from API import outbox
+
+# Chế độ --watch dọn email cũ (outbox.prune) tối đa mỗi giờ một lần
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+class Command(BaseCommand):
+    help = "Gửi email trong hàng đợi (OutboundEmail) theo lô, mỗi lô một kết nối SMTP."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Số email mỗi lô (mặc định: MAIL_BATCH_SIZE).")
+        parser.add_argument('--watch', action='store_true',
+                            help="Chạy liên tục, kiểm tra hàng đợi mỗi --interval giây.")
+        parser.add_argument('--interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        last_prune = None
+        while True:
+            if last_prune is None or time.monotonic() - last_prune >= PRUNE_INTERVAL_SECONDS:
+                last_prune = time.monotonic()
+                removed = outbox.prune()
+                if removed:
+                    self.stdout.write(f"Đã xóa {removed} email cũ.")
+            sent, failed = outbox.send_pending(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f"Đã gửi {sent} email, {failed} email lỗi (sẽ thử lại).")
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,102 @@
+"""
+Thêm / xóa thành viên dự án hàng loạt (PUT / PATCH projects/<pk>/members/).
+
+Số query không phụ thuộc số người được thêm / xóa:
+- 1 query tính diff: các user được nhắc tới (hoặc đang là thành viên, khi thay cả danh sách)
+  kèm cờ is_member (EXISTS trên bảng trung gian)
+- bulk insert / delete trên bảng trung gian, bulk_create nhật ký + thông báo,
+  ghi /sync/ theo lô (sync.record_project_access / record_user_changes)
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from . import access, sync
+from .models import ActivityLog, Notification, SyncChange, User
+
+# Số user tối đa trong một request
+MAX_BULK_MEMBERS = 1000
+
+Membership = User.projects.through
+
+
+def parse_user_ids(value, field):
+    """Danh sách id (số nguyên, bỏ trùng, giữ thứ tự). Sai định dạng -> ValueError kèm thông báo."""
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise ValueError(f"{field} phải là danh sách id người dùng.")
+    try:
+        ids = list(dict.fromkeys(int(item) for item in value))
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} chỉ được chứa id (số nguyên).")
+    if len(ids) > MAX_BULK_MEMBERS:
+        raise ValueError(f"{field}: tối đa {MAX_BULK_MEMBERS} người dùng mỗi lần.")
+    return ids
+
+
+def member_diff(project, add_ids=(), remove_ids=(), desired_ids=None):
+    """
+    Trả về (to_add, to_remove, unknown_ids): to_add / to_remove là danh sách User.
+    desired_ids: thay cả danh sách thành viên (chủ dự án luôn được giữ lại).
+    """
+    mentioned = set(add_ids) | set(remove_ids) | set(desired_ids or ())
+    is_member = Exists(Membership.objects.filter(project_id=project.pk, user_id=OuterRef('pk')))
+    condition = Q(pk__in=mentioned)
+    if desired_ids is not None:
+        condition |= Q(is_member=True)
+    users = list(
+        User.objects.annotate(is_member=is_member).filter(condition).only('id', 'username').order_by('id')
+    )
+    found = {user.pk for user in users}
+    unknown = [user_id for user_id in sorted(mentioned) if user_id not in found]
+
+    if desired_ids is not None:
+        wanted = set(desired_ids) | {project.owner_id}
+        to_add = [user for user in users if not user.is_member and user.pk in wanted]
+        to_remove = [user for user in users if user.is_member and user.pk not in wanted]
+    else:
+        add, remove = set(add_ids), set(remove_ids) - {project.owner_id}
+        to_add = [user for user in users if not user.is_member and user.pk in add and user.pk not in remove]
+        to_remove = [user for user in users if user.is_member and user.pk in remove]
+    return to_add, to_remove, unknown
+
+
+@transaction.atomic
+def apply_member_changes(actor, project, to_add, to_remove):
+    if to_add:
+        Membership.objects.bulk_create(
+            [Membership(project_id=project.pk, user_id=user.pk) for user in to_add],
+            ignore_conflicts=True,
+        )
+        access.grant(project.pk, [user.pk for user in to_add])
+        sync.record_project_access(project.pk, [user.pk for user in to_add], SyncChange.Op.UPSERT)
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                recipient_id=user.pk,
+                kind=Notification.Kind.MEMBER_ADDED,
+                actor=actor,
+                title="Bạn đã được thêm vào dự án mới",
+                message=f"Bạn vừa được {actor.username} thêm vào dự án '{project.name}'.",
+                project=project,
+            )
+            for user in to_add
+        ])
+        sync.record_user_changes(
+            SyncChange.Entity.NOTIFICATION,
+            [(notification.pk, notification.recipient_id) for notification in notifications],
+            SyncChange.Op.UPSERT,
+        )
+    if to_remove:
+        Membership.objects.filter(project_id=project.pk, user_id__in=[user.pk for user in to_remove]).delete()
+        access.revoke(project.pk, [user.pk for user in to_remove])
+        sync.record_project_access(project.pk, [user.pk for user in to_remove], SyncChange.Op.DELETE)
+
+    # Nhật ký thành viên không ảnh hưởng rollup analytics (chỉ tính sự kiện task) nên ghi thẳng hàng loạt
+    ActivityLog.objects.bulk_create([
+        ActivityLog(
+            actor=actor, verb=verb, target_type=ActivityLog.TargetType.USER,
+            target_id=user.pk, target_name=user.username, changes={}, project=project,
+        )
+        for verb, users in ((ActivityLog.Verb.MEMBER_ADDED, to_add), (ActivityLog.Verb.MEMBER_REMOVED, to_remove))
+        for user in users
+    ])
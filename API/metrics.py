@@ -0,0 +1,444 @@
+"""
+Metrics dạng text Prometheus cho endpoint /metrics.
+
+Mỗi process (worker gunicorn / uvicorn) giữ registry riêng trong bộ nhớ. Nếu cấu hình METRICS_DIR,
+registry được ghi ra file `<pid>-<thời điểm khởi động>.json` (ghi đè nguyên tử, tối đa mỗi
+METRICS_FLUSH_INTERVAL giây) và /metrics gộp mọi file trên node:
+- counter / histogram: cộng dồn mọi file (kể cả process đã chết, để tổng không bị tụt)
+- gauge (in-flight, pool...): chỉ cộng các process còn sống
+File của process đã chết được gộp dần vào một file `retired.json` lúc scrape rồi xóa, nên thư mục không
+phình ra khi worker được thay mới liên tục.
+Không cấu hình METRICS_DIR thì /metrics chỉ phản ánh process đang trả lời.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# File gộp counter / histogram của các process đã chết, và khóa (thư mục) khi đang gộp
+RETIRED_FILE = 'retired.json'
+FOLD_LOCK = 'retired.lock'
+# Khóa gộp cũ hơn số giây này (process gộp bị kill giữa chừng) thì được gỡ
+STALE_LOCK_SECONDS = 60
+
+# Gauge lấy từ DB được tính lại tối đa mỗi METRICS_DATABASE_GAUGES_TTL giây, dùng chung cho mọi worker
+DATABASE_GAUGES_KEY = 'metrics:database_gauges'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'http_requests_total': ('counter', 'Số request theo view / method / status code.'),
+    'http_request_duration_seconds': ('histogram', 'Độ trễ request theo view.'),
+    'http_requests_in_flight': ('gauge', 'Số request đang xử lý.'),
+    'db_queries_total': ('counter', 'Số query DB theo view.'),
+    'db_query_duration_seconds_total': ('counter', 'Tổng thời gian query DB theo view.'),
+    'cache_requests_total': ('counter', 'Số lần tra cache theo kết quả (hit / miss).'),
+    'cache_hit_ratio': ('gauge', 'Tỉ lệ hit của cache (tính lúc scrape).'),
+    'notification_unread_backlog': ('gauge', 'Số thông báo chưa đọc trong hệ thống.'),
+    'db_pool_size': ('gauge', 'Số kết nối đang mở trong pool.'),
+    'db_pool_available': ('gauge', 'Số kết nối rảnh trong pool.'),
+    'db_pool_max_size': ('gauge', 'Kích thước tối đa của pool.'),
+    'db_pool_waiting': ('gauge', 'Số request đang chờ lấy kết nối.'),
+    'db_pool_checkouts_total': ('counter', 'Số lần lấy kết nối từ pool.'),
+    'db_pool_queued_total': ('counter', 'Số lần phải xếp hàng chờ kết nối.'),
+    'db_pool_wait_seconds_total': ('counter', 'Tổng thời gian chờ lấy kết nối.'),
+    'db_pool_checkout_errors_total': ('counter', 'Số lần lấy kết nối thất bại (hết thời gian chờ).'),
+    'db_pool_connections_lost_total': ('counter', 'Số kết nối hỏng bị loại khi kiểm tra.'),
+    'db_route_total': ('counter', 'Số request theo nơi đọc dữ liệu (replica / primary) và lý do.'),
+    'db_replica_healthy': ('gauge', 'Replica đang trong vòng quay (1) hay bị loại (0).'),
+    'db_replica_lag_seconds': ('gauge', 'Độ trễ sao chép của replica ở lần kiểm tra gần nhất.'),
+    'password_hash_duration_seconds': ('histogram', 'Thời gian tính hash mật khẩu trong worker (hash / verify).'),
+    'password_hash_queue_wait_seconds': ('histogram', 'Thời gian chờ trong hàng đợi của pool băm mật khẩu.'),
+    'password_hash_rejected_total': ('counter', 'Số lần băm mật khẩu bị từ chối (503) theo lý do.'),
+    'password_hash_in_flight': ('gauge', 'Số việc băm mật khẩu đang chạy hoặc chờ.'),
+    'rate_limited_total': ('counter', 'Số request bị từ chối (429) theo scope giới hạn tần suất.'),
+    'load_shed_total': ('counter', 'Số request bị cắt tải (503) theo mức ưu tiên.'),
+    'load_shed_latency_ewma_seconds': ('gauge', 'Độ trễ trung bình gần đây dùng để quyết định cắt tải.'),
+    'mail_sent_total': ('counter', 'Số email đã gửi theo loại.'),
+    'mail_send_failures_total': ('counter', 'Số lần gửi email thất bại (sẽ thử lại hoặc chuyển failed) theo loại.'),
+}
+
+
+class Registry:
+    """Counter / gauge / histogram có nhãn, an toàn khi nhiều thread cùng ghi."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def add_gauge(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.gauges[key] = self.gauges.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {'buckets': list(buckets), 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'gauges': [[name, list(labels), value] for (name, labels), value in self.gauges.items()],
+                'histograms': [
+                    [name, list(labels), {**data, 'counts': list(data['counts'])}]
+                    for (name, labels), data in self.histograms.items()
+                ],
+            }
+
+
+registry = Registry()
+
+_started_at = int(time.time())
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+# Các hàm bổ sung số liệu lúc flush / scrape (vd: thống kê connection pool)
+_collectors = []
+
+
+def register_collector(func):
+    """func(registry) được gọi trước mỗi lần flush / scrape để cập nhật gauge."""
+    _collectors.append(func)
+    return func
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', '') or ''
+
+
+def _file_path(directory):
+    return os.path.join(directory, f'{os.getpid()}-{_started_at}.json')
+
+
+def _read(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path, data):
+    """Ghi đè nguyên tử: người đọc thấy file cũ hoặc file mới, không bao giờ thấy file ghi dở."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as handle:
+        json.dump(data, handle)
+    os.replace(tmp_path, path)
+
+
+def _run_collectors():
+    for collector in _collectors:
+        try:
+            collector(registry)
+        except Exception:
+            # Một nguồn số liệu lỗi không được làm hỏng cả lần scrape
+            logger.exception("Collector metrics %s lỗi", getattr(collector, '__name__', collector))
+
+
+def flush(force=False):
+    """Ghi snapshot của process ra METRICS_DIR (giới hạn tần suất, trừ khi force)."""
+    global _last_flush
+    directory = metrics_dir()
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    if not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        _last_flush = now
+        _run_collectors()
+        os.makedirs(directory, exist_ok=True)
+        _write(_file_path(directory), registry.snapshot())
+    finally:
+        _flush_lock.release()
+
+
+atexit.register(flush, force=True)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(snapshots):
+    counters, gauges, histograms = {}, {}, {}
+    for snapshot, alive in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        if alive:
+            for name, labels, value in snapshot['gauges']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                gauges[key] = gauges.get(key, 0) + value
+        for name, labels, data in snapshot['histograms']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = {**data, 'counts': list(data['counts'])}
+                continue
+            merged['counts'] = [a + b for a, b in zip(merged['counts'], data['counts'])]
+            merged['sum'] += data['sum']
+            merged['count'] += data['count']
+    return counters, gauges, histograms
+
+
+def _read_retired(directory):
+    return _read(os.path.join(directory, RETIRED_FILE)) or {'counters': [], 'gauges': [], 'histograms': [], 'folded': []}
+
+
+def collect():
+    """Gộp số liệu của mọi process trên node (hoặc chỉ process hiện tại)."""
+    directory = metrics_dir()
+    if not directory:
+        _run_collectors()
+        return _merge([(registry.snapshot(), True)])
+    flush(force=True)
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        name = os.path.basename(path)
+        if name == RETIRED_FILE:
+            continue
+        snapshot = _read(path)
+        if snapshot is not None:
+            snapshots.append((name, snapshot, _pid_alive(int(name.split('-', 1)[0]))))
+    # Đọc file gộp sau cùng và bỏ các file đã nằm trong đó -> scrape chạy song song với lần gộp không đếm hai lần
+    retired = _read_retired(directory)
+    snapshots = [(name, snapshot, alive) for name, snapshot, alive in snapshots if name not in retired['folded']]
+    _fold_dead(directory, [name for name, _snapshot, alive in snapshots if not alive])
+    return _merge([(snapshot, alive) for _name, snapshot, alive in snapshots] + [(retired, False)])
+
+
+def _fold_dead(directory, names):
+    """Cộng counter / histogram của các file process đã chết vào RETIRED_FILE rồi xóa chúng (mỗi lúc một process gộp)."""
+    if not names:
+        return
+    lock = os.path.join(directory, FOLD_LOCK)
+    try:
+        os.mkdir(lock)
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(lock) > STALE_LOCK_SECONDS:
+                os.rmdir(lock)
+        except OSError:
+            pass
+        return
+    try:
+        retired = _read_retired(directory)
+        # Tên đã gộp được giữ tới khi file thật sự bị xóa (lần gộp trước xóa lỗi thì lần này xóa lại)
+        folded = [name for name in retired['folded'] if os.path.exists(os.path.join(directory, name))]
+        pending = []
+        for name in names:
+            snapshot = None if name in folded else _read(os.path.join(directory, name))
+            if snapshot is not None:
+                pending.append((name, snapshot))
+        if pending:
+            counters, _gauges, histograms = _merge([(retired, False)] + [(snapshot, False) for _name, snapshot in pending])
+            folded += [name for name, _snapshot in pending]
+            _write(os.path.join(directory, RETIRED_FILE), {
+                'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+                'gauges': [],
+                'histograms': [[name, list(labels), data] for (name, labels), data in histograms.items()],
+                'folded': folded,
+            })
+        for name in folded:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+    finally:
+        os.rmdir(lock)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+def render():
+    """Xuất dạng text exposition format 0.0.4."""
+    counters, gauges, histograms = collect()
+
+    # Tỉ lệ hit cache được suy ra từ counter đã gộp
+    cache_totals = {}
+    for (name, labels), value in counters.items():
+        if name == 'cache_requests_total':
+            labels = dict(labels)
+            hits, total = cache_totals.get(labels['cache'], (0, 0))
+            cache_totals[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0), total + value)
+    for cache_name, (hits, total) in cache_totals.items():
+        gauges[('cache_hit_ratio', (('cache', cache_name),))] = round(hits / total, 4) if total else 0
+    for name, value in _database_gauges().items():
+        gauges[(name, ())] = value
+
+    lines = []
+    by_name = {}
+    for (name, labels), value in sorted(counters.items()) + sorted(gauges.items()):
+        by_name.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    for (name, labels), data in sorted(histograms.items(), key=lambda item: item[0]):
+        samples = by_name.setdefault(name, [])
+        cumulative = 0
+        for bound, count in zip(data['buckets'], data['counts']):
+            cumulative += count
+            samples.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+        samples.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {data["count"]}')
+        samples.append(f'{name}_sum{_format_labels(labels)} {_format_value(data["sum"])}')
+        samples.append(f'{name}_count{_format_labels(labels)} {data["count"]}')
+
+    for name in sorted(by_name):
+        kind, help_text = HELP.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(by_name[name])
+    return '\n'.join(lines) + '\n'
+
+
+def observe_cache(cache_name, hit, count=1):
+    """Ghi nhận `count` lần tra cache (dùng ở những chỗ code tự đọc cache)."""
+    if count:
+        registry.inc('cache_requests_total', count, cache=cache_name, result='hit' if hit else 'miss')
+
+
+@register_collector
+def _pool_stats(registry):
+    """Số liệu connection pool của process (psycopg-pool). Counter lấy theo delta (pop_stats)."""
+    from django.db import connections
+    for connection in connections.all():
+        if not connection.settings_dict.get('OPTIONS', {}).get('pool'):
+            continue
+        stats = connection.pool.pop_stats()
+        alias = connection.alias
+        registry.set_gauge('db_pool_size', stats.get('pool_size', 0), alias=alias)
+        registry.set_gauge('db_pool_available', stats.get('pool_available', 0), alias=alias)
+        registry.set_gauge('db_pool_max_size', stats.get('pool_max', 0), alias=alias)
+        registry.set_gauge('db_pool_waiting', stats.get('requests_waiting', 0), alias=alias)
+        registry.inc('db_pool_checkouts_total', stats.get('requests_num', 0), alias=alias)
+        registry.inc('db_pool_queued_total', stats.get('requests_queued', 0), alias=alias)
+        registry.inc('db_pool_wait_seconds_total', stats.get('requests_wait_ms', 0) / 1000, alias=alias)
+        registry.inc('db_pool_checkout_errors_total', stats.get('requests_errors', 0), alias=alias)
+        registry.inc('db_pool_connections_lost_total', stats.get('connections_lost', 0), alias=alias)
+
+
+def _database_gauges():
+    """
+    Gauge lấy từ DB: không thuộc về process nào nên không gộp. Câu COUNT quét cả bảng thông báo nên kết quả
+    được giữ trong cache METRICS_DATABASE_GAUGES_TTL giây thay vì chạy lại ở mỗi lần scrape.
+    """
+    gauges = cache.get(DATABASE_GAUGES_KEY)
+    observe_cache('metrics_database_gauges', gauges is not None)
+    if gauges is not None:
+        return gauges
+
+    from django.db.models import F
+
+    from .models import Notification
+    gauges = {
+        # Theo mốc đã đọc của từng user (bỏ qua id đọc lẻ - gần đúng, đủ cho gauge)
+        'notification_unread_backlog': Notification.objects.filter(is_read=False, pending_digest=False).exclude(
+            created_at__lte=F('recipient__notification_read_state__read_until'),
+        ).count(),
+    }
+    cache.set(DATABASE_GAUGES_KEY, gauges, timeout=settings.METRICS_DATABASE_GAUGES_TTL)
+    return gauges
+
+
+# --- MIDDLEWARE ---
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrumentation.install_db_instrumentation()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        registry.add_gauge('http_requests_in_flight', 1)
+        try:
+            with instrumentation.collecting(spans=False) as request_metrics:
+                response = self.get_response(request)
+        finally:
+            registry.add_gauge('http_requests_in_flight', -1)
+        self.record(request, response, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        registry.add_gauge('http_requests_in_flight', 1)
+        try:
+            with instrumentation.collecting(spans=False) as request_metrics:
+                response = await self.get_response(request)
+        finally:
+            registry.add_gauge('http_requests_in_flight', -1)
+        self.record(request, response, request_metrics)
+        return response
+
+    def record(self, request, response, request_metrics):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        registry.observe('http_request_duration_seconds', request_metrics.elapsed(), view=view, method=request.method)
+        registry.inc('http_requests_total', view=view, method=request.method, status=str(response.status_code))
+        registry.inc('db_queries_total', request_metrics.db_queries, view=view)
+        registry.inc('db_query_duration_seconds_total', request_metrics.db_seconds, view=view)
+        flush()
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0002_notification_passwordresettoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitylog',
+            name='changes',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Thay đổi'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='target_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='ID đối tượng'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='target_name',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Tên đối tượng'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='target_type',
+            field=models.CharField(blank=True, choices=[('project', 'Dự án'), ('task', 'Công việc'), ('user', 'Người dùng')], max_length=16, verbose_name='Loại đối tượng'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='to_status',
+            field=models.CharField(blank=True, choices=[('TODO', 'To Do'), ('INPR', 'In Progress'), ('DONE', 'Done')], max_length=4, null=True, verbose_name='Chuyển sang trạng thái'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='verb',
+            field=models.CharField(blank=True, choices=[('project.created', 'Tạo dự án'), ('project.updated', 'Cập nhật dự án'), ('project.deleted', 'Xóa dự án'), ('member.added', 'Thêm thành viên'), ('member.removed', 'Xóa thành viên'), ('task.created', 'Tạo công việc'), ('task.updated', 'Cập nhật công việc'), ('task.deleted', 'Xóa công việc'), ('comment.added', 'Thêm bình luận'), ('attachment.added', 'Tải lên tệp'), ('attachment.deleted', 'Xóa tệp đính kèm')], max_length=32, verbose_name='Hành động'),
+        ),
+        migrations.AlterField(
+            model_name='activitylog',
+            name='action_description',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Mô tả (cũ)'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['project', '-timestamp'], name='activity_project_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['task', '-timestamp'], name='activity_task_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['project', 'verb', 'timestamp'], name='activity_project_verb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(condition=models.Q(('to_status__isnull', False)), fields=['project', 'to_status', 'timestamp'], name='activity_project_status_idx'),
+        ),
+    ]
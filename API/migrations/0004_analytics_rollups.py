@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0003_activitylog_structured_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Ngày')),
+                ('created', models.IntegerField(default=0, verbose_name='Task tạo mới')),
+                ('completed', models.IntegerField(default=0, verbose_name='Task hoàn thành')),
+                ('reopened', models.IntegerField(default=0, verbose_name='Task mở lại')),
+                ('deleted', models.IntegerField(default=0, verbose_name='Task bị xóa')),
+                ('open_delta', models.IntegerField(default=0, verbose_name='Chênh lệch task chưa xong')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='API.project', verbose_name='Dự án')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'date'), name='unique_project_daily_stat')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskCycleStat',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cycle_stat', serialize=False, to='API.task', verbose_name='Công việc')),
+                ('inpr_seconds', models.BigIntegerField(default=0, verbose_name='Tổng thời gian In Progress (giây)')),
+                ('inpr_since', models.DateTimeField(blank=True, null=True, verbose_name='Đang In Progress từ')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Bắt đầu lần đầu')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Hoàn thành lúc')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cycle_stats', to='API.project', verbose_name='Dự án')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'completed_at'], name='cycle_project_completed_idx'), models.Index(condition=models.Q(('inpr_since__isnull', False)), fields=['project', 'inpr_since'], name='cycle_project_inpr_idx')],
+            },
+        ),
+    ]
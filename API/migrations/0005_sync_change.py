@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:58
+
+from django.db import migrations, models
+
+
+def backfill_sync_changes(apps, schema_editor):
+    """Tạo dòng upsert cho dữ liệu hiện có để since=0 trả về toàn bộ trạng thái."""
+    SyncChange = apps.get_model('API', 'SyncChange')
+    Task = apps.get_model('API', 'Task')
+    Comment = apps.get_model('API', 'Comment')
+    Attachment = apps.get_model('API', 'Attachment')
+    Notification = apps.get_model('API', 'Notification')
+
+    def scope(is_personal, project_id, created_by_id):
+        return (None, created_by_id) if is_personal or project_id is None else (project_id, None)
+
+    sources = (
+        ('task', Task.objects.values_list('id', 'is_personal', 'project_id', 'created_by_id')),
+        ('comment', Comment.objects.values_list('id', 'task__is_personal', 'task__project_id', 'task__created_by_id')),
+        ('attachment', Attachment.objects.values_list('id', 'task__is_personal', 'task__project_id', 'task__created_by_id')),
+    )
+    for entity, rows in sources:
+        batch = []
+        for object_id, is_personal, project_id, created_by_id in rows.order_by('id').iterator(chunk_size=2000):
+            project_id, user_id = scope(is_personal, project_id, created_by_id)
+            batch.append(SyncChange(entity=entity, object_id=object_id, op='upsert', project_id=project_id, user_id=user_id))
+            if len(batch) >= 2000:
+                SyncChange.objects.bulk_create(batch)
+                batch = []
+        SyncChange.objects.bulk_create(batch)
+
+    batch = []
+    for object_id, recipient_id in Notification.objects.values_list('id', 'recipient_id').order_by('id').iterator(chunk_size=2000):
+        batch.append(SyncChange(entity='notification', object_id=object_id, op='upsert', user_id=recipient_id))
+        if len(batch) >= 2000:
+            SyncChange.objects.bulk_create(batch)
+            batch = []
+    SyncChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0004_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('project', 'Dự án'), ('task', 'Công việc'), ('comment', 'Bình luận'), ('attachment', 'Tệp đính kèm'), ('notification', 'Thông báo')], max_length=16, verbose_name='Loại đối tượng')),
+                ('object_id', models.BigIntegerField(verbose_name='ID đối tượng')),
+                ('op', models.CharField(choices=[('upsert', 'Tạo / cập nhật'), ('delete', 'Xóa')], max_length=8, verbose_name='Thao tác')),
+                ('project_id', models.BigIntegerField(blank=True, null=True, verbose_name='Dự án')),
+                ('user_id', models.BigIntegerField(blank=True, null=True, verbose_name='Người dùng')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Thời gian')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['entity', 'object_id'], name='sync_entity_object_idx'), models.Index(condition=models.Q(('project_id__isnull', False)), fields=['project_id', 'id'], name='sync_project_seq_idx'), models.Index(condition=models.Q(('user_id__isnull', False)), fields=['user_id', 'id'], name='sync_user_seq_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_sync_changes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Index cho gợi ý user (API/search.py) - chỉ PostgreSQL: pg_trgm + index trên biểu thức.
+# Tạo CONCURRENTLY để không khóa ghi bảng user khi chạy trên dữ liệu lớn (migration không atomic).
+
+from django.db import migrations
+from django.db.models import Index, Value
+from django.db.models.functions import Concat, Lower
+
+
+def index_definitions():
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+
+    # Giữ khớp với API/search.py SEARCH_EXPRESSIONS
+    expressions = {
+        'username': Lower('username'),
+        'email': Lower('email'),
+        'full_name': Lower(Concat('first_name', Value(' '), 'last_name')),
+    }
+    indexes = []
+    for name, expression in expressions.items():
+        indexes.append(Index(OpClass(expression, name='text_pattern_ops'), name=f'user_{name}_prefix_idx'))
+        indexes.append(GinIndex(OpClass(expression, name='gin_trgm_ops'), name=f'user_{name}_trgm_idx'))
+    return indexes
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    User = apps.get_model('API', 'User')
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index in index_definitions():
+        schema_editor.add_index(User, index, concurrently=True)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    User = apps.get_model('API', 'User')
+    for index in index_definitions():
+        schema_editor.remove_index(User, index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('API', '0005_sync_change'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0006_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Xóa lúc'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Xóa lúc'),
+        ),
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Dự án'), ('task', 'Công việc')], max_length=8, verbose_name='Loại đối tượng')),
+                ('object_id', models.BigIntegerField(verbose_name='ID đối tượng')),
+                ('object_name', models.CharField(blank=True, max_length=255, verbose_name='Tên đối tượng')),
+                ('status', models.CharField(choices=[('pending', 'Đang chờ'), ('running', 'Đang xóa'), ('done', 'Hoàn tất'), ('failed', 'Lỗi')], default='pending', max_length=8, verbose_name='Trạng thái')),
+                ('phase', models.CharField(blank=True, max_length=32, verbose_name='Bước hiện tại')),
+                ('rows_deleted', models.BigIntegerField(default=0, verbose_name='Số dòng đã xóa')),
+                ('files_deleted', models.IntegerField(default=0, verbose_name='Số tệp đã xóa')),
+                ('error', models.TextField(blank=True, verbose_name='Lỗi')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Ngày tạo')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Cập nhật lúc')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Hoàn tất lúc')),
+                ('requested_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deletion_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Người yêu cầu')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='deletion_job_status_idx')],
+            },
+        ),
+    ]
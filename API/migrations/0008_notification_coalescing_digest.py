@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0007_soft_delete_deletion_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Người thực hiện'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='count',
+            field=models.PositiveIntegerField(default=1, verbose_name='Số sự kiện'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(choices=[('other', 'Khác'), ('comment', 'Bình luận mới'), ('assigned', 'Được giao việc'), ('member_added', 'Được thêm vào dự án'), ('digest', 'Tóm tắt')], default='other', max_length=16, verbose_name='Loại'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='pending_digest',
+            field=models.BooleanField(default=False, verbose_name='Chờ tóm tắt'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='digest_frequency',
+            field=models.CharField(choices=[('off', 'Nhận ngay'), ('hourly', 'Tóm tắt mỗi giờ'), ('daily', 'Tóm tắt mỗi ngày')], default='off', max_length=8, verbose_name='Tần suất tóm tắt thông báo'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_digest_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Lần tóm tắt gần nhất'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', 'task', 'kind'], name='notification_coalesce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('pending_digest', True)), fields=['recipient'], name='notification_digest_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0008_notification_coalescing_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('password_reset', 'Reset mật khẩu'), ('digest', 'Tóm tắt thông báo'), ('other', 'Khác')], default='other', max_length=16, verbose_name='Loại')),
+                ('to', models.EmailField(max_length=254, verbose_name='Người nhận')),
+                ('subject', models.CharField(max_length=255, verbose_name='Tiêu đề')),
+                ('body', models.TextField(verbose_name='Nội dung')),
+                ('status', models.CharField(choices=[('pending', 'Đang chờ'), ('sending', 'Đang gửi'), ('sent', 'Đã gửi'), ('failed', 'Lỗi')], default='pending', max_length=8, verbose_name='Trạng thái')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Số lần thử')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Thử lại lúc')),
+                ('last_error', models.TextField(blank=True, verbose_name='Lỗi gần nhất')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Ngày tạo')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Gửi lúc')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status__in', ['pending', 'sending'])), fields=['next_attempt_at'], name='outbound_email_due_idx')],
+            },
+        ),
+    ]
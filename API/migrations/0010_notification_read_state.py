@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0009_outbound_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationReadState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_read_state', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Người dùng')),
+                ('read_until', models.DateTimeField(blank=True, null=True, verbose_name='Đã đọc tới')),
+                ('read_ids', models.JSONField(blank=True, default=list, verbose_name='ID đọc lẻ sau mốc')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Cập nhật lúc')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='syncchange',
+            name='entity',
+            field=models.CharField(choices=[('project', 'Dự án'), ('task', 'Công việc'), ('comment', 'Bình luận'), ('attachment', 'Tệp đính kèm'), ('notification', 'Thông báo'), ('read_state', 'Trạng thái đã đọc')], max_length=16, verbose_name='Loại đối tượng'),
+        ),
+    ]
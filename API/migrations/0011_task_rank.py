@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:47
+
+from django.db import migrations, models
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def spread(count):
+    """Như API.ranking.spread (chép lại để migration không phụ thuộc code app)."""
+    width = 1
+    while len(DIGITS) ** width <= count:
+        width += 1
+    step = len(DIGITS) ** width // (count + 1)
+    keys = []
+    for i in range(1, count + 1):
+        value, digits = i * step, []
+        for _ in range(width):
+            value, digit = divmod(value, len(DIGITS))
+            digits.append(DIGITS[digit])
+        keys.append(''.join(reversed(digits)).rstrip('0'))
+    return keys
+
+
+def backfill_ranks(apps, schema_editor):
+    """Task hiện có được xếp trong cột theo thứ tự tạo."""
+    Task = apps.get_model('API', 'Task')
+    columns = set()
+    for project_id, is_personal, created_by_id, status in (
+        Task.objects.values_list('project_id', 'is_personal', 'created_by_id', 'status').distinct()
+    ):
+        if is_personal or project_id is None:
+            columns.add((None, created_by_id, status))
+        else:
+            columns.add((project_id, None, status))
+    for project_id, created_by_id, status in columns:
+        if project_id is None:
+            tasks = Task.objects.filter(project__isnull=True, is_personal=True, created_by_id=created_by_id, status=status)
+        else:
+            tasks = Task.objects.filter(project_id=project_id, status=status)
+        ids = list(tasks.order_by('created_at', 'id').values_list('id', flat=True))
+        Task.objects.bulk_update(
+            [Task(pk=pk, rank=rank) for pk, rank in zip(ids, spread(len(ids)))], ['rank'], batch_size=2000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0010_notification_read_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Vị trí trong cột'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'rank'], name='task_column_rank_idx'),
+        ),
+        migrations.RunPython(backfill_ranks, migrations.RunPython.noop),
+    ]
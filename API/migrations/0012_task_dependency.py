@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0011_task_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Ngày tạo')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='dependency_group',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Nhóm phụ thuộc'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='topo_order',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Thứ tự topo'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('dependency_group__isnull', False)), fields=['project', 'dependency_group'], name='task_dependency_group_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskdependency',
+            name='blocked_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependents', to='API.task', verbose_name='Bị chặn bởi'),
+        ),
+        migrations.AddField(
+            model_name='taskdependency',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Người tạo'),
+        ),
+        migrations.AddField(
+            model_name='taskdependency',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_dependencies', to='API.project', verbose_name='Dự án'),
+        ),
+        migrations.AddField(
+            model_name='taskdependency',
+            name='task',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependencies', to='API.task', verbose_name='Công việc bị chặn'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskdependency',
+            constraint=models.UniqueConstraint(fields=('task', 'blocked_by'), name='task_dependency_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskdependency',
+            constraint=models.CheckConstraint(condition=models.Q(('task', models.F('blocked_by')), _negated=True), name='task_dependency_not_self'),
+        ),
+    ]
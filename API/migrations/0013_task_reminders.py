@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0012_task_dependency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('due_soon', 'Sắp đến hạn'), ('overdue', 'Quá hạn')], max_length=8, verbose_name='Loại nhắc')),
+                ('due_date', models.DateTimeField(verbose_name='Hạn lúc nhắc')),
+                ('sent_at', models.DateTimeField(auto_now_add=True, verbose_name='Gửi lúc')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(choices=[('other', 'Khác'), ('comment', 'Bình luận mới'), ('assigned', 'Được giao việc'), ('member_added', 'Được thêm vào dự án'), ('digest', 'Tóm tắt'), ('reminder', 'Nhắc hạn')], default='other', max_length=16, verbose_name='Loại'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('due_date__isnull', False), models.Q(('status', 'DONE'), _negated=True)), fields=['due_date'], name='task_open_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskreminder',
+            name='task',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='API.task', verbose_name='Công việc'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskreminder',
+            constraint=models.UniqueConstraint(fields=('task', 'kind', 'due_date'), name='task_reminder_unique'),
+        ),
+    ]
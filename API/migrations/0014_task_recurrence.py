@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0013_task_reminders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='recurrence',
+            field=models.CharField(blank=True, choices=[('', 'Không lặp lại'), ('daily', 'Hằng ngày'), ('weekly', 'Hằng tuần'), ('monthly', 'Hằng tháng')], default='', max_length=7, verbose_name='Lặp lại'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence_anchor',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Hạn gốc của chuỗi'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence_interval',
+            field=models.PositiveSmallIntegerField(default=1, verbose_name='Khoảng lặp'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence_parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='API.task', verbose_name='Chuỗi lặp'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Lặp đến'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('recurrence', ''), _negated=True), fields=['project', 'created_by', 'due_date'], name='task_recurring_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('recurrence_parent__isnull', False)), fields=('recurrence_parent', 'due_date'), name='task_occurrence_unique'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_access(apps, schema_editor):
+    """Chủ dự án + thành viên của các dự án chưa bị xóa."""
+    Project = apps.get_model('API', 'Project')
+    ProjectAccess = apps.get_model('API', 'ProjectAccess')
+    Membership = Project.members.through
+    live = Project.objects.filter(deleted_at__isnull=True)
+    ProjectAccess.objects.bulk_create(
+        [ProjectAccess(user_id=owner_id, project_id=pk, role='owner') for pk, owner_id in live.values_list('id', 'owner_id')],
+        batch_size=2000,
+    )
+    ProjectAccess.objects.bulk_create(
+        [
+            ProjectAccess(user_id=user_id, project_id=project_id, role='member')
+            for project_id, user_id in Membership.objects.filter(project__deleted_at__isnull=True).values_list('project_id', 'user_id')
+        ],
+        batch_size=2000, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0014_task_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('owner', 'Chủ dự án'), ('member', 'Thành viên')], max_length=6, verbose_name='Vai trò')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='API.project', verbose_name='Dự án')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_access', to=settings.AUTH_USER_MODEL, verbose_name='Người dùng')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'project'), name='project_access_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_access, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('API', '0015_project_access'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'status', 'due_date'], name='task_assignee_due_idx'),
+        ),
+    ]
@@ -1,13 +1,38 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
 # MODEL USER (người dùng)
 class User(AbstractUser):
+    class DigestFrequency(models.TextChoices):
+        OFF = 'off', 'Nhận ngay'
+        HOURLY = 'hourly', 'Tóm tắt mỗi giờ'
+        DAILY = 'daily', 'Tóm tắt mỗi ngày'
+
+    # Thông báo bình luận: nhận ngay hoặc gom thành bản tóm tắt định kỳ (lệnh send_notification_digests)
+    digest_frequency = models.CharField(max_length=8, choices=DigestFrequency.choices, default=DigestFrequency.OFF, verbose_name="Tần suất tóm tắt thông báo")
+    last_digest_at = models.DateTimeField(null=True, blank=True, verbose_name="Lần tóm tắt gần nhất")
+
     def __str__(self):
         return self.username
 
+# Dự án / task đã bị xóa (deleted_at) bị ẩn khỏi mọi truy vấn qua `objects`; dữ liệu được
+# dọn dần ở nền (API/purge.py). `all_objects` thấy cả bản ghi đã xóa - chỉ dùng khi dọn dữ liệu.
+class ProjectManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class TaskManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            models.Q(project__isnull=True) | models.Q(project__deleted_at__isnull=True),
+            deleted_at__isnull=True,
+        )
+
+
 # MODEL PROJECT (dự án)
 class Project(models.Model):
     name = models.CharField(max_length=255, verbose_name="Tên dự án")
@@ -16,10 +41,34 @@ class Project(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Ngày cập nhật")
     members = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='projects', verbose_name="Thành viên dự án")
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='owned_projects', on_delete=models.CASCADE, verbose_name="Quản lý dự án")
-    
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Xóa lúc")
+
+    objects = ProjectManager()
+    all_objects = models.Manager()
+
     def __str__(self):
         return self.name
 
+# MODEL PROJECT ACCESS (ai được xem dự án nào)
+# Bản phi chuẩn hóa của owner + members (API/access.py): kiểm tra quyền xem là một lần dò index (user, project)
+# thay cho OR-join owner / members + DISTINCT. Chỉ chứa dự án chưa bị xóa.
+class ProjectAccess(models.Model):
+    class Role(models.TextChoices):
+        OWNER = 'owner', 'Chủ dự án'
+        MEMBER = 'member', 'Thành viên'
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='project_access', on_delete=models.CASCADE, verbose_name="Người dùng")
+    project = models.ForeignKey(Project, related_name='access', on_delete=models.CASCADE, verbose_name="Dự án")
+    role = models.CharField(max_length=6, choices=Role.choices, verbose_name="Vai trò")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'project'], name='project_access_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.role} of project {self.project_id}'
+
 # MODEL TASK (công việc)
 class Task(models.Model):
     class Status(models.TextChoices):
@@ -32,11 +81,19 @@ class Task(models.Model):
         MEDIUM = 'MED', 'Medium'
         HIGH = 'HIGH', 'High'
 
+    class Recurrence(models.TextChoices):
+        NONE = '', 'Không lặp lại'
+        DAILY = 'daily', 'Hằng ngày'
+        WEEKLY = 'weekly', 'Hằng tuần'
+        MONTHLY = 'monthly', 'Hằng tháng'
+
     title = models.CharField(max_length=255, verbose_name="Tiêu đề công việc")
     description = models.TextField(blank=True, null=True, verbose_name="Mô tả chi tiết")
     status = models.CharField(max_length=4, choices=Status.choices, default=Status.TODO, verbose_name="Trạng thái")
     priority = models.CharField(max_length=4, choices=Priority.choices, default=Priority.MEDIUM, verbose_name="Độ ưu tiên")
     due_date = models.DateTimeField(null=True, blank=True, verbose_name="Ngày hết hạn")
+    # Vị trí trong cột Kanban: khóa phân số so sánh theo thứ tự từ điển (API/ranking.py)
+    rank = models.CharField(max_length=255, blank=True, default='', verbose_name="Vị trí trong cột")
     
     # --- CẬP NHẬT QUAN TRỌNG ---
     # 1. project cho phép null (cho task cá nhân)
@@ -52,11 +109,101 @@ class Task(models.Model):
     assignee = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='assigned_tasks', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Người được giao")    
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Ngày cập nhật")
-    
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Xóa lúc")
+    # Đồ thị phụ thuộc (API/dependencies.py): thứ tự topo duy trì tăng dần theo cạnh, và nhóm liên thông
+    # chứa task (dùng làm khóa cache đường găng). Null khi task chưa có cạnh phụ thuộc nào.
+    topo_order = models.BigIntegerField(null=True, blank=True, verbose_name="Thứ tự topo")
+    dependency_group = models.BigIntegerField(null=True, blank=True, verbose_name="Nhóm phụ thuộc")
+    # Lặp lại (API/recurrence.py): chỉ lưu lần kế tiếp (chính task này, due_date = hạn của lần đó). Các lần sau
+    # được chiếu ảo khi đọc danh sách theo khoảng ngày; lần đã xong / đã được "chạm" tới là task riêng trỏ về chuỗi.
+    recurrence = models.CharField(max_length=7, choices=Recurrence.choices, blank=True, default=Recurrence.NONE, verbose_name="Lặp lại")
+    recurrence_interval = models.PositiveSmallIntegerField(default=1, verbose_name="Khoảng lặp")
+    recurrence_anchor = models.DateTimeField(null=True, blank=True, verbose_name="Hạn gốc của chuỗi")
+    recurrence_until = models.DateTimeField(null=True, blank=True, verbose_name="Lặp đến")
+    recurrence_parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='occurrences', verbose_name="Chuỗi lặp")
+
+    objects = TaskManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Đọc một cột Kanban theo thứ tự
+            models.Index(fields=['project', 'status', 'rank'], name='task_column_rank_idx'),
+            models.Index(
+                fields=['project', 'dependency_group'],
+                name='task_dependency_group_idx',
+                condition=models.Q(dependency_group__isnull=False),
+            ),
+            # my-work/: task giao cho một user, lọc theo trạng thái, sắp theo hạn
+            models.Index(fields=['assignee', 'status', 'due_date'], name='task_assignee_due_idx'),
+            # Bộ nhắc hạn chỉ đọc cửa sổ sắp đến hạn / vừa quá hạn của các task chưa xong
+            models.Index(
+                fields=['due_date'],
+                name='task_open_due_idx',
+                condition=models.Q(due_date__isnull=False, deleted_at__isnull=True) & ~models.Q(status='DONE'),
+            ),
+            # Chiếu các lần lặp chỉ đọc các task có quy tắc lặp
+            models.Index(
+                fields=['project', 'created_by', 'due_date'],
+                name='task_recurring_idx',
+                condition=~models.Q(recurrence=''),
+            ),
+        ]
+        constraints = [
+            # Mỗi lần lặp của một chuỗi chỉ thành task thật một lần
+            models.UniqueConstraint(
+                fields=['recurrence_parent', 'due_date'],
+                name='task_occurrence_unique',
+                condition=models.Q(recurrence_parent__isnull=False),
+            ),
+        ]
+
+    def is_deleted(self):
+        """Task hoặc dự án chứa nó đã bị xóa (dùng khi task được lấy qua quan hệ, không qua Task.objects)."""
+        return self.deleted_at is not None or (self.project_id is not None and self.project.deleted_at is not None)
+
     def __str__(self):
         type_str = "Personal" if self.is_personal else f"Project: {self.project.name}"
         return f"[{type_str}] {self.title}"
 
+# MODEL TASK DEPENDENCY (task bị chặn bởi task khác)
+# Cạnh blocked_by -> task: blocked_by phải xong trước. Hai task cùng một dự án; đồ thị luôn không có chu trình.
+class TaskDependency(models.Model):
+    task = models.ForeignKey(Task, related_name='dependencies', on_delete=models.CASCADE, verbose_name="Công việc bị chặn")
+    blocked_by = models.ForeignKey(Task, related_name='dependents', on_delete=models.CASCADE, verbose_name="Bị chặn bởi")
+    project = models.ForeignKey(Project, related_name='task_dependencies', on_delete=models.CASCADE, verbose_name="Dự án")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+', verbose_name="Người tạo")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'blocked_by'], name='task_dependency_unique'),
+            models.CheckConstraint(condition=~models.Q(task=models.F('blocked_by')), name='task_dependency_not_self'),
+        ]
+
+    def __str__(self):
+        return f'{self.blocked_by_id} -> {self.task_id}'
+
+# MODEL TASK REMINDER (nhắc hạn đã gửi)
+# Mỗi (task, loại, hạn) chỉ nhắc một lần; đổi hạn -> hạn mới được nhắc lại (API/reminders.py)
+class TaskReminder(models.Model):
+    class Kind(models.TextChoices):
+        DUE_SOON = 'due_soon', 'Sắp đến hạn'
+        OVERDUE = 'overdue', 'Quá hạn'
+
+    task = models.ForeignKey(Task, related_name='reminders', on_delete=models.CASCADE, verbose_name="Công việc")
+    kind = models.CharField(max_length=8, choices=Kind.choices, verbose_name="Loại nhắc")
+    due_date = models.DateTimeField(verbose_name="Hạn lúc nhắc")
+    sent_at = models.DateTimeField(auto_now_add=True, verbose_name="Gửi lúc")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'kind', 'due_date'], name='task_reminder_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} reminder for task {self.task_id}'
+
 # MODEL COMMENT (các bình luận)
 class Comment(models.Model):
     task = models.ForeignKey(Task, related_name='comments', on_delete=models.CASCADE, verbose_name="Công việc")
@@ -80,15 +227,108 @@ class Attachment(models.Model):
         return f'Attachment for {self.task.title}'
 
 # MODEL ACTIVITYLOG (nhật ký hoạt động)
+# Mỗi bản ghi là một sự kiện có cấu trúc: động từ (verb) + đối tượng (target) + diff các trường.
+# Câu mô tả tiếng Việt được dựng lúc đọc (render_description), không lưu sẵn.
 class ActivityLog(models.Model):
-    action_description = models.CharField(max_length=255, verbose_name="Hành động")   
+    class Verb(models.TextChoices):
+        PROJECT_CREATED = 'project.created', 'Tạo dự án'
+        PROJECT_UPDATED = 'project.updated', 'Cập nhật dự án'
+        PROJECT_DELETED = 'project.deleted', 'Xóa dự án'
+        MEMBER_ADDED = 'member.added', 'Thêm thành viên'
+        MEMBER_REMOVED = 'member.removed', 'Xóa thành viên'
+        TASK_CREATED = 'task.created', 'Tạo công việc'
+        TASK_UPDATED = 'task.updated', 'Cập nhật công việc'
+        TASK_DELETED = 'task.deleted', 'Xóa công việc'
+        COMMENT_ADDED = 'comment.added', 'Thêm bình luận'
+        ATTACHMENT_ADDED = 'attachment.added', 'Tải lên tệp'
+        ATTACHMENT_DELETED = 'attachment.deleted', 'Xóa tệp đính kèm'
+
+    class TargetType(models.TextChoices):
+        PROJECT = 'project', 'Dự án'
+        TASK = 'task', 'Công việc'
+        USER = 'user', 'Người dùng'
+
+    # Mẫu câu hiển thị theo verb: {name} = tên đối tượng, {project} = tên dự án
+    DESCRIPTION_TEMPLATES = {
+        Verb.PROJECT_CREATED: "Tạo dự án mới: {name}",
+        Verb.PROJECT_UPDATED: "đã cập nhật thông tin dự án '{name}'",
+        Verb.PROJECT_DELETED: "đã xóa dự án '{name}'",
+        Verb.MEMBER_ADDED: "Thêm thành viên '{name}' vào dự án '{project}'",
+        Verb.MEMBER_REMOVED: "Xóa thành viên '{name}' khỏi dự án '{project}'",
+        Verb.TASK_CREATED: "Tạo công việc '{name}'",
+        Verb.TASK_UPDATED: "đã cập nhật công việc '{name}'",
+        Verb.TASK_DELETED: "đã xóa công việc '{name}'",
+        Verb.COMMENT_ADDED: "Thêm bình luận vào '{name}'",
+        Verb.ATTACHMENT_ADDED: "Tải lên tệp cho '{name}'",
+        Verb.ATTACHMENT_DELETED: "đã xóa một tệp đính kèm khỏi công việc '{name}'",
+    }
+
+    # Nhãn các trường được ghi diff (changes = {field: [cũ, mới]})
+    CHANGE_LABELS = {
+        'status': 'trạng thái',
+        'priority': 'độ ưu tiên',
+        'assignee': 'người được giao',
+        'due_date': 'hạn',
+        'title': 'tiêu đề',
+    }
+
+    verb = models.CharField(max_length=32, choices=Verb.choices, blank=True, verbose_name="Hành động")
+    target_type = models.CharField(max_length=16, choices=TargetType.choices, blank=True, verbose_name="Loại đối tượng")
+    target_id = models.BigIntegerField(null=True, blank=True, verbose_name="ID đối tượng")
+    target_name = models.CharField(max_length=255, blank=True, verbose_name="Tên đối tượng")
+    changes = models.JSONField(default=dict, blank=True, verbose_name="Thay đổi")
+    # Trạng thái mới của task (nếu sự kiện làm đổi trạng thái) - tách cột riêng để đếm bằng index
+    to_status = models.CharField(max_length=4, choices=Task.Status.choices, null=True, blank=True, verbose_name="Chuyển sang trạng thái")
+    # Câu mô tả dạng text của các bản ghi cũ (trước khi có verb)
+    action_description = models.CharField(max_length=255, blank=True, verbose_name="Mô tả (cũ)")
     actor = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='activity_logs', on_delete=models.SET_NULL, null=True, verbose_name="Người thực hiện")
     project = models.ForeignKey(Project, related_name='activity_logs', on_delete=models.SET_NULL, null=True, verbose_name="Dự án")
     task = models.ForeignKey(Task, related_name='activity_logs', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Công việc")
     timestamp = models.DateTimeField(auto_now_add=True, verbose_name="Thời gian")
-   
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', '-timestamp'], name='activity_project_time_idx'),
+            models.Index(fields=['task', '-timestamp'], name='activity_task_time_idx'),
+            models.Index(fields=['project', 'verb', 'timestamp'], name='activity_project_verb_idx'),
+            models.Index(
+                fields=['project', 'to_status', 'timestamp'],
+                name='activity_project_status_idx',
+                condition=models.Q(to_status__isnull=False),
+            ),
+        ]
+
+    def render_description(self):
+        template = self.DESCRIPTION_TEMPLATES.get(self.verb)
+        if template is None:
+            return self.action_description
+        text = template.format(
+            name=self.target_name,
+            project=self.project.name if self.project_id else '',
+        )
+        if self.changes:
+            parts = [
+                f"{self.CHANGE_LABELS.get(field, field)}: {self._display_value(field, old)} → {self._display_value(field, new)}"
+                for field, (old, new) in self.changes.items()
+            ]
+            text = f"{text} ({', '.join(parts)})"
+        return text
+
+    @staticmethod
+    def _display_value(field, value):
+        if value is None:
+            return '—'
+        if field == 'status':
+            return Task.Status(value).label
+        if field == 'priority':
+            return Task.Priority(value).label
+        if field == 'assignee':
+            return f'#{value}'
+        return value
+
     def __str__(self):
-        return f'{self.actor.username} {self.action_description} at {self.timestamp.strftime("%Y-%m-%d %H:%M")}'
+        actor = self.actor.username if self.actor else ''
+        return f'{actor} {self.render_description()} at {self.timestamp.strftime("%Y-%m-%d %H:%M")}'
 
 # MODEL PASSWORD RESET TOKEN (Reset mật khẩu)
 class PasswordResetToken(models.Model):
@@ -102,21 +342,212 @@ class PasswordResetToken(models.Model):
         return f'Reset token for {self.user.username}'
 
 # MODEL NOTIFICATION (Thông báo)
+# Thông báo cùng loại về cùng một task, chưa đọc, trong cửa sổ NOTIFICATION_COALESCE_WINDOW được gộp
+# vào một dòng (count + người thực hiện gần nhất), xem API/notifications.py. created_at là thời điểm
+# của sự kiện mới nhất trong dòng.
 class Notification(models.Model):
+    class Kind(models.TextChoices):
+        OTHER = 'other', 'Khác'
+        COMMENT = 'comment', 'Bình luận mới'
+        ASSIGNED = 'assigned', 'Được giao việc'
+        MEMBER_ADDED = 'member_added', 'Được thêm vào dự án'
+        DIGEST = 'digest', 'Tóm tắt'
+        REMINDER = 'reminder', 'Nhắc hạn'
+
     recipient = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='notifications', on_delete=models.CASCADE, verbose_name="Người nhận")
     title = models.CharField(max_length=255, verbose_name="Tiêu đề")
     message = models.TextField(verbose_name="Nội dung")
+    kind = models.CharField(max_length=16, choices=Kind.choices, default=Kind.OTHER, verbose_name="Loại")
+    # Số sự kiện đã gộp vào dòng này và người thực hiện sự kiện gần nhất
+    count = models.PositiveIntegerField(default=1, verbose_name="Số sự kiện")
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+', verbose_name="Người thực hiện")
     
     # Context (Optional)
     project = models.ForeignKey(Project, null=True, blank=True, on_delete=models.CASCADE, related_name='notifications', verbose_name="Dự án")
     task = models.ForeignKey(Task, null=True, blank=True, on_delete=models.CASCADE, related_name='notifications', verbose_name="Công việc")
     
-    # Status
+    # Status - đã đọc còn được tính từ NotificationReadState (mốc đọc + id đọc lẻ), không cập nhật cột này nữa;
+    # giữ cho dữ liệu cũ đã đánh dấu đọc từng dòng
     is_read = models.BooleanField(default=False, verbose_name="Đã đọc")
+    # Người nhận chọn tóm tắt định kỳ: dòng bị ẩn cho tới khi được gom vào bản tóm tắt (rồi bị xóa)
+    pending_digest = models.BooleanField(default=False, verbose_name="Chờ tóm tắt")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['recipient', 'task', 'kind'],
+                name='notification_coalesce_idx',
+                condition=models.Q(is_read=False),
+            ),
+            models.Index(fields=['recipient'], name='notification_digest_idx', condition=models.Q(pending_digest=True)),
+        ]
     
     def __str__(self):
-        return f'Notification for {self.recipient.username}: {self.title}'
\ No newline at end of file
+        return f'Notification for {self.recipient.username}: {self.title}'
+
+# MODEL NOTIFICATION READ STATE (trạng thái đã đọc theo user)
+# Thông báo được coi là đã đọc nếu created_at <= read_until (đánh dấu tất cả) hoặc id nằm trong read_ids
+# (đọc lẻ sau mốc). Đánh dấu tất cả chỉ ghi một dòng ở đây, không cập nhật từng thông báo.
+class NotificationReadState(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, related_name='notification_read_state', on_delete=models.CASCADE, primary_key=True, verbose_name="Người dùng")
+    read_until = models.DateTimeField(null=True, blank=True, verbose_name="Đã đọc tới")
+    read_ids = models.JSONField(default=list, blank=True, verbose_name="ID đọc lẻ sau mốc")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Cập nhật lúc")
+
+    def __str__(self):
+        return f'Read state of {self.user_id}'
+
+# MODEL PROJECT DAILY STAT (rollup theo ngày cho burndown / throughput)
+# Được cộng dồn mỗi khi có sự kiện task (xem API/analytics.py), không quét lại lịch sử.
+class ProjectDailyStat(models.Model):
+    project = models.ForeignKey(Project, related_name='daily_stats', on_delete=models.CASCADE, verbose_name="Dự án")
+    date = models.DateField(verbose_name="Ngày")
+    created = models.IntegerField(default=0, verbose_name="Task tạo mới")
+    completed = models.IntegerField(default=0, verbose_name="Task hoàn thành")
+    reopened = models.IntegerField(default=0, verbose_name="Task mở lại")
+    deleted = models.IntegerField(default=0, verbose_name="Task bị xóa")
+    # Thay đổi ròng số task chưa xong trong ngày (burndown = cộng dồn cột này)
+    open_delta = models.IntegerField(default=0, verbose_name="Chênh lệch task chưa xong")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'date'], name='unique_project_daily_stat'),
+        ]
+
+    def __str__(self):
+        return f'{self.project_id} @ {self.date}'
+
+
+# MODEL TASK CYCLE STAT (thời gian task nằm ở trạng thái In Progress)
+class TaskCycleStat(models.Model):
+    task = models.OneToOneField(Task, related_name='cycle_stat', on_delete=models.CASCADE, primary_key=True, verbose_name="Công việc")
+    project = models.ForeignKey(Project, related_name='cycle_stats', on_delete=models.CASCADE, verbose_name="Dự án")
+    inpr_seconds = models.BigIntegerField(default=0, verbose_name="Tổng thời gian In Progress (giây)")
+    inpr_since = models.DateTimeField(null=True, blank=True, verbose_name="Đang In Progress từ")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Bắt đầu lần đầu")
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Hoàn thành lúc")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'completed_at'], name='cycle_project_completed_idx'),
+            models.Index(fields=['project', 'inpr_since'], name='cycle_project_inpr_idx', condition=models.Q(inpr_since__isnull=False)),
+        ]
+
+    def __str__(self):
+        return f'Cycle stat for task {self.task_id}'
+
+
+# MODEL SYNC CHANGE (chuỗi thay đổi cho đồng bộ delta - mobile/offline)
+# Mỗi đối tượng chỉ giữ 1 dòng: mỗi lần thay đổi thì xóa dòng cũ và chèn dòng mới với id lớn hơn.
+# id (tự tăng) chính là change token; xóa đối tượng -> dòng tombstone (op = delete).
+class SyncChange(models.Model):
+    class Entity(models.TextChoices):
+        PROJECT = 'project', 'Dự án'
+        TASK = 'task', 'Công việc'
+        COMMENT = 'comment', 'Bình luận'
+        ATTACHMENT = 'attachment', 'Tệp đính kèm'
+        NOTIFICATION = 'notification', 'Thông báo'
+        # object_id = user id: trạng thái đã đọc thông báo của user thay đổi
+        READ_STATE = 'read_state', 'Trạng thái đã đọc'
+
+    class Op(models.TextChoices):
+        UPSERT = 'upsert', 'Tạo / cập nhật'
+        DELETE = 'delete', 'Xóa'
+
+    entity = models.CharField(max_length=16, choices=Entity.choices, verbose_name="Loại đối tượng")
+    object_id = models.BigIntegerField(verbose_name="ID đối tượng")
+    op = models.CharField(max_length=8, choices=Op.choices, verbose_name="Thao tác")
+    # Phạm vi nhìn thấy: theo dự án (task dự án và con của nó) hoặc theo user (task cá nhân, thông báo).
+    # Không dùng FK để tombstone không bị xóa dây chuyền cùng dự án / user.
+    project_id = models.BigIntegerField(null=True, blank=True, verbose_name="Dự án")
+    user_id = models.BigIntegerField(null=True, blank=True, verbose_name="Người dùng")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Thời gian")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['entity', 'object_id'], name='sync_entity_object_idx'),
+            models.Index(fields=['project_id', 'id'], name='sync_project_seq_idx', condition=models.Q(project_id__isnull=False)),
+            models.Index(fields=['user_id', 'id'], name='sync_user_seq_idx', condition=models.Q(user_id__isnull=False)),
+        ]
+
+    def __str__(self):
+        return f'#{self.pk} {self.op} {self.entity}:{self.object_id}'
+
+
+# MODEL DELETION JOB (xóa dự án / task lớn ở nền)
+# Request xóa chỉ đánh dấu deleted_at và tạo job; lệnh `purge_deleted` xóa dữ liệu con theo lô
+# và cập nhật tiến độ ở đây. Không dùng FK tới đối tượng bị xóa để job còn lại sau khi dọn xong.
+class DeletionJob(models.Model):
+    class Kind(models.TextChoices):
+        PROJECT = 'project', 'Dự án'
+        TASK = 'task', 'Công việc'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Đang chờ'
+        RUNNING = 'running', 'Đang xóa'
+        DONE = 'done', 'Hoàn tất'
+        FAILED = 'failed', 'Lỗi'
+
+    kind = models.CharField(max_length=8, choices=Kind.choices, verbose_name="Loại đối tượng")
+    object_id = models.BigIntegerField(verbose_name="ID đối tượng")
+    object_name = models.CharField(max_length=255, blank=True, verbose_name="Tên đối tượng")
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='deletion_jobs', on_delete=models.SET_NULL, null=True, verbose_name="Người yêu cầu")
+    status = models.CharField(max_length=8, choices=Status.choices, default=Status.PENDING, verbose_name="Trạng thái")
+    # Bước đang chạy (tên bảng đang được dọn) và số dòng / tệp đã xóa
+    phase = models.CharField(max_length=32, blank=True, verbose_name="Bước hiện tại")
+    rows_deleted = models.BigIntegerField(default=0, verbose_name="Số dòng đã xóa")
+    files_deleted = models.IntegerField(default=0, verbose_name="Số tệp đã xóa")
+    error = models.TextField(blank=True, verbose_name="Lỗi")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Cập nhật lúc")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Hoàn tất lúc")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='deletion_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'Delete {self.kind}:{self.object_id} ({self.status})'
+
+
+# MODEL OUTBOUND EMAIL (hàng đợi email gửi đi)
+# Request chỉ ghi một dòng; lệnh send_queued_mail gửi theo lô trên một kết nối SMTP, lỗi thì thử lại
+# với backoff tăng dần (next_attempt_at). Dòng đang gửi cũng giữ next_attempt_at = hạn "thuê" để
+# worker chết giữa chừng thì lô đó được gửi lại.
+class OutboundEmail(models.Model):
+    class Kind(models.TextChoices):
+        PASSWORD_RESET = 'password_reset', 'Reset mật khẩu'
+        DIGEST = 'digest', 'Tóm tắt thông báo'
+        OTHER = 'other', 'Khác'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Đang chờ'
+        SENDING = 'sending', 'Đang gửi'
+        SENT = 'sent', 'Đã gửi'
+        FAILED = 'failed', 'Lỗi'
+
+    kind = models.CharField(max_length=16, choices=Kind.choices, default=Kind.OTHER, verbose_name="Loại")
+    to = models.EmailField(verbose_name="Người nhận")
+    subject = models.CharField(max_length=255, verbose_name="Tiêu đề")
+    body = models.TextField(verbose_name="Nội dung")
+    status = models.CharField(max_length=8, choices=Status.choices, default=Status.PENDING, verbose_name="Trạng thái")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Số lần thử")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Thử lại lúc")
+    last_error = models.TextField(blank=True, verbose_name="Lỗi gần nhất")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Ngày tạo")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Gửi lúc")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                name='outbound_email_due_idx',
+                condition=models.Q(status__in=['pending', 'sending']),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} -> {self.to} ({self.status})'
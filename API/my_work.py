@@ -0,0 +1,100 @@
+"""
+"Việc của tôi" (GET my-work/): task được giao cho user trên mọi dự án user còn quyền xem + task cá nhân.
+
+Một query cho mỗi trang dù user thuộc bao nhiêu dự án: lọc assignee = user (index task_assignee_due_idx:
+assignee, status, due_date), quyền xem dự án là EXISTS trên bảng ProjectAccess, không join / DISTINCT.
+
+Sắp xếp (?ordering=):
+- due_date (mặc định): hạn gần nhất trước, task không có hạn ở cuối, rồi id
+- priority: ưu tiên cao trước, cùng ưu tiên thì như due_date
+Phân trang keyset: next_cursor mã hóa khóa sắp xếp của task cuối trang, trang sau đọc tiếp từ đó nên không
+lệch khi task được thêm / sửa giữa hai lần tải và không phải đếm / OFFSET.
+"""
+import base64
+import json
+
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Q, Value, When
+from django.utils.dateparse import parse_datetime
+
+from .models import ProjectAccess, Task
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Khóa sắp xếp: (tên trường / annotation, có thể null). Null đứng cuối.
+ORDERINGS = {
+    'due_date': [('due_date', True), ('id', False)],
+    'priority': [('priority_rank', False), ('due_date', True), ('id', False)],
+}
+PRIORITY_RANK = Case(
+    When(priority=Task.Priority.HIGH, then=Value(0)),
+    When(priority=Task.Priority.MEDIUM, then=Value(1)),
+    default=Value(2),
+    output_field=IntegerField(),
+)
+
+
+def assigned_tasks(user):
+    """Task giao cho user: task dự án user còn quyền xem + task cá nhân của user."""
+    visible = Exists(ProjectAccess.objects.filter(user=user, project=OuterRef('project_id')))
+    return Task.objects.filter(assignee=user).filter(Q(is_personal=True, created_by=user) | Q(visible, is_personal=False))
+
+
+def encode_cursor(task, ordering):
+    values = [getattr(task, name) for name, _nullable in ORDERINGS[ordering]]
+    values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(value, ordering):
+    """-> danh sách giá trị khóa; ValueError nếu cursor hỏng / không khớp cách sắp xếp."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(value) from e
+    keys = ORDERINGS[ordering]
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError(value)
+    decoded = []
+    for (name, nullable), item in zip(keys, values):
+        if item is None and nullable:
+            decoded.append(None)
+        elif name == 'due_date' and isinstance(item, str) and parse_datetime(item):
+            decoded.append(parse_datetime(item))
+        elif name != 'due_date' and isinstance(item, int):
+            decoded.append(item)
+        else:
+            raise ValueError(value)
+    return decoded
+
+
+def after(ordering, values):
+    """Điều kiện "đứng sau cursor" theo thứ tự từ điển của các khóa (null lớn nhất)."""
+    condition, equal = Q(pk__in=[]), Q()
+    for (name, nullable), value in zip(ORDERINGS[ordering], values):
+        if value is not None:
+            greater = Q(**{f'{name}__gt': value})
+            if nullable:
+                greater |= Q(**{f'{name}__isnull': True})
+            condition |= equal & greater
+        equal &= Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+    return condition
+
+
+def page(queryset, ordering='due_date', limit=DEFAULT_LIMIT, cursor=None):
+    """-> (danh sách task, next_cursor). queryset: assigned_tasks(...) đã qua TaskFilter."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    if ordering == 'priority':
+        queryset = queryset.annotate(priority_rank=PRIORITY_RANK)
+    if cursor is not None:
+        queryset = queryset.filter(after(ordering, cursor))
+    order = [
+        F(name).asc(nulls_last=True) if nullable else F(name).asc()
+        for name, nullable in ORDERINGS[ordering]
+    ]
+    tasks = list(queryset.order_by(*order)[:limit + 1])
+    if len(tasks) <= limit:
+        return tasks, None
+    tasks = tasks[:limit]
+    return tasks, encode_cursor(tasks[-1], ordering)
@@ -0,0 +1,235 @@
+"""
+Tạo thông báo có gộp (coalescing) và bản tóm tắt định kỳ (digest).
+
+notify(): thông báo loại COALESCED_KINDS (vd: bình luận) về cùng một task, người nhận chưa đọc và sự kiện
+gần nhất còn trong NOTIFICATION_COALESCE_WINDOW giây -> cập nhật dòng cũ (count + 1, người thực hiện
+và nội dung mới nhất, created_at = bây giờ) thay vì chèn dòng mới. Số query không phụ thuộc số người nhận:
+1 SELECT dòng có thể gộp + 1 UPDATE + 1 bulk INSERT + ghi /sync/ theo lô.
+
+Người nhận chọn tóm tắt (User.digest_frequency) với loại DIGEST_KINDS: dòng được đánh dấu pending_digest
+(ẩn khỏi danh sách, không đồng bộ). Lệnh send_notification_digests gom các dòng chờ của những user đến hạn
+thành một thông báo DIGEST mỗi người (kèm email qua API/outbox.py) rồi xóa chúng.
+
+Trạng thái đã đọc (NotificationReadState): mốc read_until + danh sách id đọc lẻ sau mốc, được tính ngay trong
+query danh sách (annotate `read`). Đánh dấu tất cả chỉ ghi một dòng, không phụ thuộc số thông báo; dòng đã
+đọc (theo mốc hoặc id) không bao giờ được gộp thêm sự kiện.
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import BooleanField, Exists, ExpressionWrapper, F, Max, OuterRef, Q, Sum
+from django.utils import timezone
+
+from . import outbox, sync
+from .models import Notification, NotificationReadState, OutboundEmail, SyncChange, User
+
+Kind = Notification.Kind
+
+# Loại được gộp theo (người nhận, task) và loại đi vào bản tóm tắt nếu người nhận chọn
+COALESCED_KINDS = {Kind.COMMENT}
+DIGEST_KINDS = {Kind.COMMENT}
+
+DIGEST_PERIODS = {
+    User.DigestFrequency.HOURLY: timedelta(hours=1),
+    User.DigestFrequency.DAILY: timedelta(days=1),
+}
+# Số task tối đa liệt kê trong một bản tóm tắt
+DIGEST_MAX_LINES = 10
+
+
+def wants_digest(user, kind):
+    return kind in DIGEST_KINDS and user.digest_frequency != User.DigestFrequency.OFF
+
+
+# SECTION: Tạo thông báo
+def notify(recipients, kind, title, message, actor=None, project=None, task=None):
+    """Gửi một sự kiện tới nhiều người nhận (User), gộp vào dòng chưa đọc gần đây nếu được."""
+    recipients = {user.pk: user for user in recipients}
+    if not recipients:
+        return
+    now = timezone.now()
+    merged = {}
+    if kind in COALESCED_KINDS and task is not None:
+        cutoff = now - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW)
+        # Dòng mới nhất mỗi người nhận (sắp tăng dần theo thời gian -> dòng sau ghi đè dòng trước trong dict);
+        # trạng thái đã đọc lấy cùng query qua LEFT JOIN
+        state = 'recipient__notification_read_state__'
+        for recipient_id, pk, pending, created_at, read_until, read_ids in (
+            Notification.objects.filter(
+                recipient_id__in=recipients, kind=kind, task=task, is_read=False, created_at__gte=cutoff,
+            ).order_by('recipient_id', 'created_at')
+            .values_list('recipient_id', 'pk', 'pending_digest', 'created_at', f'{state}read_until', f'{state}read_ids')
+        ):
+            if (read_until and created_at <= read_until) or pk in (read_ids or ()):
+                continue
+            # Không gộp vào dòng chờ tóm tắt nếu người nhận đã tắt tóm tắt (và ngược lại)
+            if pending == wants_digest(recipients[recipient_id], kind):
+                merged[recipient_id] = pk
+    if merged:
+        Notification.objects.filter(pk__in=merged.values()).update(
+            count=F('count') + 1, actor=actor, title=title, message=message, created_at=now,
+        )
+    created = Notification.objects.bulk_create([
+        Notification(
+            recipient=user, kind=kind, title=title, message=message, actor=actor,
+            project=project, task=task, pending_digest=wants_digest(user, kind),
+        )
+        for user_id, user in recipients.items()
+        if user_id not in merged
+    ])
+    visible = [(pk, user_id) for user_id, pk in merged.items() if not wants_digest(recipients[user_id], kind)]
+    visible += [(notification.pk, notification.recipient_id) for notification in created if not notification.pending_digest]
+    sync.record_user_changes(SyncChange.Entity.NOTIFICATION, visible, SyncChange.Op.UPSERT)
+
+
+def release_pending(user):
+    """User tắt tóm tắt: các dòng đang chờ hiện ra ngay như thông báo thường (chưa đọc, kể cả khi cũ hơn mốc đã đọc)."""
+    # Một câu UPDATE ... RETURNING (PostgreSQL, SQLite >= 3.35): không SELECT id trước rồi mới cập nhật
+    connection = connections[router.db_for_write(Notification)]
+    meta, quote = Notification._meta, connection.ops.quote_name
+    created_at = meta.get_field('created_at').get_db_prep_save(timezone.now(), connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote(meta.db_table)} SET {quote('pending_digest')} = %s, {quote('created_at')} = %s "
+            f"WHERE {quote('recipient_id')} = %s AND {quote('pending_digest')} = %s RETURNING {quote('id')}",
+            [False, created_at, user.pk, True],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    sync.record_changes(SyncChange.Entity.NOTIFICATION, ids, SyncChange.Op.UPSERT, user_id=user.pk)
+    return len(ids)
+
+
+# SECTION: Trạng thái đã đọc
+def read_state(user):
+    return NotificationReadState.objects.filter(user=user).first()
+
+
+async def aread_state(user):
+    return await NotificationReadState.objects.filter(user=user).afirst()
+
+
+def read_condition(state):
+    """Điều kiện 'đã đọc': cột is_read cũ, trước mốc read_until hoặc nằm trong read_ids."""
+    condition = Q(is_read=True)
+    if state is not None:
+        if state.read_until is not None:
+            condition |= Q(created_at__lte=state.read_until)
+        if state.read_ids:
+            condition |= Q(pk__in=state.read_ids)
+    return condition
+
+
+def with_read_state(queryset, state):
+    """Thêm cột `read` (tính trong SQL) cho NotificationSerializer."""
+    return queryset.annotate(read=ExpressionWrapper(read_condition(state), output_field=BooleanField()))
+
+
+def record_read_state(user):
+    # object_id = user id, client nhận trạng thái mới qua /sync/ (read_state)
+    sync.record_user_changes(SyncChange.Entity.READ_STATE, [(user.pk, user.pk)], SyncChange.Op.UPSERT)
+
+
+def mark_all_read(user, now=None):
+    """Dời mốc đã đọc tới hiện tại và bỏ danh sách id lẻ: một dòng, bất kể user có bao nhiêu thông báo."""
+    now = now or timezone.now()
+    # Một câu INSERT ... ON CONFLICT DO UPDATE
+    NotificationReadState.objects.bulk_create(
+        [NotificationReadState(user=user, read_until=now, read_ids=[])],
+        update_conflicts=True, unique_fields=['user'], update_fields=['read_until', 'read_ids', 'updated_at'],
+    )
+    record_read_state(user)
+
+
+def mark_read(user, notification):
+    """Thêm id vào danh sách đọc lẻ (nếu chưa được tính là đã đọc). Trả về False nếu không có gì thay đổi."""
+    with transaction.atomic():
+        state, _ = NotificationReadState.objects.select_for_update().get_or_create(user=user)
+        if (
+            notification.is_read
+            or (state.read_until is not None and notification.created_at <= state.read_until)
+            or notification.pk in state.read_ids
+        ):
+            return False
+        state.read_ids.append(notification.pk)
+        state.save(update_fields=['read_ids', 'updated_at'])
+        record_read_state(user)
+    return True
+
+
+# SECTION: Bản tóm tắt (lệnh send_notification_digests)
+def due_users(now):
+    """User đến hạn tóm tắt và đang có thông báo chờ."""
+    due = Q()
+    for frequency, period in DIGEST_PERIODS.items():
+        due |= Q(digest_frequency=frequency) & (Q(last_digest_at__isnull=True) | Q(last_digest_at__lte=now - period))
+    pending = Notification.objects.filter(recipient=OuterRef('pk'), pending_digest=True)
+    return User.objects.filter(due).filter(Exists(pending)).order_by('pk')
+
+
+def digest_message(groups):
+    lines = [
+        f"- '{group['task__title'] or 'Công việc đã xóa'}': {group['total']} {Kind(group['kind']).label.lower()}"
+        for group in groups[:DIGEST_MAX_LINES]
+    ]
+    if len(groups) > DIGEST_MAX_LINES:
+        lines.append(f"... và {len(groups) - DIGEST_MAX_LINES} công việc khác")
+    return "\n".join(lines)
+
+
+def digest_email_body(digest):
+    frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+    return f"{digest.message}\n\nXem chi tiết: {frontend_url}/notifications\n\nTask Management System"
+
+
+def send_digests(now=None, batch_size=None):
+    """Gom thông báo chờ của các user đến hạn, theo lô user (số query mỗi lô cố định). Trả về số bản tóm tắt."""
+    now = now or timezone.now()
+    batch_size = batch_size or settings.NOTIFICATION_DIGEST_BATCH
+    sent = 0
+    last_pk = 0
+    while True:
+        user_ids = list(due_users(now).filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+        if not user_ids:
+            return sent
+        last_pk = user_ids[-1]
+        with transaction.atomic():
+            # Chốt id lớn nhất: dòng đến sau lúc đọc sẽ vào bản tóm tắt lần sau, không bị xóa oan
+            max_id = Notification.objects.filter(recipient_id__in=user_ids, pending_digest=True).aggregate(max_id=Max('id'))['max_id']
+            pending = Notification.objects.filter(recipient_id__in=user_ids, pending_digest=True, id__lte=max_id or 0)
+            groups = {}
+            for group in (
+                pending
+                .values('recipient_id', 'task_id', 'task__title', 'kind')
+                .annotate(total=Sum('count'), latest=Max('created_at'))
+                .order_by('recipient_id', '-latest')
+            ):
+                groups.setdefault(group['recipient_id'], []).append(group)
+            digests = Notification.objects.bulk_create([
+                Notification(
+                    recipient_id=recipient_id,
+                    kind=Kind.DIGEST,
+                    title=f"Tóm tắt: {sum(group['total'] for group in items)} hoạt động mới",
+                    message=digest_message(items),
+                    count=sum(group['total'] for group in items),
+                )
+                for recipient_id, items in groups.items()
+            ])
+            # Dòng chờ chưa từng được đồng bộ -> không cần tombstone
+            with sync.suppressed():
+                pending.delete()
+            User.objects.filter(pk__in=user_ids).update(last_digest_at=now)
+            # Bản tóm tắt cũng được gửi qua email (hàng đợi, lệnh send_queued_mail)
+            emails = dict(User.objects.filter(pk__in=groups).exclude(email='').values_list('pk', 'email'))
+            outbox.enqueue_many([
+                (emails[digest.recipient_id], digest.title, digest_email_body(digest))
+                for digest in digests
+                if digest.recipient_id in emails
+            ], kind=OutboundEmail.Kind.DIGEST)
+            sync.record_user_changes(
+                SyncChange.Entity.NOTIFICATION,
+                [(digest.pk, digest.recipient_id) for digest in digests],
+                SyncChange.Op.UPSERT,
+            )
+        sent += len(digests)
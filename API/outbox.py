@@ -0,0 +1,139 @@
+"""
+Hàng đợi email gửi đi (OutboundEmail).
+
+Request (quên mật khẩu, bản tóm tắt...) chỉ gọi enqueue() - một INSERT, không chạm tới SMTP nên mail
+server chậm / lỗi không làm chậm hay làm lỗi request. Lệnh `send_queued_mail` gửi theo lô:
+- nhận tối đa MAIL_BATCH_SIZE email đến hạn (SELECT ... FOR UPDATE SKIP LOCKED trên PostgreSQL), đặt
+  hạn thuê next_attempt_at = now + MAIL_LEASE_SECONDS để worker khác không nhận trùng
+- mở MỘT kết nối SMTP cho cả lô (EMAIL_BACKEND, dùng lại giữa các email)
+- email lỗi được thử lại sau MAIL_RETRY_BASE_SECONDS * 2^(lần thử - 1) (tối đa MAIL_RETRY_MAX_SECONDS),
+  quá MAIL_MAX_ATTEMPTS lần thì chuyển FAILED; không mở được kết nối -> cả lô được hẹn lại
+Email đã gửi bị xóa nội dung ngay (link reset mật khẩu không nằm lại trong DB); prune() xóa hẳn các dòng
+SENT / FAILED cũ hơn MAIL_RETENTION_DAYS ngày.
+Dev / test: EMAIL_BACKEND trỏ tới SMTP giả lập cục bộ (xem .env.example).
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import metrics
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+Status = OutboundEmail.Status
+
+
+def enqueue(to, subject, body, kind=OutboundEmail.Kind.OTHER):
+    return OutboundEmail.objects.create(to=to, subject=subject, body=body, kind=kind)
+
+
+def enqueue_many(messages, kind=OutboundEmail.Kind.OTHER):
+    """messages = [(to, subject, body)] -> một bulk INSERT."""
+    return OutboundEmail.objects.bulk_create([
+        OutboundEmail(to=to, subject=subject, body=body, kind=kind)
+        for to, subject, body in messages
+    ])
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(settings.MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.MAIL_RETRY_MAX_SECONDS))
+
+
+# SECTION: Worker (lệnh send_queued_mail)
+def claim_batch(now, batch_size):
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status__in=[Status.PENDING, Status.SENDING], next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if emails:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                status=Status.SENDING,
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + timedelta(seconds=settings.MAIL_LEASE_SECONDS),
+            )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def reschedule(email, error, now):
+    email.last_error = error
+    if email.attempts >= settings.MAIL_MAX_ATTEMPTS:
+        email.status = Status.FAILED
+    else:
+        email.status = Status.PENDING
+        email.next_attempt_at = now + retry_delay(email.attempts)
+    metrics.registry.inc('mail_send_failures_total', kind=email.kind)
+    return email
+
+
+def send_batch(batch_size=None):
+    """Gửi một lô email đến hạn trên một kết nối. Trả về (số đã gửi, số lỗi)."""
+    batch_size = batch_size or settings.MAIL_BATCH_SIZE
+    now = timezone.now()
+    emails = claim_batch(now, batch_size)
+    if not emails:
+        return 0, 0
+
+    sent, failed = [], []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning("Không mở được kết nối gửi mail", exc_info=True)
+        failed = [reschedule(email, f"connection: {e}", now) for email in emails]
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(email.subject, email.body, settings.DEFAULT_FROM_EMAIL, [email.to], connection=connection)
+                try:
+                    message.send()
+                except Exception as e:
+                    failed.append(reschedule(email, str(e), now))
+                else:
+                    sent.append(email)
+                    metrics.registry.inc('mail_sent_total', kind=email.kind)
+        finally:
+            connection.close()
+
+    if sent:
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in sent]).update(
+            status=Status.SENT, sent_at=timezone.now(), last_error='', body='',
+        )
+    if failed:
+        OutboundEmail.objects.bulk_update(failed, ['status', 'next_attempt_at', 'last_error'])
+    return len(sent), len(failed)
+
+
+def send_pending(batch_size=None, max_batches=None):
+    """Gửi lần lượt các lô cho tới khi hết email đến hạn. Trả về (tổng đã gửi, tổng lỗi)."""
+    total_sent = total_failed = batches = 0
+    while max_batches is None or batches < max_batches:
+        sent, failed = send_batch(batch_size)
+        total_sent += sent
+        total_failed += failed
+        batches += 1
+        # Hết email đến hạn, hoặc cả lô lỗi (mail server đang hỏng) -> đợi lần chạy sau
+        if not sent:
+            break
+    return total_sent, total_failed
+
+
+def prune(now=None):
+    """Xóa email đã gửi / lỗi hẳn cũ hơn MAIL_RETENTION_DAYS ngày (0 = giữ mãi). Trả về số dòng đã xóa."""
+    if not settings.MAIL_RETENTION_DAYS:
+        return 0
+    cutoff = (now or timezone.now()) - timedelta(days=settings.MAIL_RETENTION_DAYS)
+    # FAILED: next_attempt_at là hạn thuê của lần thử cuối
+    deleted, _by_model = OutboundEmail.objects.filter(
+        Q(status=Status.SENT, sent_at__lt=cutoff) | Q(status=Status.FAILED, next_attempt_at__lt=cutoff)
+    ).delete()
+    return deleted
@@ -1,6 +1,25 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from django.db.models import Q
 from .models import Project, Task
+from . import access
+
+
+def is_project_member(user, project):
+    """Dùng danh sách thành viên đã prefetch nếu có, nếu không thì 1 query EXISTS (không tải cả danh sách)."""
+    known = project.__dict__.get('_known_members', {})
+    if user.pk in known:
+        return known[user.pk]
+    prefetched = getattr(project, '_prefetched_objects_cache', {})
+    if 'members' in prefetched:
+        return any(member.pk == user.pk for member in prefetched['members'])
+    return project.members.filter(pk=user.pk).exists()
+
+
+async def ais_project_member(user, project):
+    """Bản async (view ASGI): ghi nhớ kết quả trên project để has_object_permission không chạm DB nữa."""
+    known = project.__dict__.setdefault('_known_members', {})
+    if user.pk not in known:
+        known[user.pk] = await project.members.filter(pk=user.pk).aexists()
+    return known[user.pk]
 
 
 # Phân quyền ProjectList 
@@ -12,7 +31,8 @@ class CanViewProjectList(BasePermission):
         user = request.user
         if user.is_staff:
             return Project.objects.all()
-        return Project.objects.filter(Q(owner=user) | Q(members=user)).distinct()
+        # EXISTS trên bảng quyền xem (index user, project): không OR-join, không DISTINCT
+        return Project.objects.filter(access.visible_projects(user))
 
 
 # Phân quyền ProjectDetail
@@ -21,8 +41,14 @@ class IsProjectOwnerOrMember(BasePermission):
         if request.user.is_staff:
             return True
         if request.method in SAFE_METHODS:
-            return request.user in obj.members.all() or request.user == obj.owner
-        return request.user == obj.owner
+            return obj.owner_id == request.user.pk or is_project_member(request.user, obj)
+        return obj.owner_id == request.user.pk
+
+    async def ahas_object_permission(self, request, view, obj):
+        user = request.user
+        if not user.is_staff and obj.owner_id != user.pk and request.method in SAFE_METHODS:
+            await ais_project_member(user, obj)
+        return self.has_object_permission(request, view, obj)
 
 
 # Phân quyền TaskList (Dành cho danh sách task trong dự án)
@@ -35,11 +61,8 @@ class CanViewTaskList(BasePermission):
         if user.is_staff:
             return Task.objects.filter(project_id=project_pk)
         
-        # Chỉ lấy task thuộc dự án VÀ không phải task cá nhân
-        return Task.objects.filter(
-            Q(project__id=project_pk, project__members=user) | 
-            Q(project__id=project_pk, project__owner=user)
-        ).filter(is_personal=False).distinct()
+        # Chỉ lấy task thuộc dự án VÀ không phải task cá nhân; quyền xem kiểm tra bằng một EXISTS trong cùng query
+        return Task.objects.filter(project_id=project_pk, is_personal=False).filter(access.can_view(user, project_pk))
 
 
 # Phân quyền TaskDetail (Xử lý cả Task cá nhân và Task dự án)
@@ -55,24 +78,32 @@ class IsTaskPermission(BasePermission):
         # --- CASE 1: TASK CÁ NHÂN ---
         if obj.is_personal:
             # Chỉ người tạo mới được xem/sửa/xóa
-            return obj.created_by == user
+            return obj.created_by_id == user.pk
 
         # --- CASE 2: TASK DỰ ÁN ---
-        if obj.project:
+        if obj.project_id:
             project = obj.project
-            is_owner = user == project.owner
-            is_member = user in project.members.all()
-            is_assignee = user == obj.assignee
+            is_owner = project.owner_id == user.pk
+            is_assignee = obj.assignee_id == user.pk
 
             if request.method in SAFE_METHODS:
-                return is_owner or is_member or is_assignee
-            if request.method in ['PUT', 'PATCH']:
-                return is_owner or is_member or is_assignee
+                return is_owner or is_assignee or is_project_member(user, project)
+            # POST: tạo bình luận / tệp đính kèm trên task
+            if request.method in ['POST', 'PUT', 'PATCH']:
+                return is_owner or is_assignee or is_project_member(user, project)
             if request.method == 'DELETE':
                 return is_owner # Chỉ chủ dự án mới được xóa task dự án
         
         return False
 
+    async def ahas_object_permission(self, request, view, obj):
+        # Tra cứu thành viên bằng ORM async (chỉ khi cần), sau đó dùng lại logic đồng bộ ở trên
+        user = request.user
+        if (not user.is_staff and not obj.is_personal and obj.project_id
+                and obj.project.owner_id != user.pk and obj.assignee_id != user.pk):
+            await ais_project_member(user, obj.project)
+        return self.has_object_permission(request, view, obj)
+
 
 # Phân quyền Comment/Attachment Detail
 class IsCommentOrAttachmentOwner(BasePermission):
@@ -83,20 +114,30 @@ class IsCommentOrAttachmentOwner(BasePermission):
         
         # Nếu task cá nhân, chỉ chủ task được xử lý
         if obj.task.is_personal:
-            return obj.task.created_by == user
+            return obj.task.created_by_id == user.pk
 
         project = obj.task.project
-        is_owner = user == project.owner
-        is_member = user in project.members.all()
-        author_or_uploader = getattr(obj, 'author', None) or getattr(obj, 'uploader', None)
-        is_author = user == author_or_uploader
+        is_owner = project.owner_id == user.pk
+        author_or_uploader_id = getattr(obj, 'author_id', None) or getattr(obj, 'uploader_id', None)
+        is_author = author_or_uploader_id == user.pk
         if request.method in SAFE_METHODS:
-            return is_owner or is_member
+            return is_owner or is_project_member(user, project)
         if request.method == 'DELETE' and is_owner:
             return True
         return is_author
 
 
+# Phân quyền phụ thuộc giữa task: chỉ task dự án; thành viên / chủ dự án được xem, thêm và gỡ cạnh
+class CanManageTaskDependencies(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        user = request.user
+        if user.is_staff:
+            return True
+        if obj.is_personal or not obj.project_id:
+            return False
+        return obj.project.owner_id == user.pk or is_project_member(user, obj.project)
+
+
 # Phân quyền ActivityLog View
 class CanViewActivityLog(BasePermission):
     def has_permission(self, request, view):
@@ -108,4 +149,4 @@ class IsProjectOwnerOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.is_staff:
             return True
-        return request.user == obj.owner
\ No newline at end of file
+        return obj.owner_id == request.user.pk
\ No newline at end of file
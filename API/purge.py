@@ -0,0 +1,214 @@
+"""
+Xóa dự án / task lớn ở nền.
+
+Request DELETE chỉ đánh dấu deleted_at (ProjectManager / TaskManager ẩn ngay khỏi mọi truy vấn),
+ghi tombstone /sync/ và tạo DeletionJob. Lệnh `purge_deleted` nhận job và dọn dữ liệu theo từng bước,
+mỗi bước xóa tối đa PURGE_BATCH_SIZE dòng trong một transaction ngắn:
+- thông báo, tệp đính kèm (xóa file trên storage sau khi transaction commit), bình luận, rollup analytics
+- nhật ký hoạt động được giữ lại (gỡ liên kết tới dự án / task như on_delete=SET_NULL trước đây)
+- cuối cùng là task, thành viên và chính dự án
+Không bao giờ nạp cả cây dữ liệu vào Python; job dừng giữa chừng có thể chạy lại (mỗi lô đều idempotent).
+Tiến độ (bước hiện tại, số dòng / tệp đã xóa) được ghi vào DeletionJob sau mỗi lô.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import access, sync
+from .models import (
+    ActivityLog, Attachment, Comment, DeletionJob, Notification, Project, ProjectAccess, ProjectDailyStat, SyncChange,
+    Task, TaskCycleStat, TaskDependency, TaskReminder,
+)
+
+logger = logging.getLogger(__name__)
+
+Membership = Project.members.through
+
+
+# SECTION: Đánh dấu xóa (trong request)
+@transaction.atomic
+def delete_project(actor, project):
+    """Ẩn dự án ngay lập tức và xếp job dọn dữ liệu. User mất quyền nhận tombstone qua /sync/."""
+    # Thu hồi quyền xem ngay (bảng quyền chỉ chứa dự án chưa xóa)
+    user_ids = set(access.revoke_all(project.pk)) | {project.owner_id}
+    project.deleted_at = timezone.now()
+    project.save(update_fields=['deleted_at'])
+    sync.record_project_access(project.pk, user_ids, SyncChange.Op.DELETE)
+    return DeletionJob.objects.create(
+        kind=DeletionJob.Kind.PROJECT, object_id=project.pk, object_name=project.name, requested_by=actor,
+    )
+
+
+@transaction.atomic
+def delete_task(actor, task):
+    task.deleted_at = timezone.now()
+    task.save(update_fields=['deleted_at'])
+    sync.record_change(task, SyncChange.Op.DELETE)
+    return DeletionJob.objects.create(
+        kind=DeletionJob.Kind.TASK, object_id=task.pk, object_name=task.title, requested_by=actor,
+    )
+
+
+# SECTION: Các bước dọn dữ liệu
+def delete_batches(queryset, batch_size):
+    """Xóa theo lô id (mỗi lô một transaction), yield (số dòng đã xóa, danh sách id) sau mỗi lô."""
+    model = queryset.model
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        with transaction.atomic():
+            deleted, _ = model._base_manager.filter(pk__in=ids).delete()
+        yield deleted, ids
+
+
+def delete_attachment_batches(queryset, batch_size):
+    """Như delete_batches, file trên storage chỉ bị xóa khi lô đã commit (rollback thì file vẫn còn)."""
+    while True:
+        rows = list(queryset.order_by('pk').values_list('pk', 'file')[:batch_size])
+        if not rows:
+            return
+        ids = [pk for pk, _name in rows]
+        names = [name for _pk, name in rows if name]
+        with transaction.atomic():
+            deleted, _ = Attachment.objects.filter(pk__in=ids).delete()
+            transaction.on_commit(lambda names=names: remove_files(names))
+        yield deleted, ids, len(names)
+
+
+def remove_files(names):
+    storage = Attachment._meta.get_field('file').storage
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError:
+            # File mồ côi trên storage không chặn việc dọn dữ liệu; ghi log để dọn tay
+            logger.warning("Không xóa được tệp đính kèm %s", name, exc_info=True)
+
+
+def detach_batches(queryset, batch_size, **values):
+    """Gỡ liên kết theo lô (UPDATE ... SET fk = NULL) cho các bản ghi được giữ lại."""
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        updated = queryset.model.objects.filter(pk__in=ids).update(**values)
+        yield updated, ids
+
+
+def project_steps(project_id):
+    """(tên bước, hàm tạo lô) theo thứ tự: con trước, cha sau."""
+    in_project = Q(task__project_id=project_id)
+    return [
+        ('notifications', lambda size: delete_batches(Notification.objects.filter(Q(project_id=project_id) | in_project), size)),
+        ('attachments', lambda size: delete_attachment_batches(Attachment.objects.filter(in_project), size)),
+        ('comments', lambda size: delete_batches(Comment.objects.filter(in_project), size)),
+        ('cycle_stats', lambda size: delete_batches(TaskCycleStat.objects.filter(project_id=project_id), size)),
+        ('daily_stats', lambda size: delete_batches(ProjectDailyStat.objects.filter(project_id=project_id), size)),
+        ('activity_logs', lambda size: detach_batches(ActivityLog.objects.filter(project_id=project_id), size, project=None, task=None)),
+        # Tombstone dự án đã báo client xóa toàn bộ dữ liệu dự án -> bỏ các dòng cũ của dự án trong chuỗi /sync/
+        ('sync_changes', lambda size: delete_batches(SyncChange.objects.filter(project_id=project_id), size)),
+        ('dependencies', lambda size: delete_batches(TaskDependency.objects.filter(project_id=project_id), size)),
+        ('reminders', lambda size: delete_batches(TaskReminder.objects.filter(in_project), size)),
+        ('tasks', lambda size: delete_batches(Task.all_objects.filter(project_id=project_id), size)),
+        ('access', lambda size: delete_batches(ProjectAccess.objects.filter(project_id=project_id), size)),
+        ('members', lambda size: delete_batches(Membership.objects.filter(project_id=project_id), size)),
+        ('project', lambda size: delete_batches(Project.all_objects.filter(pk=project_id), size)),
+    ]
+
+
+def task_steps(task_id, project_id, user_id):
+    """Bình luận / tệp của task bị xóa nhận tombstone /sync/ theo lô (cùng phạm vi với task)."""
+    def with_tombstones(entity, batches):
+        for result in batches:
+            sync.record_changes(entity, result[1], SyncChange.Op.DELETE, project_id=project_id, user_id=user_id)
+            yield result
+
+    return [
+        ('notifications', lambda size: delete_batches(Notification.objects.filter(task_id=task_id), size)),
+        ('attachments', lambda size: with_tombstones(
+            SyncChange.Entity.ATTACHMENT, delete_attachment_batches(Attachment.objects.filter(task_id=task_id), size))),
+        ('comments', lambda size: with_tombstones(
+            SyncChange.Entity.COMMENT, delete_batches(Comment.objects.filter(task_id=task_id), size))),
+        ('cycle_stats', lambda size: delete_batches(TaskCycleStat.objects.filter(task_id=task_id), size)),
+        ('activity_logs', lambda size: detach_batches(ActivityLog.objects.filter(task_id=task_id), size, task=None)),
+        ('dependencies', lambda size: delete_batches(TaskDependency.objects.filter(Q(task_id=task_id) | Q(blocked_by_id=task_id)), size)),
+        ('reminders', lambda size: delete_batches(TaskReminder.objects.filter(task_id=task_id), size)),
+        ('task', lambda size: delete_batches(Task.all_objects.filter(pk=task_id), size)),
+    ]
+
+
+def steps_for(job):
+    if job.kind == DeletionJob.Kind.PROJECT:
+        return project_steps(job.object_id)
+    task = Task.all_objects.filter(pk=job.object_id).values('project_id', 'is_personal', 'created_by_id').first()
+    if task is None:
+        return []
+    if task['is_personal'] or task['project_id'] is None:
+        return task_steps(job.object_id, None, task['created_by_id'])
+    return task_steps(job.object_id, task['project_id'], None)
+
+
+# SECTION: Chạy job (lệnh purge_deleted)
+def claim_job():
+    """Nhận job đang chờ (hoặc job RUNNING không cập nhật quá PURGE_JOB_TIMEOUT giây - worker cũ đã chết)."""
+    stale = timezone.now() - timedelta(seconds=settings.PURGE_JOB_TIMEOUT)
+    with transaction.atomic():
+        job = (
+            DeletionJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=DeletionJob.Status.PENDING) | Q(status=DeletionJob.Status.RUNNING, updated_at__lt=stale))
+            .order_by('id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = DeletionJob.Status.RUNNING
+        job.save(update_fields=['status', 'updated_at'])
+    return job
+
+
+def run_job(job, batch_size=None):
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    try:
+        # Đã tự ghi tombstone ở trên -> không để signal ghi lại từng dòng
+        with sync.suppressed():
+            for phase, batches in steps_for(job):
+                job.phase = phase
+                for result in batches(batch_size):
+                    job.rows_deleted += result[0]
+                    if len(result) > 2:
+                        job.files_deleted += result[2]
+                    job.save(update_fields=['phase', 'rows_deleted', 'files_deleted', 'updated_at'])
+    except Exception as e:
+        logger.exception("Xóa %s #%s thất bại", job.kind, job.object_id)
+        job.status = DeletionJob.Status.FAILED
+        job.error = str(e)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        return job
+    job.status = DeletionJob.Status.DONE
+    job.phase = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'phase', 'finished_at', 'updated_at'])
+    return job
+
+
+def retry_failed():
+    """Đưa các job lỗi về hàng chờ (chạy lại từ đầu, các bước đã xong sẽ không còn gì để xóa)."""
+    return DeletionJob.objects.filter(status=DeletionJob.Status.FAILED).update(
+        status=DeletionJob.Status.PENDING, error='', updated_at=timezone.now(),
+    )
+
+
+def run_pending(batch_size=None, limit=None):
+    """Chạy lần lượt các job đang chờ, trả về danh sách job đã chạy."""
+    done = []
+    while limit is None or len(done) < limit:
+        job = claim_job()
+        if job is None:
+            break
+        done.append(run_job(job, batch_size))
+    return done
@@ -0,0 +1,162 @@
+"""
+Thứ tự task trong cột Kanban bằng khóa phân số (fractional index).
+
+Task.rank là chuỗi chữ số hệ 36 ('0-9a-z') được hiểu là phần thập phân 0.<rank>, so sánh theo thứ tự từ
+điển (không bao giờ kết thúc bằng '0' nên mỗi giá trị chỉ có một cách viết). Giữa hai khóa bất kỳ luôn
+có khóa khác -> kéo thả một task chỉ cập nhật đúng một dòng (rank + status của chính task đó).
+
+Thêm vào cuối cột lấy khóa ngắn nhất lớn hơn khóa cuối (tăng chữ số đầu tiên chưa phải 'z'), nên khóa chỉ
+dài thêm một ký tự sau mỗi ~35 lần thêm. Chèn nhiều lần vào cùng một chỗ làm khóa dài dần: lệnh `rebalance_ranks` định kỳ viết lại các cột có
+khóa dài hơn TASK_RANK_REBALANCE_LENGTH thành các khóa ngắn, cách đều. Khóa trùng / sai thứ tự (hai
+request kéo thả đồng thời) được chuẩn hóa ngay trong request bằng cách viết lại cột đó.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Length
+
+from . import sync
+from .models import SyncChange, Task
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+MAX_LENGTH = Task._meta.get_field('rank').max_length
+# Số dòng mỗi câu UPDATE khi viết lại một cột
+UPDATE_BATCH_SIZE = 500
+
+
+def midpoint(lower, upper):
+    """Khóa nằm giữa lower ('' = 0) và upper (None = 1). Yêu cầu lower < upper."""
+    if upper is None and lower:
+        return successor(lower)
+    if upper is not None:
+        # Bỏ phần đầu chung, tính giữa hai phần còn lại
+        n = 0
+        while n < len(upper) and (lower[n] if n < len(lower) else '0') == upper[n]:
+            n += 1
+        if n:
+            return upper[:n] + midpoint(lower[n:], upper[n:])
+    digit_lower = DIGITS.index(lower[0]) if lower else 0
+    digit_upper = DIGITS.index(upper[0]) if upper is not None else BASE
+    if digit_upper - digit_lower > 1:
+        return DIGITS[(digit_lower + digit_upper) // 2]
+    # Hai chữ số liền nhau: upper dài hơn một chữ số thì chính chữ số đầu của nó đã nằm giữa
+    if upper is not None and len(upper) > 1:
+        return upper[0]
+    return DIGITS[digit_lower] + midpoint(lower[1:], None)
+
+
+def successor(lower):
+    """Khóa ngắn nhất lớn hơn lower (khác rỗng): tăng chữ số đầu tiên chưa phải 'z', toàn 'z' thì thêm '1'."""
+    for n, digit in enumerate(lower):
+        if digit != DIGITS[-1]:
+            return lower[:n] + DIGITS[DIGITS.index(digit) + 1]
+    return lower + DIGITS[1]
+
+
+def key_between(before, after):
+    """Khóa cho task đặt ngay sau `before` và ngay trước `after` (rank của hàng xóm, None = đầu / cuối cột)."""
+    lower = before or ''
+    if after is not None and lower >= after:
+        raise ValueError(f"rank không tăng dần: {before!r} >= {after!r}")
+    return midpoint(lower, after)
+
+
+def spread(count):
+    """count khóa cách đều, ngắn nhất có thể (dùng khi viết lại cả cột)."""
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width // (count + 1)
+    keys = []
+    for i in range(1, count + 1):
+        value, digits = i * step, []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append(''.join(reversed(digits)).rstrip('0'))
+    return keys
+
+
+# SECTION: Cột Kanban
+def column(task, status=None):
+    """Các task cùng cột với task: cùng dự án + trạng thái (task cá nhân: cùng người tạo + trạng thái)."""
+    status = status or task.status
+    if task.is_personal or task.project_id is None:
+        return Task.objects.filter(project__isnull=True, is_personal=True, created_by_id=task.created_by_id, status=status)
+    return Task.objects.filter(project_id=task.project_id, status=status)
+
+
+def end_of_column(task, status=None):
+    """Khóa cuối cột `status`; khóa mới quá dài -> viết lại cột (như place) rồi xếp sau task cuối."""
+    last = column(task, status).order_by('-rank').values_list('rank', flat=True).first()
+    rank = key_between(last, None)
+    if len(rank) > MAX_LENGTH:
+        ranks = respread(column(task, status).exclude(pk=task.pk))
+        rank = key_between(max(ranks.values(), default=None), None)
+    return rank
+
+
+def rebalance(queryset):
+    """Viết lại rank của một cột thành các khóa cách đều, giữ nguyên thứ tự hiện tại. Trả về số task."""
+    return len(respread(queryset))
+
+
+def respread(queryset):
+    """Như rebalance nhưng trả về {pk: rank mới} để nơi gọi khỏi đọc lại các task vừa được viết."""
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().order_by('rank', 'id').values_list('id', 'project_id', 'created_by_id', 'is_personal'))
+        if not rows:
+            return {}
+        tasks = [Task(pk=pk, rank=rank) for (pk, _project, _owner, _personal), rank in zip(rows, spread(len(rows)))]
+        Task.objects.bulk_update(tasks, ['rank'], batch_size=UPDATE_BATCH_SIZE)
+        _pk, project_id, created_by_id, is_personal = rows[0]
+        ids = [task.pk for task in tasks]
+        if is_personal or project_id is None:
+            sync.record_changes(SyncChange.Entity.TASK, ids, SyncChange.Op.UPSERT, user_id=created_by_id)
+        else:
+            sync.record_changes(SyncChange.Entity.TASK, ids, SyncChange.Op.UPSERT, project_id=project_id)
+    return {task.pk: task.rank for task in tasks}
+
+
+def place(task, before=None, after=None, status=None):
+    """
+    Tính rank để đặt task giữa hai hàng xóm (Task hoặc None) trong cột `status`.
+    Hàng xóm có khóa trùng / sai thứ tự hoặc khóa mới quá dài -> viết lại cột rồi tính lại.
+    """
+    status = status or task.status
+    for attempt in range(2):
+        try:
+            rank = key_between(before.rank if before else None, after.rank if after else None)
+        except ValueError:
+            rank = None
+        if rank is not None and len(rank) <= MAX_LENGTH:
+            return rank
+        if attempt:
+            break
+        ranks = respread(column(task, status).exclude(pk=task.pk))
+        for neighbour in (before, after):
+            if neighbour is not None:
+                neighbour.rank = ranks.get(neighbour.pk, neighbour.rank)
+    raise ValueError("Không tính được vị trí mới cho task.")
+
+
+def rebalance_long_columns(length=None):
+    """Viết lại các cột có khóa dài hơn ngưỡng. Trả về [(mô tả cột, số task)]."""
+    length = length or settings.TASK_RANK_REBALANCE_LENGTH
+    long_ranks = Task.objects.annotate(rank_length=Length('rank')).filter(rank_length__gt=length)
+    columns = set()
+    for project_id, created_by_id, is_personal, status in (
+        long_ranks.values_list('project_id', 'created_by_id', 'is_personal', 'status').distinct()
+    ):
+        if is_personal or project_id is None:
+            columns.add(('user', created_by_id, status))
+        else:
+            columns.add(('project', project_id, status))
+    done = []
+    for scope, scope_id, status in sorted(columns):
+        if scope == 'user':
+            sample = Task(project_id=None, is_personal=True, created_by_id=scope_id)
+        else:
+            sample = Task(project_id=scope_id, is_personal=False)
+        done.append((f"{scope} #{scope_id} / {status}", rebalance(column(sample, status))))
+    return done
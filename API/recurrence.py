@@ -0,0 +1,198 @@
+"""
+Công việc lặp lại (hằng ngày / tuần / tháng, mỗi N đơn vị, có thể đến một ngày kết thúc).
+
+Chỉ lần kế tiếp được lưu: chính task mang quy tắc lặp, due_date là hạn của lần đó. Lần thứ n của chuỗi được
+tính trực tiếp từ hạn gốc (recurrence_anchor) nên không trôi ngày (31/1 -> 28/2 -> 31/3) và không phải lặp qua
+các lần trước. Nhờ vậy quy tắc "mỗi ngày, mãi mãi" vẫn chỉ là một dòng trong bảng Task và không làm chậm
+TaskFilter.
+
+- Danh sách task có ?due_date_before=... : các lần sau trong khoảng ngày được chiếu ảo (không có id, is_virtual),
+  tối đa RECURRENCE_MAX_OCCURRENCES lần mỗi response.
+- Hoàn thành lần kế tiếp: lưu một bản DONE của lần đó (task riêng trỏ về chuỗi), task của chuỗi chuyển sang
+  hạn kế tiếp và về TODO.
+- "Chạm" một lần ảo (POST tasks/<pk>/occurrences/): lần đó thành task thật trỏ về chuỗi; chuỗi bỏ qua ngày đó.
+"""
+import calendar
+import heapq
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import ranking, sync
+from .filters import TaskFilter
+from .models import SyncChange, Task
+
+Recurrence = Task.Recurrence
+# Độ dài trung bình (ngày) của một đơn vị, chỉ để ước lượng số lần trước khi hiệu chỉnh
+APPROX_DAYS = {Recurrence.DAILY: 1, Recurrence.WEEKLY: 7, Recurrence.MONTHLY: 30.4375}
+# Các trường được chép từ chuỗi sang một lần cụ thể
+COPIED_FIELDS = ['title', 'description', 'priority', 'project_id', 'is_personal', 'created_by_id', 'assignee_id']
+
+
+# SECTION: Lịch
+def add_months(moment, months):
+    month = moment.month - 1 + months
+    year, month = moment.year + month // 12, month % 12 + 1
+    return moment.replace(year=year, month=month, day=min(moment.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence(task, n):
+    """Hạn của lần thứ n (lần 0 = hạn gốc), tính theo giờ địa phương."""
+    anchor = timezone.localtime(task.recurrence_anchor or task.due_date)
+    local, step = anchor.replace(tzinfo=None), n * task.recurrence_interval
+    if task.recurrence == Recurrence.DAILY:
+        local += timedelta(days=step)
+    elif task.recurrence == Recurrence.WEEKLY:
+        local += timedelta(weeks=step)
+    else:
+        local = add_months(local, step)
+    return timezone.make_aware(local, anchor.tzinfo)
+
+
+def first_after(task, moment):
+    """Số thứ tự n >= 1 nhỏ nhất có occurrence(n) > moment."""
+    anchor = task.recurrence_anchor or task.due_date
+    days = (moment - anchor).total_seconds() / 86400
+    n = max(1, int(days // (APPROX_DAYS[task.recurrence] * task.recurrence_interval)))
+    while n > 1 and occurrence(task, n - 1) > moment:
+        n -= 1
+    while occurrence(task, n) <= moment:
+        n += 1
+    return n
+
+
+def is_recurring(task):
+    return bool(task.recurrence) and task.due_date is not None
+
+
+def ended(task, due):
+    return task.recurrence_until is not None and due > task.recurrence_until
+
+
+def occurrence_copy(task, due, **fields):
+    copy = Task(recurrence_parent_id=task.pk, due_date=due, **{name: getattr(task, name) for name in COPIED_FIELDS})
+    for name, value in fields.items():
+        setattr(copy, name, value)
+    return copy
+
+
+# SECTION: Chiếu các lần ảo
+def window(cleaned_data):
+    """
+    [từ, đến] theo due_date_after / due_date_before của TaskFilter (so sánh như TaskFilter: đầu ngày, gồm cả hai
+    đầu); None nếu không có due_date_before.
+    """
+    before = cleaned_data.get('due_date_before')
+    if not before:
+        return None
+    after = cleaned_data.get('due_date_after')
+    start = timezone.make_aware(datetime.combine(after, time.min)) if after else timezone.now()
+    return start, timezone.make_aware(datetime.combine(before, time.min))
+
+
+def project(series, start, end, limit=None):
+    """
+    Các lần ảo (Task chưa lưu) của các chuỗi trong [start, end], sau lần kế tiếp đã lưu, bỏ qua ngày đã thành
+    task thật. Dừng khi đủ `limit` lần.
+    """
+    limit = settings.RECURRENCE_MAX_OCCURRENCES if limit is None else limit
+    series = [task for task in series if is_recurring(task)]
+    if not series or limit <= 0:
+        return []
+    taken = set(
+        Task.all_objects.filter(recurrence_parent__in=[task.pk for task in series], due_date__gte=start, due_date__lte=end)
+        .values_list('recurrence_parent_id', 'due_date')
+    )
+
+    def upcoming(task):
+        n = first_after(task, max(task.due_date, start - timedelta(microseconds=1)))
+        while True:
+            due = occurrence(task, n)
+            if due > end or ended(task, due):
+                return
+            if (task.pk, due) not in taken:
+                yield due, task.pk, task
+            n += 1
+
+    # Trộn các chuỗi theo hạn: giới hạn cắt đi các lần muộn nhất, không cắt cả một chuỗi
+    virtual = []
+    for due, _pk, task in islice(heapq.merge(*(upcoming(task) for task in series)), limit):
+        item = occurrence_copy(task, due, status=Task.Status.TODO, recurrence=task.recurrence,
+                               recurrence_interval=task.recurrence_interval, recurrence_until=task.recurrence_until)
+        item.assignee = task.assignee
+        item.is_virtual = True
+        virtual.append(item)
+    return virtual
+
+
+def with_occurrences(request, queryset, filterset):
+    """
+    Task đã lọc bằng TaskFilter + các lần ảo. queryset: task trước khi lọc. Lần ảo có trạng thái TODO nên bị
+    bỏ khi lọc theo trạng thái khác; bộ lọc ngày không áp cho chính chuỗi (lần kế tiếp có thể trước khoảng).
+    """
+    tasks = list(filterset.qs)
+    bounds = window(filterset.form.cleaned_data)
+    wanted_status = filterset.form.cleaned_data.get('status')
+    if bounds is None or (wanted_status and wanted_status.upper() != Task.Status.TODO):
+        return tasks
+    start, end = bounds
+    data = request.GET.copy()
+    for name in ('status', 'due_date_after', 'due_date_before'):
+        data.pop(name, None)
+    series = (
+        TaskFilter(data, queryset=queryset, request=request).qs
+        .exclude(recurrence='').filter(due_date__lte=end).exclude(recurrence_until__lt=start)
+    )
+    return tasks + project(series, start, end)
+
+
+# SECTION: Hoàn thành / chạm một lần
+def complete(task, rank=None):
+    """
+    Gọi khi task của chuỗi chuyển sang DONE (task.status đã là DONE, có thể chưa lưu): lưu bản DONE của lần này và
+    đưa chuỗi sang lần kế tiếp chưa thành task thật. Lần cuối (quá recurrence_until) chỉ kết thúc chuỗi.
+    `rank` = vị trí của chuỗi trong cột TODO (mặc định: cuối cột).
+    Dòng của chuỗi chỉ được ghi một lần, /sync/ của cả hai task ghi chung. Trả về bản DONE (hoặc None).
+    """
+    if not is_recurring(task) or task.status != Task.Status.DONE:
+        return None
+    with transaction.atomic(), sync.suppressed():
+        taken = set(Task.all_objects.filter(recurrence_parent=task, due_date__gt=task.due_date).values_list('due_date', flat=True))
+        n = first_after(task, task.due_date)
+        while occurrence(task, n) in taken:
+            n += 1
+        next_due = occurrence(task, n)
+        project_id, user_id = sync.scope_for(task)
+        if ended(task, next_due):
+            task.recurrence = Recurrence.NONE
+            task.save(update_fields=['recurrence', 'status', 'rank', 'updated_at'])
+            sync.record_changes(SyncChange.Entity.TASK, [task.pk], SyncChange.Op.UPSERT, project_id=project_id, user_id=user_id)
+            return None
+        done = occurrence_copy(task, task.due_date, status=Task.Status.DONE, rank=task.rank)
+        done.save()
+        task.due_date, task.status = next_due, Task.Status.TODO
+        task.rank = rank or ranking.end_of_column(task, Task.Status.TODO)
+        task.save(update_fields=['due_date', 'status', 'rank', 'updated_at'])
+        sync.record_changes(SyncChange.Entity.TASK, [done.pk, task.pk], SyncChange.Op.UPSERT, project_id=project_id, user_id=user_id)
+    return done
+
+
+def materialize(task, due):
+    """Biến lần có hạn `due` thành task thật. Trả về (task, đã tạo mới hay chưa); ValueError nếu không phải một lần sau."""
+    if not is_recurring(task) or due <= task.due_date or ended(task, due):
+        raise ValueError(due)
+    if occurrence(task, first_after(task, due - timedelta(microseconds=1))) != due:
+        raise ValueError(due)
+    existing = Task.all_objects.filter(recurrence_parent=task, due_date=due).first()
+    if existing is not None:
+        # Lần đã bị xóa không được tạo lại (chuỗi tiếp tục bỏ qua ngày đó)
+        if existing.deleted_at is not None:
+            raise ValueError(due)
+        return existing, False
+    copy = occurrence_copy(task, due, status=Task.Status.TODO)
+    copy.rank = ranking.end_of_column(copy)
+    copy.save()
+    return copy, True
@@ -0,0 +1,93 @@
+"""
+Nhắc hạn công việc (lệnh `send_due_reminders`, chạy bằng cron hoặc --watch).
+
+Mỗi lần chạy chỉ đọc hai cửa sổ thời gian qua index một phần task_open_due_idx (due_date của task chưa xong):
+- sắp đến hạn: now < due_date <= now + REMINDER_DUE_SOON_HOURS
+- quá hạn: now - REMINDER_OVERDUE_LOOKBACK_HOURS < due_date <= now (task quá hạn lâu hơn không bị nhắc dồn)
+Task đã được nhắc cho đúng (loại, hạn) bị loại bằng NOT EXISTS trên TaskReminder, nên chạy lại bao nhiêu lần
+cũng không nhắc trùng; đổi hạn thì hạn mới được nhắc lại.
+
+Mỗi lô tối đa REMINDER_BATCH_SIZE task (SELECT ... FOR UPDATE SKIP LOCKED để nhiều worker không nhận trùng),
+ghi TaskReminder + thông báo cho người được giao bằng bulk INSERT trong một transaction. Một lần chạy xử lý tối
+đa REMINDER_MAX_BATCHES lô -> công việc mỗi tick bị chặn trên dù bảng task có hàng triệu dòng.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import sync
+from .models import Notification, SyncChange, Task, TaskReminder
+
+Kind = TaskReminder.Kind
+
+
+def windows(now):
+    """(loại nhắc, hạn sau, hạn tới) - cửa sổ due_date của từng loại."""
+    return [
+        (Kind.OVERDUE, now - timedelta(hours=settings.REMINDER_OVERDUE_LOOKBACK_HOURS), now),
+        (Kind.DUE_SOON, now, now + timedelta(hours=settings.REMINDER_DUE_SOON_HOURS)),
+    ]
+
+
+def due_tasks(kind, after, until):
+    """Task chưa xong, có người được giao, hạn trong (after, until] và chưa được nhắc loại này cho hạn hiện tại."""
+    sent = TaskReminder.objects.filter(task=OuterRef('pk'), kind=kind, due_date=OuterRef('due_date'))
+    return (
+        Task.objects.filter(due_date__gt=after, due_date__lte=until, assignee__isnull=False)
+        .exclude(status=Task.Status.DONE)
+        .filter(~Exists(sent))
+        .order_by('due_date', 'id')
+    )
+
+
+def message_for(kind, task):
+    due = timezone.localtime(task.due_date).strftime('%H:%M %d/%m/%Y')
+    if kind == Kind.OVERDUE:
+        return "Công việc đã quá hạn", f"Công việc '{task.title}' đã quá hạn ({due})."
+    return "Công việc sắp đến hạn", f"Công việc '{task.title}' sẽ đến hạn lúc {due}."
+
+
+def send_batch(kind, after, until, batch_size):
+    """Nhắc một lô task; trả về số task đã nhắc."""
+    with transaction.atomic():
+        tasks = list(
+            due_tasks(kind, after, until)
+            .select_for_update(skip_locked=True, of=('self',))
+            .only('id', 'title', 'due_date', 'project_id', 'assignee_id')[:batch_size]
+        )
+        if not tasks:
+            return 0
+        TaskReminder.objects.bulk_create([TaskReminder(task=task, kind=kind, due_date=task.due_date) for task in tasks])
+        created = Notification.objects.bulk_create([
+            Notification(
+                recipient_id=task.assignee_id, kind=Notification.Kind.REMINDER, title=title, message=message,
+                project_id=task.project_id, task=task,
+            )
+            for task in tasks
+            for title, message in [message_for(kind, task)]
+        ])
+        sync.record_user_changes(
+            SyncChange.Entity.NOTIFICATION,
+            [(notification.pk, notification.recipient_id) for notification in created],
+            SyncChange.Op.UPSERT,
+        )
+    return len(tasks)
+
+
+def send_due_reminders(now=None, batch_size=None, max_batches=None):
+    """Một tick: tối đa max_batches lô cho mỗi loại. Trả về {loại: số task đã nhắc}."""
+    now = now or timezone.now()
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+    max_batches = max_batches or settings.REMINDER_MAX_BATCHES
+    sent = {}
+    for kind, after, until in windows(now):
+        sent[kind] = 0
+        for _ in range(max_batches):
+            count = send_batch(kind, after, until, batch_size)
+            sent[kind] += count
+            if count < batch_size:
+                break
+    return sent
@@ -0,0 +1,59 @@
+"""
+Gợi ý user (typeahead) cho ô chọn thành viên: khớp tiền tố + khớp gần đúng (trigram).
+
+Tìm trên 3 biểu thức chữ thường: username, email, "first_name last_name". Trên PostgreSQL mỗi
+biểu thức có 2 index (migration 0006, tạo CONCURRENTLY):
+- B-tree text_pattern_ops  -> `LOWER(x) LIKE 'abc%'` (khớp tiền tố, kể cả 1-2 ký tự)
+- GIN gin_trgm_ops         -> `LOWER(x) %> 'abc'` (word_similarity của pg_trgm, chịu được gõ sai)
+Điều kiện lọc chỉ dùng đúng các biểu thức đã đánh index nên planner gộp bằng BitmapOr, chỉ tính điểm
+trên số ít dòng khớp. Xếp hạng: khớp tiền tố trước, sau đó theo độ giống; cắt còn `limit` kết quả.
+
+DB khác (sqlite khi dev): chỉ khớp tiền tố.
+Biểu thức ở đây phải giữ khớp với index trong migration 0006_user_search_indexes.
+"""
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Concat, Greatest, Lower
+
+from .models import Project, User
+
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 25
+# Từ khóa ngắn hơn không có đủ trigram để khớp gần đúng -> chỉ khớp tiền tố
+FUZZY_MIN_LENGTH = 3
+
+SEARCH_EXPRESSIONS = {
+    'search_username': Lower('username'),
+    'search_email': Lower('email'),
+    'search_full_name': Lower(Concat('first_name', Value(' '), 'last_name')),
+}
+
+
+def suggest_users(term, limit=SUGGEST_LIMIT, project=None):
+    term = term.strip().lower()
+    if not term:
+        return User.objects.none()
+
+    users = User.objects.filter(is_active=True).annotate(**SEARCH_EXPRESSIONS)
+    if project is not None:
+        members = Project.members.through.objects.filter(project_id=project.pk).values('user_id')
+        users = users.filter(Q(pk__in=members) | Q(pk=project.owner_id))
+
+    prefix = Q()
+    for name in SEARCH_EXPRESSIONS:
+        prefix |= Q(**{f'{name}__startswith': term})
+    prefix_rank = Case(When(prefix, then=Value(1.0)), default=Value(0.0), output_field=FloatField())
+
+    if connection.vendor == 'postgresql' and len(term) >= FUZZY_MIN_LENGTH:
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        fuzzy = Q()
+        for name in SEARCH_EXPRESSIONS:
+            fuzzy |= Q(**{f'{name}__trigram_word_similar': term})
+        users = users.filter(prefix | fuzzy).annotate(
+            rank=prefix_rank + Greatest(*(TrigramWordSimilarity(Value(term), F(name)) for name in SEARCH_EXPRESSIONS)),
+        )
+    else:
+        users = users.filter(prefix).annotate(rank=prefix_rank)
+
+    return users.only('id', 'username', 'first_name', 'last_name', 'email').order_by('-rank', 'username')[:limit]
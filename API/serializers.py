@@ -1,7 +1,25 @@
 import re
 from rest_framework import serializers
-from .models import User, Project, Task, Comment, Attachment, ActivityLog, Notification
+from .models import User, Project, Task, Comment, Attachment, ActivityLog, Notification, DeletionJob, TaskDependency
 from rest_framework.validators import UniqueValidator
+from .instrumentation import span
+from . import ranking, recurrence
+
+
+# Đo thời gian tạo `.data` (span 'serialize' trong Server-Timing). Với many=True, Meta của serializer
+# khai báo list_serializer_class = TimedListSerializer (hook của DRF)
+class TimedSerializerMixin:
+    @property
+    def data(self):
+        with span('serialize'):
+            return super().data
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with span('serialize'):
+            return super().data
 
 class SignupSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(required=True)
@@ -34,17 +52,19 @@ class SignupSerializer(serializers.ModelSerializer):
             ) 
         return user
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
         
-class UserBasicSerializer(serializers.ModelSerializer):
+class UserBasicSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'username', 'first_name', 'last_name', 'email']
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
     members = UserSerializer(many=True, read_only=True)
     member_ids = serializers.PrimaryKeyRelatedField(
@@ -53,10 +73,13 @@ class ProjectSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Project
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'name', 'description', 'owner', 'members', 'member_ids', 'created_at', 'updated_at']
         read_only_fields = ['owner']
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # Bản DONE do update() lưu khi hoàn thành một lần lặp (view ghi nhật ký cho nó)
+    completed_occurrence = None
     assignee = UserSerializer(read_only=True)
     assignee_id = serializers.PrimaryKeyRelatedField(
         write_only=True, queryset=User.objects.all(), source='assignee', allow_null=True, required=False
@@ -64,15 +87,35 @@ class TaskSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Task
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'title', 'description', 'status', 'priority', 'due_date', 
             'project', 'assignee', 'assignee_id', 
-            'is_personal', 'created_by',
+            'is_personal', 'created_by', 'rank',
+            'recurrence', 'recurrence_interval', 'recurrence_until', 'series', 'is_virtual',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['project', 'is_personal', 'created_by']
+        # rank chỉ đổi qua tasks/<pk>/move/
+        read_only_fields = ['project', 'is_personal', 'created_by', 'rank']
+
+    # Lần lặp (đã xong / đã chạm / ảo) trỏ về task của chuỗi; lần ảo chưa có id
+    series = serializers.PrimaryKeyRelatedField(source='recurrence_parent', read_only=True)
+    is_virtual = serializers.SerializerMethodField()
+
+    def get_is_virtual(self, obj):
+        return getattr(obj, 'is_virtual', False)
 
     def validate(self, data):
+        def value(name):
+            return data[name] if name in data else getattr(self.instance, name, None)
+
+        if value('recurrence'):
+            if value('due_date') is None:
+                raise serializers.ValidationError({'due_date': "Công việc lặp lại phải có ngày hết hạn."})
+            if not 1 <= (value('recurrence_interval') or 1) <= 365:
+                raise serializers.ValidationError({'recurrence_interval': "Khoảng lặp phải từ 1 đến 365."})
+            if value('recurrence_until') is not None and value('recurrence_until') < value('due_date'):
+                raise serializers.ValidationError({'recurrence_until': "Ngày kết thúc lặp phải sau ngày hết hạn."})
         return data
 
     def _send_assignment_notification(self, instance, old_assignee):
@@ -90,42 +133,77 @@ class TaskSerializer(serializers.ModelSerializer):
                 title="Bạn được giao một công việc mới",
                 message=f"Bạn vừa được {user.username} giao công việc '{instance.title}' trong dự án '{project_name}'.",
                 project=instance.project,
-                task=instance
+                task=instance,
+                kind=Notification.Kind.ASSIGNED,
+                actor=user,
             )
 
     def create(self, validated_data):
+        # Task mới nằm cuối cột của nó
+        validated_data['rank'] = ranking.end_of_column(Task(**validated_data))
+        if validated_data.get('recurrence'):
+            validated_data['recurrence_anchor'] = validated_data.get('due_date')
         instance = super().create(validated_data)
         self._send_assignment_notification(instance, None)
         return instance
 
     def update(self, instance, validated_data):
-        old_assignee = instance.assignee
+        # Đổi trạng thái qua PUT / PATCH -> chuyển xuống cuối cột mới
+        new_status = validated_data.get('status', instance.status)
+        if new_status != instance.status:
+            validated_data['rank'] = ranking.end_of_column(instance, new_status)
+        # Đổi quy tắc lặp / hạn -> chuỗi tính lại từ hạn mới
+        if any(name in validated_data and validated_data[name] != getattr(instance, name) for name in ('recurrence', 'recurrence_interval', 'due_date')):
+            validated_data['recurrence_anchor'] = validated_data.get('due_date', instance.due_date)
+        old_assignee, old_status = instance.assignee, instance.status
         updated_instance = super().update(instance, validated_data)
         self._send_assignment_notification(updated_instance, old_assignee)
+        if old_status != Task.Status.DONE:
+            self.completed_occurrence = recurrence.complete(updated_instance)
         return updated_instance
 
-class CommentSerializer(serializers.ModelSerializer):
+# Cạnh phụ thuộc: blocked_by phải xong trước task
+class TaskDependencySerializer(serializers.ModelSerializer):
+    task_title = serializers.CharField(source='task.title', read_only=True)
+    task_status = serializers.CharField(source='task.status', read_only=True)
+    blocked_by_title = serializers.CharField(source='blocked_by.title', read_only=True)
+    blocked_by_status = serializers.CharField(source='blocked_by.status', read_only=True)
+
+    class Meta:
+        model = TaskDependency
+        fields = ['id', 'task', 'task_title', 'task_status', 'blocked_by', 'blocked_by_title', 'blocked_by_status', 'created_by', 'created_at']
+        read_only_fields = fields
+
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
 
     class Meta:
         model = Comment
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'body', 'author', 'task', 'created_at', 'updated_at']
         read_only_fields = ['author', 'task']
 
-class AttachmentSerializer(serializers.ModelSerializer):
+class AttachmentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     uploader = UserSerializer(read_only=True)
 
     class Meta:
         model = Attachment
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'file', 'description', 'uploader', 'task', 'uploaded_at']
         read_only_fields = ['uploader', 'task']
 
-class ActivityLogSerializer(serializers.ModelSerializer):
+class ActivityLogSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     actor = UserSerializer(read_only=True)
+    # Câu mô tả được dựng lúc đọc từ verb + target + changes
+    action_description = serializers.CharField(source='render_description', read_only=True)
 
     class Meta:
         model = ActivityLog
-        fields = ['id', 'action_description', 'actor', 'project', 'task', 'timestamp']
+        list_serializer_class = TimedListSerializer
+        fields = [
+            'id', 'verb', 'target_type', 'target_id', 'changes', 'action_description',
+            'actor', 'project', 'task', 'timestamp'
+        ]
         
 
 # Set Password (cho user Google hoặc các user muốn set password)
@@ -157,14 +235,42 @@ class ResetPasswordSerializer(serializers.Serializer):
 
 
 # Notification Serializer
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     project_name = serializers.CharField(source='project.name', read_only=True, allow_null=True)
     task_title = serializers.CharField(source='task.title', read_only=True, allow_null=True)
+    # Tính từ mốc đã đọc của user (annotate `read`, xem API/notifications.py); thiếu annotate thì dùng cột cũ
+    is_read = serializers.SerializerMethodField()
     
     class Meta:
         model = Notification
-        fields = ['id', 'title', 'message', 'project', 'project_name', 'task', 'task_title', 'is_read', 'created_at']
-        read_only_fields = ['id', 'project_name', 'task_title', 'created_at']
+        list_serializer_class = TimedListSerializer
+        fields = [
+            'id', 'kind', 'title', 'message', 'count', 'actor', 'project', 'project_name', 'task', 'task_title',
+            'is_read', 'created_at'
+        ]
+        read_only_fields = ['id', 'kind', 'count', 'actor', 'project_name', 'task_title', 'created_at']
+
+    def get_is_read(self, obj):
+        return getattr(obj, 'read', obj.is_read)
+
+
+# Cách nhận thông báo bình luận: ngay lập tức hoặc tóm tắt định kỳ
+class NotificationPreferenceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['digest_frequency', 'last_digest_at']
+        read_only_fields = ['last_digest_at']
+
+
+# Tiến độ xóa dự án / task ở nền
+class DeletionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeletionJob
+        fields = [
+            'id', 'kind', 'object_id', 'object_name', 'status', 'phase',
+            'rows_deleted', 'files_deleted', 'error', 'created_at', 'updated_at', 'finished_at'
+        ]
+        read_only_fields = fields
 
 
 # login google
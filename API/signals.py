@@ -0,0 +1,62 @@
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import access, dependencies, sync
+from .models import Attachment, Comment, Notification, Project, ProjectAccess, SyncChange, Task
+
+SYNCED_MODELS = (Task, Comment, Attachment, Notification)
+
+
+# Ghi chuỗi thay đổi cho /sync/ (các thao tác hàng loạt tự gọi sync.record_changes)
+@receiver(post_save)
+def record_sync_upsert(sender, instance, raw=False, **kwargs):
+    if sender in SYNCED_MODELS and not raw:
+        sync.record_change(instance, SyncChange.Op.UPSERT)
+
+
+# Gắn theo từng model: receiver không có sender khiến mọi QuerySet.delete() (SyncChange, ProjectAccess...) phải
+# SELECT các dòng trước rồi mới DELETE thay vì một câu DELETE
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Attachment)
+@receiver(post_delete, sender=Notification)
+def record_sync_delete(sender, instance, **kwargs):
+    sync.record_change(instance, SyncChange.Op.DELETE)
+
+
+# Lưu task thuộc đồ thị phụ thuộc (đổi trạng thái, tên, xóa mềm...) -> tính lại đường găng của nhóm đó
+@receiver(post_save, sender=Task)
+def invalidate_dependency_group(sender, instance, raw=False, **kwargs):
+    if not raw and instance.project_id and 'dependency_group' not in instance.get_deferred_fields():
+        dependencies.invalidate(instance.project_id, instance.dependency_group)
+
+
+# Bảng quyền xem dự án (API/access.py): giữ khớp với owner + members
+@receiver(post_init, sender=Project)
+def remember_project_owner(sender, instance, **kwargs):
+    # Đọc qua __dict__: không nạp owner_id khi trường bị hoãn (.only(...))
+    instance._saved_owner_id = instance.__dict__.get('owner_id')
+
+
+@receiver(post_save, sender=Project)
+def sync_project_owner_access(sender, instance, created, raw=False, **kwargs):
+    if raw or instance.deleted_at is not None:
+        return
+    if created or instance.owner_id != instance._saved_owner_id:
+        access.sync_owner(instance, created=created)
+        instance._saved_owner_id = instance.owner_id
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def sync_member_access(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove'):
+        change = access.grant if action == 'post_add' else access.revoke
+        if reverse:
+            # user.projects.add(...): instance là user, pk_set là các dự án
+            for project_id in pk_set:
+                change(project_id, [instance.pk])
+        else:
+            change(instance.pk, pk_set)
+    elif action == 'post_clear':
+        owner = 'user' if reverse else 'project'
+        ProjectAccess.objects.filter(**{owner: instance}, role=ProjectAccess.Role.MEMBER).delete()
@@ -0,0 +1,224 @@
+"""
+Đồng bộ delta cho client mobile / offline (GET /sync/?since=<token>).
+
+Mỗi thay đổi của Task / Comment / Attachment / Notification được ghi vào SyncChange
+(id tự tăng = change token). Bảng được nén theo đối tượng: mỗi đối tượng chỉ còn dòng
+mới nhất, nên since=0 trả về toàn bộ trạng thái hiện tại và bảng không phình theo số lần sửa.
+
+Client gửi lại token nhận được ở lần trước. Nếu không có gì mới, chỉ tốn một lần dò
+index trên khóa chính (MAX(id)).
+
+id được cấp lúc INSERT chứ không phải lúc commit: transaction nhận id nhỏ nhưng commit muộn sẽ hiện ra
+sau một dòng id lớn hơn đã được đọc. Vì vậy token không bao giờ vượt quá "mốc ổn định" - id lớn nhất trong
+các dòng ghi cách đây hơn SYNC_COMMIT_MARGIN giây (transaction ghi SyncChange phải ngắn hơn khoảng này).
+Các dòng mới hơn mốc được gửi lại ở lần đồng bộ sau; client áp dụng thay đổi theo id nên nhận trùng không sao.
+
+Khi user mất quyền truy cập một dự án (bị xóa khỏi dự án / dự án bị xóa), feed trả về
+tombstone 'projects' để client xóa dữ liệu cục bộ của dự án đó. Khi được thêm lại,
+feed trả về project id trong 'projects' -> client tải lại task của dự án qua TaskListView.
+
+Đánh dấu đã đọc không ghi lại từng thông báo: feed trả về 'read_state' (mốc read_until + id đọc lẻ)
+để client tự tính is_read cho thông báo đã có.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from . import access
+from .models import Attachment, Comment, Notification, SyncChange, Task
+
+Entity = SyncChange.Entity
+Op = SyncChange.Op
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+# Tắt ghi nhận theo từng đối tượng (signal) khi code đã tự ghi hàng loạt bằng record_changes
+_suppressed = ContextVar('sync_suppressed', default=False)
+
+
+@contextmanager
+def suppressed():
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+
+def entity_for(instance):
+    if isinstance(instance, Task):
+        return Entity.TASK
+    if isinstance(instance, Comment):
+        return Entity.COMMENT
+    if isinstance(instance, Attachment):
+        return Entity.ATTACHMENT
+    if isinstance(instance, Notification):
+        return Entity.NOTIFICATION
+    return None
+
+
+def scope_for(instance):
+    """(project_id, user_id) - ai được nhận thay đổi của đối tượng này."""
+    if isinstance(instance, Notification):
+        return None, instance.recipient_id
+    task = instance if isinstance(instance, Task) else instance.task
+    if task.is_personal or task.project_id is None:
+        return None, task.created_by_id
+    return task.project_id, None
+
+
+def record_change(instance, op):
+    if _suppressed.get():
+        return
+    entity = entity_for(instance)
+    if entity is None:
+        return
+    project_id, user_id = scope_for(instance)
+    record_changes(entity, [instance.pk], op, project_id=project_id, user_id=user_id)
+
+
+def record_changes(entity, object_ids, op, project_id=None, user_id=None):
+    """
+    Ghi hàng loạt: xóa dòng cũ của các đối tượng rồi chèn dòng mới (id mới > mọi token đã phát).
+    Các hàm ghi /sync/ chạy chung giao dịch với thay đổi gốc, không mở savepoint riêng (lỗi thì rollback cả hai).
+    """
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    stale = SyncChange.objects.filter(entity=entity, object_id__in=object_ids)
+    if entity == Entity.PROJECT:
+        # Tombstone dự án được ghi riêng cho từng user
+        stale = stale.filter(user_id=user_id)
+    with transaction.atomic(savepoint=False):
+        stale.delete()
+        SyncChange.objects.bulk_create([
+            SyncChange(entity=entity, object_id=object_id, op=op, project_id=project_id, user_id=user_id)
+            for object_id in object_ids
+        ])
+
+
+def record_project_access(project_id, user_ids, op):
+    """Báo cho các user rằng họ vừa mất (DELETE) / có lại (UPSERT) quyền truy cập dự án (2 query cho mọi user)."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    with transaction.atomic(savepoint=False):
+        SyncChange.objects.filter(entity=Entity.PROJECT, object_id=project_id, user_id__in=user_ids).delete()
+        SyncChange.objects.bulk_create([
+            SyncChange(entity=Entity.PROJECT, object_id=project_id, op=op, user_id=user_id)
+            for user_id in user_ids
+        ])
+
+
+def record_user_changes(entity, changes, op):
+    """Như record_changes cho đối tượng thuộc nhiều user khác nhau (vd: thông báo tạo hàng loạt): changes = [(object_id, user_id)]."""
+    changes = list(changes)
+    if not changes:
+        return
+    with transaction.atomic(savepoint=False):
+        SyncChange.objects.filter(entity=entity, object_id__in=[object_id for object_id, _user_id in changes]).delete()
+        SyncChange.objects.bulk_create([
+            SyncChange(entity=entity, object_id=object_id, op=op, user_id=user_id)
+            for object_id, user_id in changes
+        ])
+
+
+def latest_token():
+    return SyncChange.objects.aggregate(latest=Max('id'))['latest'] or 0
+
+
+def stable_token(now=None):
+    """
+    Mốc ổn định: id lớn nhất trong các dòng ghi trước SYNC_COMMIT_MARGIN giây. Dòng chưa commit (luôn ghi sau
+    thời điểm đó) có id lớn hơn mốc nên không bị bỏ qua. Dò ngược khóa chính, chỉ đi qua các dòng mới.
+    """
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.SYNC_COMMIT_MARGIN)
+    return SyncChange.objects.filter(created_at__lte=cutoff).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def parse_token(value):
+    if value in (None, ''):
+        return 0
+    token = int(value)
+    if token < 0:
+        raise ValueError(value)
+    return token
+
+
+def build_feed(user, since, limit=DEFAULT_LIMIT):
+    """Trả về dict: token mới, has_more, các đối tượng đã đổi và id các đối tượng đã xóa."""
+    from .notifications import read_state, with_read_state
+    from .serializers import AttachmentSerializer, CommentSerializer, NotificationSerializer, TaskSerializer
+
+    limit = max(1, min(limit, MAX_LIMIT))
+    feed = {
+        'token': str(since),
+        'has_more': False,
+        'projects': [],
+        'tasks': [],
+        'comments': [],
+        'attachments': [],
+        'notifications': [],
+        'read_state': None,
+        'deleted': {'projects': [], 'tasks': [], 'comments': [], 'attachments': [], 'notifications': []},
+    }
+    # Đường nhanh: không có thay đổi nào mới trên toàn hệ thống -> 1 lần dò index
+    head = latest_token()
+    if head <= since:
+        return feed
+
+    project_ids = access.project_ids(user)
+    changes = list(
+        SyncChange.objects.filter(id__gt=since, id__lte=head)
+        .filter(Q(project_id__in=project_ids) | Q(user_id=user.pk))
+        .order_by('id')[:limit + 1]
+    )
+    if len(changes) > limit:
+        changes = changes[:limit]
+        feed['has_more'] = True
+    # Không có gì liên quan đến user -> nhảy token tới đầu chuỗi để lần sau lại đi đường nhanh;
+    # đã đọc hết đến head thì trả head (bỏ qua các thay đổi không liên quan phía sau). Cả hai không vượt mốc ổn định.
+    reached = changes[-1].id if feed['has_more'] else head
+    token = max(since, min(reached, stable_token()))
+    feed['token'] = str(token)
+    if feed['has_more'] and token == since:
+        # Cả trang còn trong khoảng chưa ổn định: dừng phân trang, lần đồng bộ sau đọc tiếp từ since
+        feed['has_more'] = False
+    if not changes:
+        return feed
+
+    upserts = {entity: [] for entity in Entity.values}
+    for change in changes:
+        key = f'{change.entity}s'
+        if change.op == Op.DELETE:
+            feed['deleted'][key].append(change.object_id)
+        else:
+            upserts[change.entity].append(change.object_id)
+
+    feed['projects'] = upserts[Entity.PROJECT]
+    notifications = Notification.objects.select_related('project', 'task')
+    if upserts[Entity.NOTIFICATION] or upserts[Entity.READ_STATE]:
+        state = read_state(user)
+        notifications = with_read_state(notifications, state)
+        if upserts[Entity.READ_STATE]:
+            feed['read_state'] = {
+                'read_until': state.read_until if state else None,
+                'read_ids': state.read_ids if state else [],
+            }
+    sources = (
+        (Entity.TASK, Task.objects.select_related('assignee'), TaskSerializer),
+        (Entity.COMMENT, Comment.objects.select_related('author'), CommentSerializer),
+        (Entity.ATTACHMENT, Attachment.objects.select_related('uploader'), AttachmentSerializer),
+        (Entity.NOTIFICATION, notifications, NotificationSerializer),
+    )
+    for entity, queryset, serializer_class in sources:
+        if upserts[entity]:
+            objects = queryset.filter(pk__in=upserts[entity]).order_by('pk')
+            feed[f'{entity}s'] = serializer_class(objects, many=True).data
+    return feed
@@ -1,3 +1,1842 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from unittest import mock, skipUnless
+
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import access, analytics, async_views, benchmark, db_router, dependencies, hashing, instrumentation, metrics, notifications, outbox, purge, ranking, recurrence, reminders, sync, throttling, urls as api_urls, views
+from .instrumentation import QueryBudgetExceeded, query_budget_for
+from .models import ActivityLog, Attachment, Comment, DeletionJob, Notification, OutboundEmail, PasswordResetToken, Project, ProjectAccess, ProjectDailyStat, SyncChange, Task, TaskCycleStat, TaskReminder, User
+from .serializers import TaskSerializer, TimedListSerializer, TimedSerializerMixin
+from .views import TaskListView, create_activity_log, diff_task, snapshot_task
+
+# Hai kích thước dữ liệu: số query ở lần đo sau phải bằng lần đầu (không tăng theo số dòng)
+SIZES = (1, 10)
+
+# Endpoint không kiểm tra được trong test (lý do)
+EXEMPT = {
+    'google-login': "Cần xác thực id_token với Google.",
+}
+
+
+# (url name, method, kwargs, data, user gửi request, format, bearer token thay cho JWT của user)
+# kwargs / data / user / token là hàm nhận test case, được gọi TRƯỚC khi đếm query -> có thể tạo dữ liệu mới cho mỗi lần đo
+def case(url_name, method, kwargs=None, data=None, user=None, fmt='json', token=None):
+    return {
+        'url_name': url_name,
+        'method': method,
+        'kwargs': kwargs or (lambda t: {}),
+        'data': data or (lambda t: None),
+        'user': user or (lambda t: t.owner),
+        'format': fmt,
+        'token': token,
+    }
+
+
+CASES = [
+    # Xác thực
+    case('signup', 'post', data=lambda t: {
+        'username': t.unique('new'), 'email': f"{t.unique('new')}@example.com", 'password': 'matkhau123',
+        'confirm_password': 'matkhau123', 'first_name': 'Mới', 'last_name': 'User',
+    }, user=lambda t: None),
+    case('login', 'post', data=lambda t: {'username': 'owner', 'password': 'matkhau123'}, user=lambda t: None),
+    case('set-password', 'post', data=lambda t: {'new_password': 'matkhau456', 'confirm_password': 'matkhau456'},
+         user=lambda t: t.google_user()),
+    case('forgot-password', 'post', data=lambda t: t.pending_reset(), user=lambda t: None),
+    case('reset-password', 'post', data=lambda t: {
+        'token': str(PasswordResetToken.objects.create(user=t.owner, expires_at=timezone.now() + timedelta(hours=1)).token),
+        'new_password': 'matkhau789', 'confirm_password': 'matkhau789',
+    }, user=lambda t: None),
+    case('token_refresh', 'post', data=lambda t: {'refresh': str(RefreshToken.for_user(t.owner))}, user=lambda t: None),
+    # User
+    case('user-list', 'get'),
+    case('user-suggest', 'get', data=lambda t: {'q': 'mem', 'project': t.project.pk}, user=lambda t: t.member),
+    case('user-detail', 'get', kwargs=lambda t: {'pk': t.member.pk}),
+    # Dự án
+    case('project-list', 'get'),
+    case('project-list', 'post', data=lambda t: {'name': 'Dự án mới', 'member_ids': [t.member.pk]}),
+    case('project-detail', 'get', kwargs=lambda t: {'pk': t.project.pk}, user=lambda t: t.member),
+    case('project-detail', 'put', kwargs=lambda t: {'pk': t.project.pk}, data=lambda t: {'name': 'Đổi tên', 'description': 'Mô tả'}),
+    case('project-detail', 'patch', kwargs=lambda t: {'pk': t.project.pk}, data=lambda t: {'description': 'Mô tả mới'}),
+    case('project-detail', 'delete', kwargs=lambda t: {'pk': t.fresh_project().pk}),
+    case('project-add-member', 'post', kwargs=lambda t: {'pk': t.project.pk}, data=lambda t: {'user_id': t.fresh_user().pk}),
+    case('project-remove-member', 'post', kwargs=lambda t: {'pk': t.project.pk}, data=lambda t: {'user_id': t.fresh_member().pk}),
+    case('project-members', 'patch', kwargs=lambda t: {'pk': t.project.pk},
+         data=lambda t: {'add': [t.fresh_user().pk, t.fresh_user().pk], 'remove': [t.fresh_member().pk]}),
+    case('project-members', 'put', kwargs=lambda t: {'pk': t.fresh_project().pk},
+         data=lambda t: {'member_ids': [t.fresh_user().pk, t.fresh_user().pk]}),
+    # Task
+    case('project-task-list', 'get', kwargs=lambda t: {'pk': t.project.pk}, user=lambda t: t.member),
+    case('project-board', 'get', kwargs=lambda t: {'pk': t.project.pk}, data=lambda t: {'limit': 5}, user=lambda t: t.member),
+    case('project-dependencies', 'get', kwargs=lambda t: {'pk': t.project.pk}, user=lambda t: t.member),
+    case('project-task-list', 'post', kwargs=lambda t: {'pk': t.project.pk}, data=lambda t: {'title': 'Task mới', 'assignee_id': t.member.pk},
+         user=lambda t: t.member),
+    case('personal-task-list', 'get'),
+    case('personal-task-list', 'get', data=lambda t: {'due_date_before': (timezone.localdate() + timedelta(days=7)).isoformat()}),
+    case('personal-task-list', 'post', data=lambda t: {'title': 'Việc cá nhân'}),
+    case('my-work', 'get', data=lambda t: {'ordering': 'priority', 'limit': 5}, user=lambda t: t.member),
+    case('task-detail', 'get', kwargs=lambda t: {'pk': t.task.pk}, user=lambda t: t.member),
+    case('task-detail', 'put', kwargs=lambda t: {'pk': t.task.pk}, data=lambda t: {'title': 'Sửa', 'status': 'INPR'}, user=lambda t: t.member),
+    case('task-detail', 'patch', kwargs=lambda t: {'pk': t.task.pk}, data=lambda t: {'status': 'DONE', 'assignee_id': t.owner.pk},
+         user=lambda t: t.member),
+    case('task-detail', 'delete', kwargs=lambda t: {'pk': t.fresh_task().pk}),
+    case('task-move', 'post', kwargs=lambda t: {'pk': t.fresh_task().pk},
+         data=lambda t: {'status': 'INPR', 'before_id': t.fresh_task_in('INPR').pk, 'after_id': t.fresh_task_in('INPR').pk},
+         user=lambda t: t.member),
+    # Kéo task lặp lại vào DONE: lưu bản đã xong + chuỗi sang lần kế tiếp
+    case('task-move', 'post', kwargs=lambda t: {'pk': t.fresh_series().pk}, data=lambda t: {'status': 'DONE'}),
+    case('task-move', 'post', kwargs=lambda t: {'pk': t.fresh_project_series().pk}, data=lambda t: {'status': 'DONE'},
+         user=lambda t: t.member),
+    case('task-occurrences', 'post', kwargs=lambda t: {'pk': t.fresh_series().pk},
+         data=lambda t: {'due_date': recurrence.occurrence(t.series, 2).isoformat()}),
+    case('task-dependency-list', 'get', kwargs=lambda t: {'pk': t.task.pk}, user=lambda t: t.member),
+    case('task-dependency-list', 'post', kwargs=lambda t: {'pk': t.task.pk}, data=lambda t: {'blocked_by_id': t.fresh_task().pk},
+         user=lambda t: t.member),
+    case('task-dependency-detail', 'delete', kwargs=lambda t: {'pk': t.task.pk, 'blocked_by_pk': t.fresh_dependency().blocked_by_id},
+         user=lambda t: t.member),
+    # Bình luận / tệp đính kèm
+    case('task-comment-list', 'get', kwargs=lambda t: {'task_pk': t.task.pk}, user=lambda t: t.member),
+    case('task-comment-list', 'post', kwargs=lambda t: {'task_pk': t.task.pk}, data=lambda t: t.comment_notification() and {'body': 'Bình luận'}, user=lambda t: t.member),
+    case('task-comment-detail', 'get', kwargs=lambda t: {'task_pk': t.task.pk, 'pk': t.comment.pk}, user=lambda t: t.member),
+    case('task-comment-detail', 'put', kwargs=lambda t: {'task_pk': t.task.pk, 'pk': t.comment.pk}, data=lambda t: {'body': 'Đã sửa'},
+         user=lambda t: t.member),
+    case('task-comment-detail', 'delete', kwargs=lambda t: {'task_pk': t.task.pk, 'pk': t.fresh_comment().pk}, user=lambda t: t.member),
+    case('task-attachment-list', 'get', kwargs=lambda t: {'task_pk': t.task.pk}, user=lambda t: t.member),
+    case('task-attachment-list', 'post', kwargs=lambda t: {'task_pk': t.task.pk},
+         data=lambda t: {'file': SimpleUploadedFile('ghi-chu.txt', b'noi dung'), 'description': 'Tệp'}, user=lambda t: t.member, fmt='multipart'),
+    case('task-attachment-detail', 'get', kwargs=lambda t: {'task_pk': t.task.pk, 'pk': t.attachment.pk}, user=lambda t: t.member),
+    case('task-attachment-detail', 'delete', kwargs=lambda t: {'task_pk': t.task.pk, 'pk': t.fresh_attachment().pk}, user=lambda t: t.member),
+    # Nhật ký / analytics
+    case('project-activity-log', 'get', kwargs=lambda t: {'pk': t.project.pk}, user=lambda t: t.member),
+    case('task-activity-log', 'get', kwargs=lambda t: {'task_pk': t.task.pk}, user=lambda t: t.member),
+    case('project-analytics-burndown', 'get', kwargs=lambda t: {'pk': t.project.pk}, user=lambda t: t.member),
+    case('project-analytics-throughput', 'get', kwargs=lambda t: {'pk': t.project.pk}, user=lambda t: t.member),
+    case('project-analytics-cycle-time', 'get', kwargs=lambda t: {'pk': t.project.pk}, user=lambda t: t.member),
+    # Thông báo / sync / metrics
+    case('notification-list', 'get'),
+    case('notification-mark-read', 'post', kwargs=lambda t: {'pk': t.fresh_notification().pk}, data=lambda t: t.read_all_notifications()),
+    case('notification-mark-all-read', 'post', data=lambda t: t.read_all_notifications()),
+    case('notification-preferences', 'get'),
+    case('notification-preferences', 'put', data=lambda t: {'digest_frequency': 'off'}),
+    case('deletion-job-detail', 'get', kwargs=lambda t: {'pk': DeletionJob.objects.create(
+        kind=DeletionJob.Kind.PROJECT, object_id=t.project.pk, requested_by=t.owner).pk}),
+    case('sync', 'get'),
+    case('metrics', 'get', user=lambda t: None, token=lambda t: t.metrics_token),
+]
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Mỗi endpoint trong API/urls.py: số query không vượt `query_budget` khai báo trên view
+    và không tăng khi dữ liệu (thành viên, task, bình luận, thông báo...) tăng lên.
+    """
+    metrics_token = 'scrape-token'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'matkhau123')
+        cls.member = User.objects.create_user('member', 'member@example.com', 'matkhau123')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner, cls.member)
+        cls.task = Task.objects.create(title='Task', project=cls.project, created_by=cls.owner)
+        cls.comment = Comment.objects.create(task=cls.task, author=cls.member, body='Bình luận đầu')
+        cls.attachment = Attachment.objects.create(task=cls.task, uploader=cls.member, file='attachments/a.txt')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(MEDIA_ROOT=cls.media_root, METRICS_TOKEN=cls.metrics_token)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.counter = 0
+
+    # SECTION: Dữ liệu
+    def unique(self, prefix):
+        self.counter += 1
+        return f'{prefix}{self.counter}'
+
+    def fresh_user(self):
+        return User.objects.create(username=self.unique('user'), email=f"{self.unique('user')}@example.com")
+
+    def fresh_member(self):
+        user = self.fresh_user()
+        self.project.members.add(user)
+        return user
+
+    def google_user(self):
+        user = self.fresh_user()
+        user.set_unusable_password()
+        user.save()
+        return user
+
+    def pending_reset(self):
+        """Trạng thái thường gặp: user đã có một token reset chưa dùng (sẽ bị thay bằng token mới)."""
+        PasswordResetToken.objects.create(user=self.owner, expires_at=timezone.now() + timedelta(hours=1))
+        return {'email': self.owner.email}
+
+    def fresh_project(self):
+        project = Project.objects.create(name=self.unique('Dự án '), owner=self.owner)
+        project.members.add(self.owner, self.member)
+        return project
+
+    def fresh_task(self):
+        return Task.objects.create(title=self.unique('Task '), project=self.project, created_by=self.owner, assignee=self.member)
+
+    def fresh_task_in(self, status):
+        """Task mới ở cuối cột `status` của dự án đang đo."""
+        task = Task(title=self.unique('Task '), project=self.project, created_by=self.owner, status=status)
+        task.rank = ranking.end_of_column(task)
+        task.save()
+        return task
+
+    def fresh_series(self):
+        """Việc cá nhân lặp lại hằng ngày, lần kế tiếp vào ngày mai."""
+        due = timezone.now() + timedelta(days=1)
+        self.series = Task.objects.create(
+            title=self.unique('Việc lặp '), is_personal=True, created_by=self.owner, assignee=self.owner,
+            due_date=due, recurrence=Task.Recurrence.DAILY, recurrence_anchor=due,
+        )
+        return self.series
+
+    def fresh_project_series(self):
+        """Task lặp lại hằng ngày trong dự án (hoàn thành nó còn ghi nhật ký và rollup)."""
+        due = timezone.now() + timedelta(days=1)
+        task = Task(
+            title=self.unique('Họp '), project=self.project, created_by=self.owner, assignee=self.member,
+            due_date=due, recurrence=Task.Recurrence.DAILY, recurrence_anchor=due,
+        )
+        task.rank = ranking.end_of_column(task)
+        task.save()
+        return task
+
+    def fresh_dependency(self):
+        dependency, _created = dependencies.add_dependency(self.task, self.fresh_task())
+        return dependency
+
+    def fresh_comment(self):
+        return Comment.objects.create(task=self.task, author=self.member, body=self.unique('Bình luận '))
+
+    def fresh_attachment(self):
+        return Attachment.objects.create(task=self.task, uploader=self.member, file=f"attachments/{self.unique('tep')}.txt")
+
+    def fresh_notification(self):
+        return Notification.objects.create(recipient=self.owner, title='Thông báo', message='...', project=self.project, task=self.task)
+
+    def comment_notification(self):
+        """Thông báo bình luận chưa đọc của task -> bình luận mới luôn đi đường gộp (đo ổn định giữa các lần)."""
+        return Notification.objects.create(
+            recipient=self.owner, kind=Notification.Kind.COMMENT, title='Bình luận mới', message='...', project=self.project, task=self.task,
+        )
+
+    def read_all_notifications(self):
+        """Đã có mốc đã đọc (và dòng /sync/ của nó) -> đo đường cập nhật như lần đánh dấu thứ hai trở đi."""
+        notifications.mark_all_read(self.owner, now=timezone.now() - timedelta(minutes=1))
+        return {}
+
+    def grow(self, size):
+        """Thêm `size` bản ghi mỗi loại quanh dự án / task / user đang được đo."""
+        for _ in range(size):
+            other = self.fresh_member()
+            project = self.fresh_project()
+            project.members.add(other)
+            task = Task.objects.create(title=self.unique('Task '), project=self.project, created_by=other, assignee=other)
+            dependencies.add_dependency(task, self.task)
+            Task.objects.create(title=self.unique('Việc '), is_personal=True, created_by=self.owner, assignee=self.owner)
+            self.fresh_series()
+            Comment.objects.create(task=self.task, author=other, body='...')
+            Attachment.objects.create(task=self.task, uploader=other, file=f"attachments/{self.unique('tep')}.txt")
+            self.fresh_notification()
+            Notification.objects.create(recipient=self.owner, title='Thông báo', message='...', project=project, task=task)
+            ActivityLog.objects.create(
+                actor=other, verb=ActivityLog.Verb.TASK_UPDATED, target_type=ActivityLog.TargetType.TASK,
+                target_id=self.task.pk, target_name=self.task.title, changes={'status': ['TODO', 'INPR']},
+                project=self.project, task=self.task,
+            )
+
+    # SECTION: Đo
+    def measure(self, spec):
+        client = APIClient()
+        user = spec['user'](self)
+        if spec['token'] is not None:
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {spec['token'](self)}")
+        elif user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        url = reverse(spec['url_name'], kwargs=spec['kwargs'](self))
+        data = spec['data'](self)
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, spec['method'])(url, data, format=spec['format'])
+        self.assertLess(response.status_code, 400, response.content[:500])
+        return url, len(queries)
+
+    def test_endpoint_query_budgets(self):
+        for spec in CASES:
+            label = f"{spec['method'].upper()} {spec['url_name']}"
+            with self.subTest(label):
+                savepoint = transaction.savepoint()
+                try:
+                    counts = []
+                    for size in SIZES:
+                        self.grow(size)
+                        url, count = self.measure(spec)
+                        counts.append(count)
+                    view_class = resolve(url).func.view_class
+                    budget = query_budget_for(view_class, spec['method'].upper())
+                    self.assertIsNotNone(budget, f"{view_class.__name__} chưa khai báo query_budget cho {label} ({counts} query)")
+                    self.assertLessEqual(max(counts), budget, f"{label}: {counts} query, ngân sách {budget}")
+                    # Lần đầu có thể tốn thêm (vd: tạo dòng rollup đầu tiên trong ngày), nhưng không được tăng
+                    self.assertLessEqual(counts[-1], counts[0], f"{label}: số query tăng theo dữ liệu {counts}")
+                finally:
+                    transaction.savepoint_rollback(savepoint)
+
+    def test_every_endpoint_has_a_case(self):
+        names = {pattern.name for pattern in api_urls.urlpatterns}
+        covered = {spec['url_name'] for spec in CASES} | set(EXEMPT)
+        self.assertEqual(names - covered, set())
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_middleware_raises_when_budget_exceeded(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.member).access_token}')
+        url = reverse('project-task-list', kwargs={'pk': self.project.pk})
+        self.assertEqual(client.get(url).status_code, 200)
+
+        original = TaskListView.query_budget
+        TaskListView.query_budget = 1
+        try:
+            with self.assertRaises(QueryBudgetExceeded):
+                APIClient(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.member).access_token}').get(url)
+        finally:
+            TaskListView.query_budget = original
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    """Định tuyến đọc: replica cho GET, primary khi user vừa ghi / request có ghi / replica hỏng."""
+
+    def setUp(self):
+        self.router = db_router.ReplicaRouter()
+        self.user = User(pk=42, username='reader')
+        self.header = f'Bearer {AccessToken.for_user(self.user)}'
+        healthy = mock.patch.object(db_router.health, 'healthy', return_value=['replica_1'])
+        healthy.start()
+        self.addCleanup(healthy.stop)
+        self.addCleanup(db_router.cache.clear)
+
+    def route(self, method='get', writes=False):
+        request = getattr(RequestFactory(), method)('/projects/', HTTP_AUTHORIZATION=self.header)
+        token = db_router._state.set(db_router.RoutingState(request))
+        try:
+            first = self.router.db_for_read(Project)
+            if writes:
+                self.router.db_for_write(Project)
+            return first, self.router.db_for_read(Project)
+        finally:
+            db_router._state.reset(token)
+
+    def test_safe_request_reads_from_replica(self):
+        self.assertEqual(self.route(), ('replica_1', 'replica_1'))
+
+    def test_unsafe_request_reads_from_primary(self):
+        self.assertEqual(self.route('post'), ('default', 'default'))
+
+    def test_reads_after_write_in_request_use_primary(self):
+        self.assertEqual(self.route(writes=True), ('replica_1', 'default'))
+
+    def test_pinned_user_reads_from_primary(self):
+        db_router.pin_user(self.user.pk)
+        self.assertEqual(self.route(), ('default', 'default'))
+
+    def test_no_healthy_replica_falls_back_to_primary(self):
+        db_router.health.healthy.return_value = []
+        self.assertEqual(self.route(), ('default', 'default'))
+
+    def test_outside_request_uses_primary(self):
+        self.assertEqual(self.router.db_for_read(Project), 'default')
+
+
+class AsyncViewTests(TestCase):
+    """View async (ASGI) trả về đúng như view đồng bộ, áp dụng cùng quyền và cùng query_budget."""
+
+    VIEWS = [
+        (async_views.AsyncTaskListView, 'project'),
+        (async_views.AsyncPersonalTaskListView, None),
+        (async_views.AsyncTaskDetailView, 'task'),
+        (async_views.AsyncActivityLogProjectView, 'project'),
+        (async_views.AsyncActivityLogTaskView, 'task_pk'),
+        (async_views.AsyncNotificationListView, None),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'matkhau123')
+        cls.member = User.objects.create_user('member', 'member@example.com', 'matkhau123')
+        cls.outsider = User.objects.create_user('outsider', 'outsider@example.com', 'matkhau123')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner, cls.member)
+        cls.task = Task.objects.create(title='Task', project=cls.project, created_by=cls.owner)
+        Task.objects.create(title='Việc riêng', is_personal=True, created_by=cls.member)
+        ActivityLog.objects.create(
+            actor=cls.owner, verb=ActivityLog.Verb.TASK_UPDATED, target_type=ActivityLog.TargetType.TASK,
+            target_id=cls.task.pk, target_name=cls.task.title, changes={}, project=cls.project, task=cls.task,
+        )
+        Notification.objects.create(recipient=cls.member, title='Thông báo', message='...', project=cls.project, task=cls.task)
+
+    def kwargs_for(self, key):
+        return {
+            'project': {'pk': self.project.pk},
+            'task': {'pk': self.task.pk},
+            'task_pk': {'task_pk': self.task.pk},
+        }.get(key, {})
+
+    def header(self, user):
+        return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    async def test_async_views_match_sync_views(self):
+        # CaptureQueriesContext không dùng được trong async -> đếm bằng execute_wrapper của instrumentation
+        await sync_to_async(instrumentation.install_db_instrumentation)()
+        factory = AsyncRequestFactory()
+        for view_class, key in self.VIEWS:
+            with self.subTest(view_class.__name__):
+                kwargs = self.kwargs_for(key)
+                with instrumentation.collecting() as request_metrics:
+                    response = await view_class.as_view()(factory.get('/', headers=self.header(self.member)), **kwargs)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(0 < request_metrics.db_queries <= query_budget_for(view_class, 'GET'), request_metrics.db_queries)
+
+                sync_class = next(base for base in view_class.__mro__[1:] if base.__module__ == views.__name__)
+                expected = await sync_to_async(
+                    lambda: sync_class.as_view()(RequestFactory().get('/', headers=self.header(self.member)), **kwargs)
+                )()
+                self.assertEqual(response.data, expected.data)
+
+    async def test_async_views_enforce_permissions(self):
+        factory = AsyncRequestFactory()
+        task_detail = async_views.AsyncTaskDetailView.as_view()
+        response = await task_detail(factory.get('/'), pk=self.task.pk)
+        self.assertEqual(response.status_code, 401)
+        response = await task_detail(factory.get('/', headers=self.header(self.outsider)), pk=self.task.pk)
+        self.assertEqual(response.status_code, 403)
+        response = await async_views.AsyncActivityLogProjectView.as_view()(
+            factory.get('/', headers=self.header(self.outsider)), pk=self.project.pk,
+        )
+        self.assertEqual(response.status_code, 403)
+
+    async def test_async_view_delegates_writes_to_sync_view(self):
+        request = AsyncRequestFactory().patch(
+            '/', data={'title': 'Đổi tên'}, content_type='application/json', headers=self.header(self.member),
+        )
+        response = await async_views.AsyncTaskDetailView.as_view()(request, pk=self.task.pk)
+        self.assertEqual(response.status_code, 200)
+        await self.task.arefresh_from_db()
+        self.assertEqual(self.task.title, 'Đổi tên')
+
+
+class PasswordHashPoolTests(APITestCase):
+    """Băm mật khẩu qua process pool: tương thích hash PBKDF2 của Django, pool đầy -> 503 ngay."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', 'owner@example.com', 'matkhau123')
+
+    def test_pooled_hash_matches_django_pbkdf2(self):
+        pooled = hashing.PooledPBKDF2PasswordHasher()
+        encoded = pooled.encode('matkhau123', 'muoi', iterations=1000)
+        self.assertEqual(encoded, PBKDF2PasswordHasher().encode('matkhau123', 'muoi', iterations=1000))
+        self.assertTrue(pooled.verify('matkhau123', encoded))
+        self.assertFalse(pooled.verify('sai-mat-khau', encoded))
+
+    @override_settings(HASH_POOL_WORKERS=1, HASH_POOL_MAX_QUEUE=0)
+    def test_login_rejected_when_pool_saturated(self):
+        pool = hashing.HashPool()
+        self.addCleanup(lambda: pool.executor and pool.executor.shutdown())
+        with mock.patch.object(hashing, 'pool', pool):
+            _executor, slots = pool.get_executor()
+            slots.acquire()
+            response = self.client.post(reverse('login'), {'username': 'owner', 'password': 'matkhau123'}, format='json')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], '1')
+
+            slots.release()
+            response = self.client.post(reverse('login'), {'username': 'owner', 'password': 'matkhau123'}, format='json')
+            self.assertEqual(response.status_code, 200)
+
+
+class RateLimitTests(APITestCase):
+    """Token bucket theo scope (429 + Retry-After) và cắt tải theo mức ưu tiên (503 + Retry-After)."""
+
+    def setUp(self):
+        db_router.cache.clear()
+        self.addCleanup(db_router.cache.clear)
+
+    @override_settings(RATE_LIMITS={'login': '2/min'})
+    def test_login_bucket_exhausted(self):
+        url = reverse('login')
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {'username': 'ai', 'password': 'sai'}, format='json').status_code, 401)
+        response = self.client.post(url, {'username': 'ai', 'password': 'sai'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response['Retry-After']) <= 30)
+
+    @override_settings(RATE_LIMITS={'list': '1/min'})
+    def test_buckets_are_per_user_and_method(self):
+        user, other = User.objects.create_user('mot'), User.objects.create_user('hai')
+        url = reverse('project-list')
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 429)
+        # POST không thuộc scope 'list'
+        self.assertEqual(self.client.post(url, {'name': 'Dự án'}, format='json').status_code, 201)
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(LOAD_SHED_MAX_IN_FLIGHT=4, LOAD_SHED_LATENCY_TARGET_MS=0)
+    def test_load_shedding_by_priority(self):
+        middleware = throttling.LoadSheddingMiddleware(lambda request: None)
+        request = RequestFactory().get('/')
+        views_by_priority = {
+            'low': views.UserListView, 'normal': views.TaskDetailView, 'critical': views.MetricsView,
+        }
+
+        def shed(in_flight):
+            with mock.patch.object(throttling.state, 'in_flight', in_flight):
+                return {
+                    priority: middleware.process_view(request, view_class.as_view(), (), {}) is not None
+                    for priority, view_class in views_by_priority.items()
+                }
+
+        self.assertEqual(shed(1), {'low': False, 'normal': False, 'critical': False})
+        self.assertEqual(shed(4), {'low': True, 'normal': False, 'critical': False})
+        self.assertEqual(shed(10), {'low': True, 'normal': True, 'critical': False})
+        with mock.patch.object(throttling.state, 'in_flight', 4):
+            response = middleware.process_view(request, views.UserListView.as_view(), (), {})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+
+class UserSuggestTests(APITestCase):
+    """Gợi ý user: khớp tiền tố trên username / email / họ tên, xếp hạng, giới hạn số lượng, lọc theo dự án."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', first_name='Chủ', last_name='Dự Án')
+        cls.nguyen = User.objects.create_user('nguyenvan', 'van@example.com', first_name='Văn', last_name='Nguyễn')
+        cls.ngoc = User.objects.create_user('ngoc', 'nguyen.ngoc@example.com', first_name='Ngọc', last_name='Trần')
+        cls.hoa = User.objects.create_user('hoa', 'hoa@example.com', first_name='Nguyên', last_name='Hoa')
+        cls.inactive = User.objects.create_user('nguyenx', 'x@example.com', is_active=False)
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.nguyen)
+
+    def setUp(self):
+        self.client.force_authenticate(self.owner)
+
+    def suggest(self, **params):
+        response = self.client.get(reverse('user-suggest'), params)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return [user['username'] for user in response.json()]
+
+    def test_prefix_matches_username_email_and_full_name(self):
+        self.assertEqual(self.suggest(q='Nguy'), ['hoa', 'ngoc', 'nguyenvan'])
+        self.assertEqual(self.suggest(q='nguyê'), ['hoa'])
+        self.assertEqual(self.suggest(q='van@'), ['nguyenvan'])
+        self.assertEqual(self.suggest(q='  '), [])
+
+    def test_limit_and_project_filter(self):
+        self.assertEqual(self.suggest(q='n', limit=1), ['hoa'])
+        self.assertEqual(self.suggest(q='n', project=self.project.pk), ['nguyenvan'])
+        self.assertEqual(self.suggest(q='o', project=self.project.pk), ['owner'])
+
+    def test_project_filter_requires_membership(self):
+        self.client.force_authenticate(self.hoa)
+        response = self.client.get(reverse('user-suggest'), {'q': 'n', 'project': self.project.pk})
+        self.assertEqual(response.status_code, 403)
+
+    @skipUnless(connection.vendor == 'postgresql', "Khớp gần đúng cần pg_trgm")
+    def test_fuzzy_match_ranks_prefix_first(self):
+        self.assertEqual(self.suggest(q='nguyenvn'), ['nguyenvan'])
+        self.assertEqual(self.suggest(q='ngoc')[0], 'ngoc')
+
+
+class ProjectMembersBulkTests(APITestCase):
+    """Thêm / xóa thành viên hàng loạt: đúng diff, giữ chủ dự án, số query không tăng theo số người."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.project = Project.objects.create(name='Dự án', owner=cls.owner)
+        cls.project.members.add(cls.owner)
+        cls.users = [User.objects.create_user(f'user{index}') for index in range(30)]
+
+    def setUp(self):
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('project-members', kwargs={'pk': self.project.pk})
+
+    def member_ids(self):
+        return set(self.project.members.values_list('id', flat=True))
+
+    def test_put_replaces_member_set_and_keeps_owner(self):
+        self.project.members.add(*self.users[:5])
+        desired = [user.pk for user in self.users[3:8]]
+        response = self.client.put(self.url, {'member_ids': desired}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data['added']), desired[2:])
+        self.assertEqual(sorted(response.data['removed']), [user.pk for user in self.users[:3]])
+        self.assertEqual(self.member_ids(), set(desired) | {self.owner.pk})
+        self.assertEqual(ActivityLog.objects.filter(project=self.project, verb=ActivityLog.Verb.MEMBER_ADDED).count(), 3)
+        self.assertEqual(Notification.objects.filter(project=self.project).count(), 3)
+        self.assertEqual(
+            set(SyncChange.objects.filter(entity=SyncChange.Entity.PROJECT, op=SyncChange.Op.DELETE).values_list('user_id', flat=True)),
+            {user.pk for user in self.users[:3]},
+        )
+
+    def test_patch_adds_and_removes(self):
+        self.project.members.add(self.users[0])
+        response = self.client.patch(
+            self.url, {'add': [self.users[1].pk, self.users[0].pk], 'remove': [self.users[0].pk, self.owner.pk]}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.member_ids(), {self.owner.pk, self.users[1].pk})
+
+    def test_unknown_user_rejects_whole_request(self):
+        response = self.client.patch(self.url, {'add': [self.users[0].pk, 999999]}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data['unknown_ids'], [999999])
+        self.assertEqual(self.member_ids(), {self.owner.pk})
+
+    def test_only_owner_can_change_members(self):
+        self.project.members.add(self.users[0])
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.client.patch(self.url, {'add': [self.users[1].pk]}, format='json').status_code, 403)
+
+    def test_query_count_independent_of_batch_size(self):
+        counts = []
+        for batch in (self.users[:2], self.users[2:30]):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.patch(self.url, {'add': [user.pk for user in batch]}, format='json')
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+@override_settings(PURGE_BATCH_SIZE=2)
+class TaskRankTests(APITestCase):
+    """Kéo thả trên Kanban: khóa phân số, chỉ cập nhật task được kéo; cột khóa dài được viết lại."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.project = Project.objects.create(name='Dự án', owner=self.owner)
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('project-task-list', kwargs={'pk': self.project.pk})
+        self.tasks = [self.client.post(self.url, {'title': f'Task {i}'}, format='json').data for i in range(4)]
+
+    def titles(self, status='TODO'):
+        return [task['title'] for task in self.client.get(self.url).data if task['status'] == status]
+
+    def move(self, task, **data):
+        return self.client.post(reverse('task-move', kwargs={'pk': task['id']}), data, format='json')
+
+    def test_keys_stay_ordered(self):
+        keys = ranking.spread(3)
+        self.assertEqual(keys, sorted(keys))
+        lower, upper = keys[0], keys[1]
+        for _ in range(200):
+            middle = ranking.key_between(lower, upper)
+            self.assertTrue(lower < middle < upper)
+            self.assertNotEqual(middle[-1], '0')
+            upper = middle
+        self.assertLess(ranking.key_between(None, 'a'), 'a')
+        self.assertGreater(ranking.key_between('zz', None), 'zz')
+
+    def test_new_tasks_go_to_end_and_move_updates_one_row(self):
+        self.assertEqual(self.titles(), ['Task 0', 'Task 1', 'Task 2', 'Task 3'])
+        first, second, _third, last = self.tasks
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move(last, before_id=first['id'], after_id=second['id'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "API_task"') for query in queries), 1)
+        self.assertEqual(self.titles(), ['Task 0', 'Task 3', 'Task 1', 'Task 2'])
+
+        response = self.move(first, status='DONE')
+        self.assertEqual(response.data['status'], 'DONE')
+        self.assertEqual(self.titles('DONE'), ['Task 0'])
+        self.assertEqual(ActivityLog.objects.filter(task_id=first['id'], verb=ActivityLog.Verb.TASK_UPDATED).count(), 1)
+
+    def test_rejects_neighbours_outside_column(self):
+        other = Task.objects.create(title='Khác', project=self.project, created_by=self.owner, status=Task.Status.DONE)
+        response = self.move(self.tasks[0], after_id=other.pk)
+        self.assertEqual((response.status_code, response.data['unknown_ids']), (400, [other.pk]))
+        response = self.move(self.tasks[0], before_id=self.tasks[3]['id'], after_id=self.tasks[1]['id'])
+        self.assertEqual(response.status_code, 400)
+
+    def test_duplicate_and_long_keys_are_rebalanced(self):
+        first, second, third, _last = self.tasks
+        Task.objects.filter(pk__in=[first['id'], second['id']]).update(rank='i')
+        self.assertEqual(self.move(third, before_id=first['id'], after_id=second['id']).status_code, 200)
+        self.assertEqual(self.titles(), ['Task 0', 'Task 2', 'Task 1', 'Task 3'])
+
+        Task.objects.filter(pk=first['id']).update(rank='0' * 30 + '1')
+        done = ranking.rebalance_long_columns(length=24)
+        self.assertEqual(done, [(f"project #{self.project.pk} / TODO", 4)])
+        self.assertTrue(all(len(rank) <= 2 for rank in Task.objects.values_list('rank', flat=True)))
+        self.assertEqual(self.titles(), ['Task 0', 'Task 2', 'Task 1', 'Task 3'])
+
+    def test_appending_keeps_keys_short(self):
+        key = None
+        for _ in range(3000):
+            following = ranking.key_between(key, None)
+            self.assertTrue(key is None or key < following)
+            key = following
+        # ~35 lần thêm mới dài thêm một ký tự (chia đôi về phía 1 thì ~5 lần)
+        self.assertLessEqual(len(key), 3000 // 35 + 2)
+
+        Task.objects.filter(pk=self.tasks[-1]['id']).update(rank='z' * ranking.MAX_LENGTH)
+        self.client.post(self.url, {'title': 'Task 4'}, format='json')
+        self.assertEqual(self.titles(), ['Task 0', 'Task 1', 'Task 2', 'Task 3', 'Task 4'])
+        self.assertTrue(all(len(rank) <= 2 for rank in Task.objects.values_list('rank', flat=True)))
+
+
+class ProjectBoardTests(APITestCase):
+    """Bảng Kanban: tổng số task + N task đầu mỗi cột trong một query, cursor phân trang trong cột."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.outsider = User.objects.create_user('outsider')
+        self.project = Project.objects.create(name='Dự án', owner=self.owner)
+        keys = ranking.spread(7)
+        for i in range(7):
+            Task.objects.create(title=f'Todo {i}', project=self.project, created_by=self.owner, rank=keys[6 - i])
+        Task.objects.create(title='Done', project=self.project, created_by=self.owner, status=Task.Status.DONE, rank='i')
+        self.url = reverse('project-board', kwargs={'pk': self.project.pk})
+        self.client.force_authenticate(self.owner)
+
+    def test_columns_with_totals_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'limit': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum('"API_task"' in query['sql'] for query in queries), 1)
+        todo, in_progress, done = response.data['columns']
+        self.assertEqual((todo['total'], [task['title'] for task in todo['tasks']]), (7, ['Todo 6', 'Todo 5', 'Todo 4']))
+        self.assertIsNotNone(todo['next_cursor'])
+        self.assertEqual((in_progress['total'], in_progress['tasks'], in_progress['next_cursor']), (0, [], None))
+        self.assertEqual((done['total'], len(done['tasks']), done['next_cursor']), (1, 1, None))
+
+    def test_cursor_pages_one_column(self):
+        titles, cursor = [], None
+        while True:
+            params = {'status': 'todo', 'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            [column] = self.client.get(self.url, params).data['columns']
+            self.assertEqual(column['total'], 7)
+            titles += [task['title'] for task in column['tasks']]
+            cursor = column['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(titles, [f'Todo {i}' for i in range(6, -1, -1)])
+        self.assertEqual(self.client.get(self.url, {'cursor': 'abc'}).status_code, 400)
+
+    def test_single_column_ignores_other_statuses(self):
+        # Bộ lọc hỏng -> 400, không trả bảng chưa lọc; một cột với cursor không lẫn task của cột khác
+        self.assertEqual(self.client.get(self.url, {'status': 'TODO', 'due_date_after': 'bad'}).status_code, 400)
+        first = self.client.get(self.url, {'status': 'DONE', 'limit': 1}).data['columns']
+        self.assertEqual([(column['status'], column['total']) for column in first], [('DONE', 1)])
+        todo = self.client.get(self.url, {'status': 'TODO', 'limit': 1}).data['columns'][0]
+        [column] = self.client.get(self.url, {'status': 'TODO', 'limit': 10, 'cursor': todo['next_cursor']}).data['columns']
+        self.assertEqual(len(column['tasks']), 6)
+
+    def test_outsider_cannot_read(self):
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class TaskDependencyTests(APITestCase):
+    """Liên kết "bị chặn bởi": từ chối vòng bằng thứ tự topo, đường găng / task bị chặn cache theo nhóm."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner')
+        self.outsider = User.objects.create_user('outsider')
+        self.project = Project.objects.create(name='Dự án', owner=self.owner)
+        self.a, self.b, self.c, self.d = [
+            Task.objects.create(title=title, project=self.project, created_by=self.owner) for title in 'ABCD'
+        ]
+        self.client.force_authenticate(self.owner)
+
+    def link(self, task, blocked_by):
+        return self.client.post(reverse('task-dependency-list', kwargs={'pk': task.pk}), {'blocked_by_id': blocked_by.pk}, format='json')
+
+    def analysis(self):
+        return self.client.get(reverse('project-dependencies', kwargs={'pk': self.project.pk})).data
+
+    def test_cycles_are_rejected(self):
+        self.assertEqual(self.link(self.b, self.a).status_code, 201)
+        self.assertEqual(self.link(self.c, self.b).status_code, 201)
+        self.assertEqual(self.link(self.b, self.a).status_code, 200)
+        response = self.link(self.a, self.c)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['cycle'], [self.c.pk, self.a.pk, self.b.pk, self.c.pk])
+        self.assertEqual(self.link(self.a, self.a).status_code, 400)
+
+    def test_reorders_only_when_needed(self):
+        # d -> c tạo trước (c, d vào đồ thị ở hai đầu), sau đó c -> a buộc phải xếp lại thứ tự topo
+        self.link(self.d, self.c)
+        self.link(self.b, self.a)
+        self.assertEqual(self.link(self.a, self.d).status_code, 201)
+        orders = dict(Task.objects.values_list('title', 'topo_order'))
+        self.assertLess(orders['C'], orders['D'])
+        self.assertLess(orders['D'], orders['A'])
+        self.assertLess(orders['A'], orders['B'])
+        self.assertEqual(len(set(Task.objects.values_list('dependency_group', flat=True))), 1)
+        self.assertEqual(self.link(self.c, self.b).status_code, 400)
+
+    def test_critical_path_and_blocked_tasks(self):
+        self.link(self.b, self.a)
+        self.link(self.c, self.b)
+        self.link(self.d, self.a)
+        data = self.analysis()
+        self.assertEqual([task['title'] for task in data['critical_path']], ['A', 'B', 'C'])
+        self.assertEqual(data['blocked_task_ids'], sorted([self.b.pk, self.c.pk, self.d.pk]))
+
+        # Cache của nhóm bị xóa khi một task trong nhóm đổi trạng thái
+        with CaptureQueriesContext(connection) as queries:
+            self.analysis()
+        self.assertFalse(any('API_taskdependency' in query['sql'] for query in queries))
+        self.client.patch(reverse('task-detail', kwargs={'pk': self.a.pk}), {'status': 'DONE'}, format='json')
+        data = self.analysis()
+        self.assertEqual([task['title'] for task in data['critical_path']], ['B', 'C'])
+        self.assertEqual(data['blocked_task_ids'], [self.c.pk])
+
+        response = self.client.delete(reverse('task-dependency-detail', kwargs={'pk': self.c.pk, 'blocked_by_pk': self.b.pk}))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.analysis()['blocked_task_ids'], [])
+
+    def test_requires_same_project_and_membership(self):
+        other = Task.objects.create(title='Khác', project=Project.objects.create(name='Khác', owner=self.owner), created_by=self.owner)
+        self.assertEqual(self.link(self.a, other).status_code, 400)
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.link(self.b, self.a).status_code, 403)
+
+
+class DueReminderTests(APITestCase):
+    """Nhắc hạn: mỗi (task, loại, hạn) chỉ nhắc một lần, theo lô, bỏ qua task đã xong / đã xóa."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.assignee = User.objects.create_user('assignee')
+        self.project = Project.objects.create(name='Dự án', owner=self.owner)
+        self.now = timezone.now()
+
+    def task(self, hours, **fields):
+        fields.setdefault('assignee', self.assignee)
+        return Task.objects.create(
+            title=f'Hạn {hours}h', project=self.project, created_by=self.owner, due_date=self.now + timedelta(hours=hours), **fields,
+        )
+
+    def reminded(self):
+        return set(Notification.objects.filter(kind=Notification.Kind.REMINDER).values_list('task_id', flat=True))
+
+    def test_sends_once_per_due_date(self):
+        soon, overdue = self.task(2), self.task(-2)
+        skipped = [
+            self.task(2, status=Task.Status.DONE), self.task(2, assignee=None), self.task(48), self.task(-48),
+            self.task(2, deleted_at=self.now),
+        ]
+        sent = reminders.send_due_reminders(now=self.now)
+        self.assertEqual(sent, {TaskReminder.Kind.OVERDUE: 1, TaskReminder.Kind.DUE_SOON: 1})
+        self.assertEqual(self.reminded(), {soon.pk, overdue.pk})
+        self.assertFalse(self.reminded() & {task.pk for task in skipped})
+        self.assertEqual(
+            SyncChange.objects.filter(entity=SyncChange.Entity.NOTIFICATION, user_id=self.assignee.pk).count(), 2,
+        )
+
+        # Chạy lại không nhắc trùng
+        self.assertEqual(sum(reminders.send_due_reminders(now=self.now).values()), 0)
+        # Đổi hạn -> hạn mới được nhắc lại; task sắp đến hạn khi đã quá hạn được nhắc lần nữa (loại khác)
+        soon.due_date = self.now + timedelta(hours=5)
+        soon.save()
+        self.assertEqual(reminders.send_due_reminders(now=self.now)[TaskReminder.Kind.DUE_SOON], 1)
+        later = self.now + timedelta(hours=6)
+        self.assertEqual(reminders.send_due_reminders(now=later)[TaskReminder.Kind.OVERDUE], 1)
+        self.assertEqual(Notification.objects.filter(task=soon, kind=Notification.Kind.REMINDER).count(), 3)
+
+    def test_work_per_tick_is_bounded(self):
+        for _ in range(5):
+            self.task(3)
+        sent = reminders.send_due_reminders(now=self.now, batch_size=2, max_batches=2)
+        self.assertEqual(sent[TaskReminder.Kind.DUE_SOON], 4)
+        self.assertEqual(reminders.send_due_reminders(now=self.now, batch_size=2, max_batches=2)[TaskReminder.Kind.DUE_SOON], 1)
+        self.assertEqual(TaskReminder.objects.count(), 5)
+
+
+class RecurringTaskTests(APITestCase):
+    """Việc lặp lại: chỉ lưu lần kế tiếp, các lần sau được chiếu ảo theo khoảng ngày."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.client.force_authenticate(self.owner)
+        self.due = timezone.make_aware(timezone.datetime(2030, 1, 31, 9, 0))
+
+    def create(self, **data):
+        payload = {'title': 'Tưới cây', 'due_date': self.due.isoformat(), 'recurrence': 'daily', **data}
+        return self.client.post(reverse('personal-task-list'), payload, format='json')
+
+    def listing(self, after, before, **params):
+        return self.client.get(reverse('personal-task-list'), {'due_date_after': after, 'due_date_before': before, **params}).data
+
+    def test_calendar(self):
+        self.assertEqual(recurrence.add_months(self.due, 1).day, 28)
+        task = Task(recurrence=Task.Recurrence.MONTHLY, recurrence_interval=1, due_date=self.due)
+        # Tính từ hạn gốc: 31/1 -> 28/2 -> 31/3, không trôi thành 28/3
+        self.assertEqual([recurrence.occurrence(task, n).day for n in range(1, 4)], [28, 31, 30])
+        self.assertEqual(recurrence.first_after(task, self.due + timedelta(days=365)), 13)
+
+    def test_daily_forever_stores_one_row_and_projects_window(self):
+        series = self.create().data
+        self.assertEqual(Task.objects.count(), 1)
+        tasks = self.listing('2030-02-01', '2030-02-08')
+        self.assertEqual(len(tasks), 7)
+        self.assertTrue(all(item['is_virtual'] and item['series'] == series['id'] and item['id'] is None for item in tasks))
+        self.assertEqual(self.listing('2030-02-01', '2030-02-08', status='DONE'), [])
+        with override_settings(RECURRENCE_MAX_OCCURRENCES=3):
+            self.assertEqual(len(self.listing('2030-01-01', '2099-12-31')), 1 + 3)
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(len(self.client.get(reverse('personal-task-list')).data), 1)
+
+    def test_complete_advances_series(self):
+        series_id = self.create(recurrence='weekly', recurrence_until='2030-02-10T00:00:00Z').data['id']
+        url = reverse('task-detail', kwargs={'pk': series_id})
+        response = self.client.patch(url, {'status': 'DONE'}, format='json')
+        self.assertEqual(response.data['status'], 'TODO')
+        self.assertEqual(response.data['due_date'], (self.due + timedelta(weeks=1)).astimezone(timezone.get_current_timezone()).isoformat())
+        done = Task.objects.get(recurrence_parent_id=series_id)
+        self.assertEqual((done.status, done.due_date), (Task.Status.DONE, self.due))
+        # Lần cuối trước recurrence_until: chuỗi kết thúc, không tạo thêm lần nào
+        self.client.post(reverse('task-move', kwargs={'pk': series_id}), {'status': 'DONE'}, format='json')
+        series = Task.objects.get(pk=series_id)
+        self.assertEqual((series.status, series.recurrence), (Task.Status.DONE, ''))
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_touching_an_occurrence_materializes_it(self):
+        series_id = self.create().data['id']
+        url = reverse('task-occurrences', kwargs={'pk': series_id})
+        due = self.due + timedelta(days=2)
+        response = self.client.post(url, {'due_date': due.isoformat()}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.post(url, {'due_date': due.isoformat()}, format='json').status_code, 200)
+        self.assertEqual(self.client.post(url, {'due_date': (due + timedelta(hours=1)).isoformat()}, format='json').status_code, 400)
+        tasks = self.listing('2030-02-01', '2030-02-04')
+        self.assertEqual([item['is_virtual'] for item in tasks], [False, True, True])
+        self.assertEqual(sorted(item['due_date'][:10] for item in tasks), ['2030-02-01', '2030-02-02', '2030-02-03'])
+        # Hoàn thành lần 31/1 và 1/2: chuỗi bỏ qua 2/2 (đã thành task riêng)
+        detail = reverse('task-detail', kwargs={'pk': series_id})
+        self.client.patch(detail, {'status': 'DONE'}, format='json')
+        self.assertEqual(self.client.patch(detail, {'status': 'DONE'}, format='json').data['due_date'][:10], '2030-02-03')
+
+    def test_project_series_keeps_rollups_consistent(self):
+        project = Project.objects.create(name='Dự án', owner=self.owner)
+        series_id = self.client.post(reverse('project-task-list', kwargs={'pk': project.pk}), {
+            'title': 'Họp giao ban', 'due_date': self.due.isoformat(), 'recurrence': 'daily',
+        }, format='json').data['id']
+        for _ in range(3):
+            self.assertEqual(self.client.post(reverse('task-move', kwargs={'pk': series_id}), {'status': 'DONE'}, format='json').status_code, 200)
+        self.client.patch(reverse('task-detail', kwargs={'pk': series_id}), {'status': 'DONE'}, format='json')
+
+        # Mỗi lần hoàn thành = một task mới ở trạng thái DONE; task của chuỗi không có bước chuyển trạng thái
+        logs = ActivityLog.objects.filter(project=project)
+        self.assertEqual(logs.filter(verb=ActivityLog.Verb.TASK_CREATED, to_status=Task.Status.DONE).count(), 4)
+        self.assertFalse(logs.filter(task_id=series_id, verb=ActivityLog.Verb.TASK_UPDATED, to_status__isnull=False).exists())
+        today = timezone.localdate()
+        [point] = analytics.burndown_series(project, today, today)
+        self.assertEqual((point['remaining'], point['created'], point['completed']), (1, 5, 4))
+        self.assertEqual(Task.objects.filter(project=project, status=Task.Status.DONE).count(), 4)
+
+
+class ProjectAccessTests(APITestCase):
+    """Bảng quyền xem dự án luôn khớp owner + members; danh sách lọc bằng EXISTS, không DISTINCT."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.member = User.objects.create_user('member')
+        self.other = User.objects.create_user('other')
+        self.client.force_authenticate(self.owner)
+        self.project = Project.objects.get(pk=self.client.post(
+            reverse('project-list'), {'name': 'Dự án', 'member_ids': [self.member.pk]}, format='json',
+        ).data['id'])
+
+    def rows(self):
+        return set(ProjectAccess.objects.filter(project=self.project).values_list('user__username', 'role'))
+
+    def test_kept_in_sync(self):
+        self.assertEqual(self.rows(), {('owner', 'owner'), ('member', 'member')})
+        self.client.post(reverse('project-add-member', kwargs={'pk': self.project.pk}), {'user_id': self.other.pk}, format='json')
+        self.client.post(reverse('project-remove-member', kwargs={'pk': self.project.pk}), {'user_id': self.member.pk}, format='json')
+        self.assertEqual(self.rows(), {('owner', 'owner'), ('other', 'member')})
+        self.client.patch(reverse('project-members', kwargs={'pk': self.project.pk}), {'add': [self.member.pk], 'remove': [self.other.pk]}, format='json')
+        self.assertEqual(self.rows(), {('owner', 'owner'), ('member', 'member')})
+
+        # Đổi chủ: chủ cũ vẫn là thành viên nên xuống member
+        self.project.owner = self.member
+        self.project.save()
+        self.assertEqual(self.rows(), {('owner', 'member'), ('member', 'owner')})
+        self.project.members.clear()
+        self.assertEqual(self.rows(), {('member', 'owner')})
+        self.assertEqual(access.check(), {'missing': [], 'extra': [], 'wrong_role': []})
+
+        self.client.force_authenticate(self.member)
+        self.client.delete(reverse('project-detail', kwargs={'pk': self.project.pk}))
+        self.assertEqual(self.rows(), set())
+        self.assertEqual(access.check(), {'missing': [], 'extra': [], 'wrong_role': []})
+
+    def test_writes_are_single_statements(self):
+        # Thêm / gỡ nhiều thành viên cùng lúc vẫn chỉ một INSERT / một DELETE trên bảng quyền
+        with self.assertNumQueries(1):
+            access.grant(self.project.pk, [self.other.pk, self.owner.pk])
+        with self.assertNumQueries(1):
+            access.revoke(self.project.pk, [self.member.pk, self.other.pk])
+        self.assertEqual(self.rows(), {('owner', 'owner')})
+
+    def test_list_queries_use_exists(self):
+        self.client.force_authenticate(self.member)
+        with CaptureQueriesContext(connection) as queries:
+            projects = self.client.get(reverse('project-list')).data
+            tasks = self.client.get(reverse('project-task-list', kwargs={'pk': self.project.pk})).data
+        self.assertEqual([project['id'] for project in projects], [self.project.pk])
+        self.assertEqual(tasks, [])
+        self.assertFalse([query['sql'] for query in queries.captured_queries if 'DISTINCT' in query['sql']])
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(reverse('project-list')).data, [])
+
+    def test_checker_repairs_drift(self):
+        Project.members.through.objects.create(project=self.project, user=self.other)
+        ProjectAccess.objects.filter(user=self.owner).update(role=ProjectAccess.Role.MEMBER)
+        ProjectAccess.objects.create(user=self.other, project=Project.objects.create(name='Khác', owner=self.member), role='member')
+        report = access.check()
+        self.assertEqual(len(report['missing']) + len(report['extra']) + len(report['wrong_role']), 3)
+        call_command('check_project_access', '--fix', stdout=StringIO())
+        self.assertEqual(access.check(), {'missing': [], 'extra': [], 'wrong_role': []})
+        self.assertEqual(self.rows(), {('owner', 'owner'), ('member', 'member'), ('other', 'member')})
+
+
+class MyWorkTests(APITestCase):
+    """my-work/: task được giao trên mọi dự án còn quyền xem + task cá nhân, phân trang keyset."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('me')
+        self.boss = User.objects.create_user('boss')
+        self.now = timezone.now()
+        self.projects = [Project.objects.create(name=f'Dự án {i}', owner=self.boss) for i in range(3)]
+        for project in self.projects:
+            project.members.add(self.boss, self.user)
+        self.client.force_authenticate(self.user)
+
+    def task(self, project, hours=None, **fields):
+        fields.setdefault('assignee', self.user)
+        return Task.objects.create(
+            title=f'Task {Task.objects.count()}', project=project, is_personal=project is None, created_by=self.boss if project else self.user,
+            due_date=None if hours is None else self.now + timedelta(hours=hours), **fields,
+        )
+
+    def fetch(self, **params):
+        response = self.client.get(reverse('my-work'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def walk(self, **params):
+        ids, cursor = [], None
+        while True:
+            data = self.fetch(limit=2, **params, **({'cursor': cursor} if cursor else {}))
+            ids += [task['id'] for task in data['results']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_lists_across_projects_in_due_order(self):
+        late, none, soon = self.task(self.projects[0], 5), self.task(self.projects[1]), self.task(self.projects[2], 1)
+        personal = self.task(None, 3)
+        self.task(self.projects[0], 2, assignee=self.boss)
+        gone = self.task(self.projects[1], 4)
+        self.projects[1].members.remove(self.user)
+        # Mất quyền xem dự án 1 -> task được giao trong đó không còn hiện
+        self.assertEqual(self.walk(), [soon.pk, personal.pk, late.pk])
+        self.assertNotIn(gone.pk, self.walk())
+        self.assertNotIn(none.pk, self.walk())
+        self.projects[1].members.add(self.user)
+        self.assertEqual(self.walk(), [soon.pk, personal.pk, gone.pk, late.pk, none.pk])
+        self.assertEqual(self.walk(status='todo', search='Task'), self.walk())
+
+    def test_priority_ordering_and_bounded_queries(self):
+        low = self.task(self.projects[0], 1, priority=Task.Priority.LOW)
+        high_late = self.task(self.projects[1], 9, priority=Task.Priority.HIGH)
+        high_none = self.task(self.projects[2], priority=Task.Priority.HIGH)
+        medium = self.task(None, 2)
+        self.assertEqual(self.walk(ordering='priority'), [high_late.pk, high_none.pk, medium.pk, low.pk])
+        self.assertEqual(self.client.get(reverse('my-work'), {'cursor': 'rác'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('my-work'), {'ordering': 'title'}).status_code, 400)
+
+        for i in range(20):
+            project = Project.objects.create(name=f'Thêm {i}', owner=self.boss)
+            project.members.add(self.user)
+            self.task(project, i)
+        with CaptureQueriesContext(connection) as queries:
+            self.fetch(limit=10)
+        self.assertEqual(len(queries), 1)
+
+
+class DeletionTests(APITestCase):
+    """Xóa dự án / task: ẩn ngay trong request, dữ liệu con + tệp được dọn theo lô bởi purge_deleted."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.member = User.objects.create_user('member')
+        self.project = Project.objects.create(name='Dự án lớn', owner=self.owner)
+        self.project.members.add(self.owner, self.member)
+        self.tasks = [Task.objects.create(title=f'Task {index}', project=self.project, created_by=self.owner) for index in range(5)]
+        self.attachments = []
+        for task in self.tasks:
+            Comment.objects.create(task=task, author=self.member, body='...')
+            Notification.objects.create(recipient=self.member, title='Thông báo', message='...', project=self.project, task=task)
+            self.attachments.append(Attachment.objects.create(
+                task=task, uploader=self.member, file=SimpleUploadedFile(f'{task.pk}.txt', b'noi dung'),
+            ))
+        ProjectDailyStat.objects.create(project=self.project, date=timezone.localdate(), created=5)
+        self.client.force_authenticate(self.owner)
+
+    def storage_has(self, attachment):
+        return attachment.file.storage.exists(attachment.file.name)
+
+    def purge(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return purge.run_pending()
+
+    def test_project_is_hidden_immediately_and_purged_in_batches(self):
+        response = self.client.delete(reverse('project-detail', kwargs={'pk': self.project.pk}))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], DeletionJob.Status.PENDING)
+        job_url = reverse('deletion-job-detail', kwargs={'pk': response.data['id']})
+
+        # Ẩn khỏi danh sách / chi tiết / task, dữ liệu vẫn còn cho tới khi purge chạy
+        self.assertEqual(self.client.get(reverse('project-list')).data, [])
+        self.assertEqual(self.client.get(reverse('project-detail', kwargs={'pk': self.project.pk})).status_code, 404)
+        self.assertEqual(self.client.get(reverse('task-detail', kwargs={'pk': self.tasks[0].pk})).status_code, 404)
+        self.assertEqual(Task.objects.filter(project_id=self.project.pk).count(), 0)
+        self.assertEqual(Task.all_objects.filter(project_id=self.project.pk).count(), 5)
+        self.assertTrue(SyncChange.objects.filter(
+            entity=SyncChange.Entity.PROJECT, object_id=self.project.pk, user_id=self.member.pk, op=SyncChange.Op.DELETE,
+        ).exists())
+
+        [job] = self.purge()
+        self.assertEqual(job.status, DeletionJob.Status.DONE)
+        self.assertEqual(job.files_deleted, 5)
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(Task.all_objects.filter(pk__in=[task.pk for task in self.tasks]).exists())
+        self.assertFalse(Comment.objects.exists() or Attachment.objects.exists() or Notification.objects.exists())
+        self.assertFalse(ProjectDailyStat.objects.exists())
+        self.assertFalse(any(self.storage_has(attachment) for attachment in self.attachments))
+        # Nhật ký được giữ lại, chỉ gỡ liên kết
+        self.assertTrue(ActivityLog.objects.filter(verb=ActivityLog.Verb.PROJECT_DELETED, target_id=self.project.pk).exists())
+
+        progress = self.client.get(job_url)
+        self.assertEqual(progress.status_code, 200)
+        self.assertEqual(progress.data['status'], DeletionJob.Status.DONE)
+        self.assertEqual(progress.data['rows_deleted'], job.rows_deleted)
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get(job_url).status_code, 404)
+
+    def test_task_delete_tombstones_children(self):
+        task = self.tasks[0]
+        response = self.client.delete(reverse('task-detail', kwargs={'pk': task.pk}))
+        self.assertEqual(response.status_code, 202)
+        comment = task.comments.get()
+        comment_url = reverse('task-comment-detail', kwargs={'task_pk': task.pk, 'pk': comment.pk})
+        self.assertEqual(self.client.get(comment_url).status_code, 404)
+
+        [job] = self.purge()
+        self.assertEqual(job.status, DeletionJob.Status.DONE)
+        self.assertFalse(Task.all_objects.filter(pk=task.pk).exists())
+        self.assertFalse(self.storage_has(self.attachments[0]))
+        self.assertTrue(self.storage_has(self.attachments[1]))
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 4)
+        tombstones = SyncChange.objects.filter(op=SyncChange.Op.DELETE, project_id=self.project.pk)
+        self.assertEqual(
+            set(tombstones.values_list('entity', 'object_id')),
+            {(SyncChange.Entity.TASK, task.pk), (SyncChange.Entity.COMMENT, comment.pk), (SyncChange.Entity.ATTACHMENT, self.attachments[0].pk)},
+        )
+
+    def test_failed_job_can_be_retried(self):
+        self.client.delete(reverse('project-detail', kwargs={'pk': self.project.pk}))
+        with mock.patch.object(purge, 'detach_batches', side_effect=RuntimeError('db down')):
+            [job] = self.purge()
+        self.assertEqual(job.status, DeletionJob.Status.FAILED)
+        self.assertEqual(job.phase, 'activity_logs')
+        self.assertIn('db down', job.error)
+        self.assertEqual(Comment.objects.count(), 0)
+
+        # Chạy lại từ đầu: các bước đã xong không còn gì để xóa
+        self.assertEqual(purge.retry_failed(), 1)
+        [job] = self.purge()
+        self.assertEqual(job.status, DeletionJob.Status.DONE)
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+
+
+class NotificationCoalescingTests(APITestCase):
+    """Bình luận liên tục trên một task: gộp vào một thông báo; user chọn tóm tắt nhận một bản tóm tắt định kỳ."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+        self.project = Project.objects.create(name='Dự án', owner=self.owner)
+        self.project.members.add(self.owner, self.alice, self.bob)
+        self.task = Task.objects.create(title='Task', project=self.project, created_by=self.owner)
+        self.url = reverse('task-comment-list', kwargs={'task_pk': self.task.pk})
+
+    def comment(self, user, body='...'):
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.post(self.url, {'body': body}, format='json').status_code, 201)
+
+    def owner_notifications(self):
+        self.client.force_authenticate(self.owner)
+        return self.client.get(reverse('notification-list')).data
+
+    def test_comments_are_coalesced_until_read(self):
+        self.comment(self.alice)
+        self.comment(self.bob, 'mới nhất')
+        self.comment(self.alice)
+        self.comment(self.bob, 'mới nhất')
+        data = self.owner_notifications()
+        self.assertEqual(data['unread_count'], 1)
+        [notification] = data['notifications']
+        self.assertEqual((notification['kind'], notification['count'], notification['actor']), ('comment', 4, self.bob.pk))
+        self.assertIn('mới nhất', notification['message'])
+
+        self.client.post(reverse('notification-mark-all-read'))
+        self.comment(self.alice)
+        self.assertEqual([item['count'] for item in self.owner_notifications()['notifications']], [1, 4])
+
+    def test_window_limits_coalescing(self):
+        self.comment(self.alice)
+        Notification.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        self.comment(self.alice)
+        self.assertEqual(Notification.objects.filter(recipient=self.owner).count(), 2)
+
+    def test_digest_collects_pending_notifications(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.put(reverse('notification-preferences'), {'digest_frequency': 'hourly'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        other = Task.objects.create(title='Task khác', project=self.project, created_by=self.owner)
+        for _ in range(3):
+            self.comment(self.alice)
+        self.client.post(reverse('task-comment-list', kwargs={'task_pk': other.pk}), {'body': '...'}, format='json')
+        self.assertEqual(self.owner_notifications()['notifications'], [])
+
+        self.assertEqual(notifications.send_digests(), 1)
+        [digest] = self.owner_notifications()['notifications']
+        self.assertEqual((digest['kind'], digest['count']), ('digest', 4))
+        self.assertIn("'Task': 3", digest['message'])
+        self.assertFalse(Notification.objects.filter(pending_digest=True).exists())
+
+        # Chưa đến hạn lần sau
+        self.comment(self.alice)
+        self.assertEqual(notifications.send_digests(), 0)
+        self.assertEqual(notifications.send_digests(now=timezone.now() + timedelta(hours=1)), 1)
+
+    def test_turning_digest_off_releases_pending(self):
+        User.objects.filter(pk=self.owner.pk).update(digest_frequency=User.DigestFrequency.DAILY)
+        self.comment(self.alice)
+        self.client.force_authenticate(self.owner)
+        self.client.put(reverse('notification-preferences'), {'digest_frequency': 'off'}, format='json')
+        self.assertEqual(len(self.owner_notifications()['notifications']), 1)
+
+
+class ReadWatermarkTests(APITestCase):
+    """Đã đọc = mốc read_until + id đọc lẻ; đánh dấu tất cả không cập nhật từng thông báo."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('reader')
+        self.other = User.objects.create_user('other')
+        self.project = Project.objects.create(name='Dự án', owner=self.user)
+        self.task = Task.objects.create(title='Task', project=self.project, created_by=self.user)
+        self.client.force_authenticate(self.user)
+
+    def notify(self, count=1):
+        return Notification.objects.bulk_create([
+            Notification(recipient=self.user, title='Thông báo', message='...') for _ in range(count)
+        ])
+
+    def listing(self):
+        return self.client.get(reverse('notification-list')).data
+
+    def test_mark_all_is_constant_and_does_not_touch_rows(self):
+        self.notify(50)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('notification-mark-all-read'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('UPDATE "API_notification"' in query['sql'] for query in queries))
+        self.assertFalse(Notification.objects.filter(is_read=True).exists())
+        data = self.listing()
+        self.assertEqual(data['unread_count'], 0)
+        self.assertTrue(all(item['is_read'] for item in data['notifications']))
+
+        # Thông báo đến sau mốc vẫn chưa đọc
+        self.notify()
+        self.assertEqual(self.listing()['unread_count'], 1)
+
+    def test_mark_one_adds_sparse_id(self):
+        first, second = self.notify(2)
+        response = self.client.post(reverse('notification-mark-read', kwargs={'pk': first.pk}))
+        self.assertEqual(response.status_code, 200)
+        read = {item['id']: item['is_read'] for item in self.listing()['notifications']}
+        self.assertEqual(read, {first.pk: True, second.pk: False})
+
+        # Đánh dấu tất cả gom id lẻ vào mốc
+        self.client.post(reverse('notification-mark-all-read'))
+        self.assertEqual(self.user.notification_read_state.read_ids, [])
+        self.client.force_authenticate(self.other)
+        response = self.client.post(reverse('notification-mark-read', kwargs={'pk': second.pk}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_read_state_reaches_sync_and_blocks_coalescing(self):
+        notifications.notify([self.user], Notification.Kind.COMMENT, 'Bình luận mới', '...', task=self.task)
+        token = self.client.get(reverse('sync')).data['token']
+        self.client.post(reverse('notification-mark-all-read'))
+        feed = self.client.get(reverse('sync'), {'since': token}).data
+        self.assertIsNotNone(feed['read_state']['read_until'])
+
+        # Dòng đã đọc theo mốc không được gộp thêm -> tạo dòng mới chưa đọc
+        notifications.notify([self.user], Notification.Kind.COMMENT, 'Bình luận mới', '...', task=self.task)
+        self.assertEqual([item['count'] for item in self.listing()['notifications']], [1, 1])
+        self.assertEqual(self.listing()['unread_count'], 1)
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """SMTP giả lập tối thiểu cho test: đếm số kết nối, lưu email nhận được, từ chối người nhận trong `reject`."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, reject=()):
+        self.connections = 0
+        self.messages = []
+        self.reject = set(reject)
+        super().__init__(('127.0.0.1', 0), LocalSMTPHandler)
+
+
+class LocalSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost')
+        recipients = []
+        while line := self.rfile.readline().decode().strip():
+            command = line.split(' ', 1)[0].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif command == 'RCPT':
+                address = line.split(':', 1)[1].strip(' <>')
+                if address in self.server.reject:
+                    self.reply('550 mailbox unavailable')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                self.server.messages.extend(recipients)
+                recipients = []
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                # MAIL, RSET, NOOP
+                recipients = [] if command == 'RSET' else recipients
+                self.reply('250 OK')
+
+
+class OutboundEmailTests(APITestCase):
+    """Email đi qua hàng đợi: request không gửi SMTP; worker gửi theo lô trên một kết nối, lỗi thì thử lại có backoff."""
+
+    def setUp(self):
+        # Bucket giới hạn tần suất password_reset dùng chung cache với các test khác
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def start_smtp(self, reject=()):
+        server = LocalSMTPServer(reject)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        smtp_settings = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=server.server_address[1], EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='', EMAIL_TIMEOUT=5,
+        )
+        smtp_settings.enable()
+        self.addCleanup(smtp_settings.disable)
+        return server
+
+    def test_forgot_password_is_queued_then_sent_in_one_connection(self):
+        server = self.start_smtp()
+        for index in range(3):
+            User.objects.create_user(f'user{index}', f'user{index}@example.com', 'matkhau123')
+            response = self.client.post(reverse('forgot-password'), {'email': f'user{index}@example.com'}, format='json')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(server.connections, 0)
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.Status.PENDING).count(), 3)
+
+        self.assertEqual(outbox.send_pending(), (3, 0))
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(sorted(server.messages), [f'user{index}@example.com' for index in range(3)])
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.Status.SENT).count(), 3)
+        self.assertFalse(OutboundEmail.objects.exclude(body='').exists())
+
+    @override_settings(MAIL_MAX_ATTEMPTS=2, MAIL_RETRY_BASE_SECONDS=30)
+    def test_rejected_email_is_retried_with_backoff_then_failed(self):
+        server = self.start_smtp(reject={'bad@example.com'})
+        outbox.enqueue('bad@example.com', 'Tiêu đề', 'Nội dung')
+        outbox.enqueue('good@example.com', 'Tiêu đề', 'Nội dung')
+        self.assertEqual(outbox.send_pending(), (1, 1))
+        bad = OutboundEmail.objects.get(to='bad@example.com')
+        self.assertEqual((bad.status, bad.attempts), (OutboundEmail.Status.PENDING, 1))
+        self.assertAlmostEqual((bad.next_attempt_at - timezone.now()).total_seconds(), 30, delta=5)
+
+        # Chưa đến hạn thử lại
+        self.assertEqual(outbox.send_pending(), (0, 0))
+        OutboundEmail.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.send_pending(), (0, 1))
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), (OutboundEmail.Status.FAILED, 2))
+        self.assertEqual(server.messages, ['good@example.com'])
+
+    def test_unreachable_server_reschedules_batch(self):
+        server = self.start_smtp()
+        port = server.server_address[1]
+        server.shutdown()
+        server.server_close()
+        outbox.enqueue('a@example.com', 'Tiêu đề', 'Nội dung')
+        with override_settings(EMAIL_PORT=port):
+            self.assertEqual(outbox.send_pending(), (0, 1))
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, OutboundEmail.Status.PENDING)
+        self.assertIn('connection', email.last_error)
+
+    @override_settings(MAIL_RETENTION_DAYS=30)
+    def test_old_sent_and_failed_emails_are_pruned(self):
+        now = timezone.now()
+        old, recent = now - timedelta(days=31), now - timedelta(days=29)
+        Status = OutboundEmail.Status
+        for to, status, sent_at, next_attempt_at in (
+            ('cu@example.com', Status.SENT, old, old),
+            ('moi@example.com', Status.SENT, recent, recent),
+            ('loi@example.com', Status.FAILED, None, old),
+            ('cho@example.com', Status.PENDING, None, now + timedelta(days=1)),
+        ):
+            OutboundEmail.objects.create(to=to, subject='Tiêu đề', body='', status=status, sent_at=sent_at, next_attempt_at=next_attempt_at)
+        out = StringIO()
+        call_command('send_queued_mail', stdout=out)
+        self.assertIn('Đã xóa 2 email cũ.', out.getvalue())
+        self.assertEqual(sorted(OutboundEmail.objects.values_list('to', flat=True)), ['cho@example.com', 'moi@example.com'])
+        with override_settings(MAIL_RETENTION_DAYS=0):
+            self.assertEqual(outbox.prune(now + timedelta(days=365)), 0)
+
+    def test_digest_is_emailed(self):
+        user = User.objects.create_user('owner', 'owner@example.com', digest_frequency=User.DigestFrequency.DAILY)
+        task = Task.objects.create(title='Task', created_by=user, is_personal=True)
+        notifications.notify([user], Notification.Kind.COMMENT, 'Bình luận mới', '...', task=task)
+        notifications.send_digests()
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.kind, email.to), (OutboundEmail.Kind.DIGEST, 'owner@example.com'))
+        self.assertIn("'Task': 1", email.body)
+
+
+class AnalyticsTests(TestCase):
+    """Rollup theo ngày / theo task được cộng dồn từ sự kiện; mở lại task đã xong không còn tính là hoàn thành."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.project = Project.objects.create(name='Dự án', owner=self.owner)
+        self.first = Task.objects.create(title='Một', project=self.project, created_by=self.owner)
+        self.second = Task.objects.create(title='Hai', project=self.project, created_by=self.owner, status=Task.Status.IN_PROGRESS)
+        # Thứ Hai 02/03/2026
+        self.day = date(2026, 3, 2)
+        self.event(self.first, ActivityLog.Verb.TASK_CREATED, None, 'TODO', days=0, hour=9)
+        self.event(self.second, ActivityLog.Verb.TASK_CREATED, None, 'INPR', days=0, hour=9)
+        self.event(self.first, ActivityLog.Verb.TASK_UPDATED, 'TODO', 'INPR', days=1, hour=9)
+        self.event(self.second, ActivityLog.Verb.TASK_UPDATED, 'INPR', 'DONE', days=1, hour=9)
+        self.event(self.first, ActivityLog.Verb.TASK_UPDATED, 'INPR', 'DONE', days=2, hour=21)
+
+    def event(self, task, verb, old, new, days, hour):
+        changes = {} if verb == ActivityLog.Verb.TASK_CREATED else {'status': [old, new]}
+        log = ActivityLog(
+            verb=verb, target_type=ActivityLog.TargetType.TASK, target_id=task.pk, target_name=task.title,
+            changes=changes, to_status=new, project=self.project, task=task,
+            timestamp=timezone.make_aware(datetime.combine(self.day + timedelta(days=days), datetime.min.time()) + timedelta(hours=hour)),
+        )
+        analytics.record_event(log)
+
+    def test_daily_rollups_and_burndown(self):
+        self.event(self.first, ActivityLog.Verb.TASK_UPDATED, 'DONE', 'TODO', days=3, hour=9)
+        rows = ProjectDailyStat.objects.filter(project=self.project).order_by('date')
+        self.assertEqual(
+            [(row.created, row.completed, row.reopened, row.open_delta) for row in rows],
+            [(2, 0, 0, 2), (0, 1, 0, -1), (0, 1, 0, -1), (0, 0, 1, 1)],
+        )
+        series = analytics.burndown_series(self.project, self.day, self.day + timedelta(days=4))
+        self.assertEqual([point['remaining'] for point in series], [2, 1, 0, 1, 1])
+        self.assertEqual([point['completed'] for point in series], [0, 1, 1, 0, 0])
+        self.assertEqual(
+            analytics.throughput_series(self.project, self.day + timedelta(days=1), self.day + timedelta(days=7)),
+            [{'week_start': self.day, 'completed': 2}, {'week_start': self.day + timedelta(days=7), 'completed': 0}],
+        )
+
+    def test_cycle_time_and_reopen(self):
+        end = self.day + timedelta(days=6)
+        summary = analytics.cycle_time_summary(self.project, self.day, end)['summary']
+        self.assertEqual((summary['count'], summary['max_seconds']), (2, 36 * 3600))
+        self.assertEqual(summary['avg_seconds'], (24 + 36) * 3600 // 2)
+
+        # Mở lại rồi làm tiếp: task không còn trong số đã hoàn thành, thời gian INPR cũ được giữ
+        self.event(self.first, ActivityLog.Verb.TASK_UPDATED, 'DONE', 'TODO', days=3, hour=9)
+        self.assertIsNone(TaskCycleStat.objects.get(task=self.first).completed_at)
+        self.event(self.first, ActivityLog.Verb.TASK_UPDATED, 'TODO', 'INPR', days=3, hour=10)
+        result = analytics.cycle_time_summary(self.project, self.day, end)
+        self.assertEqual((result['summary']['count'], result['summary']['max_seconds']), (1, 24 * 3600))
+        self.assertEqual([item['task'] for item in result['in_progress']], [self.first.pk])
+        self.assertGreater(result['in_progress'][0]['inpr_seconds'], 36 * 3600)
+
+    def test_rebuild_replays_events(self):
+        ActivityLog.objects.create(
+            verb=ActivityLog.Verb.TASK_CREATED, target_type=ActivityLog.TargetType.TASK, target_id=self.first.pk,
+            to_status='TODO', project=self.project, task=self.first,
+        )
+        self.assertEqual(analytics.rebuild([self.project.pk]), 1)
+        [row] = ProjectDailyStat.objects.filter(project=self.project)
+        self.assertEqual((row.created, row.open_delta), (1, 1))
+        self.assertFalse(TaskCycleStat.objects.filter(project=self.project).exists())
+
+
+class SyncFeedTests(APITestCase):
+    """Feed /sync/: nén theo đối tượng, tombstone, token không vượt các transaction có thể commit muộn."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.outsider = User.objects.create_user('outsider')
+        self.project = Project.objects.create(name='Dự án', owner=self.owner)
+        self.task = Task.objects.create(title='Task', project=self.project, created_by=self.owner)
+        self.client.force_authenticate(self.owner)
+
+    def settle(self):
+        """Mọi thay đổi hiện có coi như đã commit từ lâu."""
+        SyncChange.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+
+    def feed(self, since=None):
+        response = self.client.get(reverse('sync'), {} if since is None else {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_token_format(self):
+        self.assertEqual([sync.parse_token(value) for value in (None, '', '0', '42')], [0, 0, 0, 42])
+        for value in ('-1', 'abc', '1.5'):
+            with self.assertRaises(ValueError):
+                sync.parse_token(value)
+        self.assertEqual(self.client.get(reverse('sync'), {'since': 'abc'}).status_code, 400)
+        self.settle()
+        token = self.feed()['token']
+        self.assertEqual(token, str(SyncChange.objects.latest('id').id))
+
+    def test_compaction_and_tombstones(self):
+        for title in ('Sửa 1', 'Sửa 2'):
+            self.task.title = title
+            self.task.save()
+        comment = Comment.objects.create(task=self.task, author=self.owner, body='...')
+        self.assertEqual(SyncChange.objects.filter(entity=SyncChange.Entity.TASK, object_id=self.task.pk).count(), 1)
+        self.settle()
+        feed = self.feed()
+        self.assertEqual([(item['id'], item['title']) for item in feed['tasks']], [(self.task.pk, 'Sửa 2')])
+        self.assertEqual([item['id'] for item in feed['comments']], [comment.pk])
+
+        comment_id = comment.pk
+        comment.delete()
+        self.settle()
+        later = self.feed(feed['token'])
+        self.assertEqual((later['comments'], later['deleted']['comments']), ([], [comment_id]))
+        self.assertEqual(self.feed(later['token'])['deleted']['comments'], [])
+
+        # User không liên quan: không nhận gì, token nhảy tới đầu chuỗi
+        self.client.force_authenticate(self.outsider)
+        feed = self.feed()
+        self.assertEqual((feed['tasks'], feed['token']), ([], later['token']))
+
+    def test_late_commit_is_not_skipped(self):
+        self.settle()
+        token = self.feed()['token']
+        late = Task.objects.create(title='Commit muộn', project=self.project, created_by=self.owner)
+        early = Task.objects.create(title='Commit sớm', project=self.project, created_by=self.owner)
+        # Transaction của `late` nhận id trước nhưng chưa commit khi client đọc
+        hidden = SyncChange.objects.get(entity=SyncChange.Entity.TASK, object_id=late.pk)
+        SyncChange.objects.filter(pk=hidden.pk).delete()
+        feed = self.feed(token)
+        self.assertEqual([item['id'] for item in feed['tasks']], [early.pk])
+        self.assertLess(int(feed['token']), hidden.pk)
+
+        hidden.save(force_insert=True)
+        feed = self.feed(feed['token'])
+        self.assertEqual(sorted(item['id'] for item in feed['tasks']), [late.pk, early.pk])
+
+        # Hết khoảng chờ: token tới đầu chuỗi, lần sau không gửi lại gì
+        self.settle()
+        token = self.feed(feed['token'])['token']
+        self.assertEqual(token, str(SyncChange.objects.latest('id').id))
+        self.assertEqual(self.feed(token)['tasks'], [])
+
+
+class MetricsTests(APITestCase):
+    """/metrics cần token khi DEBUG=False; cache do code tự đọc (phụ thuộc, rate limit, ghim primary) có số hit / miss."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def lookups(self, cache_name, func):
+        """(hit, miss) tăng thêm khi chạy func."""
+        def counts():
+            return [
+                metrics.registry.counters.get(('cache_requests_total', (('cache', cache_name), ('result', result))), 0)
+                for result in ('hit', 'miss')
+            ]
+        before = counts()
+        func()
+        return tuple(after - earlier for after, earlier in zip(counts(), before))
+
+    def test_dependency_analysis_cache(self):
+        owner = User.objects.create_user('owner')
+        project = Project.objects.create(name='Dự án', owner=owner)
+        first, second = (Task.objects.create(title=title, project=project, created_by=owner) for title in ('Một', 'Hai'))
+        dependencies.add_dependency(second, first)
+        self.assertEqual(self.lookups('task_dependencies', lambda: dependencies.project_analysis(project)), (0, 1))
+        self.assertEqual(self.lookups('task_dependencies', lambda: dependencies.project_analysis(project)), (1, 0))
+
+    @override_settings(RATE_LIMITS={'list': '5/min'})
+    def test_rate_limit_buckets_and_replica_pins(self):
+        self.client.force_authenticate(User.objects.create_user('owner'))
+        self.assertEqual(self.lookups('rate_limit', lambda: self.client.get(reverse('project-list'))), (0, 1))
+        self.assertEqual(self.lookups('rate_limit', lambda: self.client.get(reverse('project-list'))), (1, 0))
+        self.assertEqual(self.lookups('db_pin', lambda: db_router.is_pinned(42)), (0, 1))
+        db_router.pin_user(42)
+        self.assertEqual(self.lookups('db_pin', lambda: db_router.is_pinned(42)), (1, 0))
+
+    def test_token_required_in_production(self):
+        url = reverse('metrics')
+        with override_settings(DEBUG=False, METRICS_TOKEN=''):
+            self.assertEqual(self.client.get(url).status_code, 403)
+        with override_settings(DEBUG=False, METRICS_TOKEN='bi-mat'):
+            self.assertEqual(self.client.get(url).status_code, 401)
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer bi-mat').status_code, 200)
+        db_router.is_pinned(42)
+        with override_settings(DEBUG=True, METRICS_TOKEN=''):
+            body = self.client.get(url).content.decode()
+        self.assertIn('cache_hit_ratio{cache="db_pin"}', body)
+
+    def test_unread_backlog_is_counted_once_per_ttl(self):
+        owner = User.objects.create_user('owner')
+        Notification.objects.create(recipient=owner, title='Một', message='...')
+        self.assertIn('notification_unread_backlog 1', metrics.render())
+        Notification.objects.create(recipient=owner, title='Hai', message='...')
+        with CaptureQueriesContext(connection) as queries:
+            body = metrics.render()
+        self.assertEqual((len(queries), 'notification_unread_backlog 1' in body), (0, True))
+        cache.delete(metrics.DATABASE_GAUGES_KEY)
+        self.assertIn('notification_unread_backlog 2', metrics.render())
+
+    def test_failing_collector_is_logged(self):
+        def broken(registry):
+            raise RuntimeError('pool hỏng')
+        metrics.register_collector(broken)
+        self.addCleanup(metrics._collectors.remove, broken)
+        with self.assertLogs('API.metrics', 'ERROR') as logs:
+            self.assertIn('# TYPE', metrics.render())
+        self.assertIn('broken', logs.output[0])
+
+    def test_dead_process_files_are_folded(self):
+        labels = [['view', 'da-dung']]
+        dead = {
+            'counters': [['http_requests_total', labels, 2]],
+            'gauges': [['http_requests_in_flight', labels, 1]],
+            'histograms': [['http_request_duration_seconds', labels, {'buckets': [0.1, 1.0], 'counts': [1, 1], 'sum': 0.6, 'count': 2}]],
+        }
+        key = ('http_requests_total', (('view', 'da-dung'),))
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            # pid không thể tồn tại -> process đã chết
+            for name in ('999999998-1.json', '999999999-1.json'):
+                with open(os.path.join(directory, name), 'w') as handle:
+                    json.dump(dead, handle)
+            for _ in range(2):
+                counters, gauges, histograms = metrics.collect()
+                self.assertEqual(counters[key], 4)
+                self.assertEqual(histograms[('http_request_duration_seconds', key[1])]['counts'], [2, 2])
+                self.assertNotIn(('http_requests_in_flight', key[1]), gauges)
+                self.assertEqual(sorted(os.listdir(directory)), sorted([os.path.basename(metrics._file_path(directory)), metrics.RETIRED_FILE]))
+
+
+class ServerTimingTests(APITestCase):
+    """Header Server-Timing khi bật; khi tắt, số liệu cho /metrics không đo span."""
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('owner'))
+
+    def test_list_serializers_are_timed(self):
+        for serializer_class in TimedSerializerMixin.__subclasses__():
+            self.assertIsInstance(serializer_class(many=True), TimedListSerializer, serializer_class.__name__)
+        listing = TaskSerializer([], many=True, allow_empty=None)
+        self.assertTrue(listing.allow_empty)
+        self.assertNotIn('allow_empty', listing.child._kwargs)
+
+    @override_settings(PERF_INSTRUMENTATION_ENABLED=True, PERF_SAMPLE_RATE=1.0)
+    def test_header_format(self):
+        header = self.client.get(reverse('project-list'))['Server-Timing']
+        self.assertRegex(header, r'^db;dur=\d+\.\d;desc="\d+ queries"(, [a-z_]+;dur=\d+\.\d)*, total;dur=\d+\.\d$')
+        names = [part.split(';', 1)[0] for part in header.split(', ')]
+        self.assertEqual((names[0], names[-1]), ('db', 'total'))
+        self.assertTrue({'view', 'perm', 'serialize'} <= set(names), names)
+
+    @override_settings(PERF_INSTRUMENTATION_ENABLED=False)
+    def test_disabled_path(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('project-list')))
+        instrumentation.install_db_instrumentation()
+        with instrumentation.collecting(spans=False) as request_metrics:
+            self.assertIs(instrumentation.span('view'), instrumentation.span('serialize'))
+            instrumentation.tag('db_route', 'default:primary')
+            User.objects.count()
+        self.assertEqual((request_metrics.spans, request_metrics.tags, request_metrics.db_queries), ({}, {}, 1))
+
+
+class BenchmarkTests(TestCase):
+    """Percentile nearest-rank của bộ đo và dữ liệu giả lập tái lập được theo seed."""
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 21))
+        self.assertEqual([benchmark.percentile(values, fraction) for fraction in (0, 0.05, 0.5, 0.51, 0.95, 1)], [1, 1, 10, 11, 19, 20])
+        self.assertEqual(benchmark.percentile([7], 0.99), 7)
+        self.assertEqual(benchmark.percentile([], 0.5), 0.0)
+
+    def seed(self, prefix, seed):
+        call_command(
+            'seed_data', users=15, projects=4, tasks_per_project=5, personal_tasks_per_user=1, comments_per_task=1,
+            notifications_per_user=2, seed=seed, prefix=prefix, stdout=StringIO(),
+        )
+        users = {pk: i for i, pk in enumerate(User.objects.filter(username__startswith=f'{prefix}_').order_by('id').values_list('id', flat=True))}
+        projects = Project.objects.filter(owner_id__in=users).order_by('id').prefetch_related('members', 'tasks')
+        return [
+            (
+                users[project.owner_id],
+                sorted(users[member.pk] for member in project.members.all()),
+                [(task.status, task.priority, task.due_date is None, users.get(task.assignee_id))
+                 for task in sorted(project.tasks.all(), key=lambda task: task.pk)],
+            )
+            for project in projects
+        ], Comment.objects.filter(author_id__in=users).count(), Notification.objects.filter(recipient_id__in=users).count()
+
+    def test_seed_data_is_deterministic(self):
+        first = self.seed('mot', seed=7)
+        self.assertEqual(self.seed('hai', seed=7), first)
+        self.assertNotEqual(self.seed('ba', seed=8), first)
+
+
+class ActivityLogTests(TestCase):
+    """Nhật ký có cấu trúc: diff trường, to_status, loại / tên đối tượng và câu hiển thị (kể cả bản ghi cũ)."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.member = User.objects.create_user('member')
+        self.project = Project.objects.create(name='Dự án', owner=self.owner)
+        self.task = Task.objects.create(title='Viết báo cáo', project=self.project, created_by=self.owner)
+
+    def test_diff_only_changed_fields(self):
+        before = snapshot_task(self.task)
+        self.assertEqual(diff_task(before, self.task), {})
+        self.task.status, self.task.priority, self.task.assignee = Task.Status.IN_PROGRESS, Task.Priority.HIGH, self.member
+        self.task.title = 'Viết báo cáo tuần'
+        self.assertEqual(diff_task(before, self.task), {
+            'status': ['TODO', 'INPR'],
+            'priority': [before['priority'], 'HIGH'],
+            'assignee': [None, self.member.pk],
+            'title': ['Viết báo cáo', 'Viết báo cáo tuần'],
+        })
+
+    def test_to_status(self):
+        created = create_activity_log(self.owner, ActivityLog.Verb.TASK_CREATED, project=self.project, task=self.task)
+        self.assertEqual(created.to_status, 'TODO')
+        moved = create_activity_log(
+            self.owner, ActivityLog.Verb.TASK_UPDATED, project=self.project, task=self.task, changes={'status': ['TODO', 'DONE']},
+        )
+        self.assertEqual(moved.to_status, 'DONE')
+        renamed = create_activity_log(
+            self.owner, ActivityLog.Verb.TASK_UPDATED, project=self.project, task=self.task, changes={'title': ['a', 'b']},
+        )
+        self.assertIsNone(renamed.to_status)
+
+    def test_targets(self):
+        logs = [
+            create_activity_log(self.owner, ActivityLog.Verb.PROJECT_UPDATED, project=self.project, target=self.project),
+            create_activity_log(self.owner, ActivityLog.Verb.COMMENT_ADDED, project=self.project, task=self.task),
+            create_activity_log(self.owner, ActivityLog.Verb.MEMBER_ADDED, project=self.project, target=self.member),
+        ]
+        self.assertEqual(
+            [(log.target_type, log.target_id, log.target_name) for log in logs],
+            [('project', self.project.pk, 'Dự án'), ('task', self.task.pk, 'Viết báo cáo'), ('user', self.member.pk, 'member')],
+        )
+        self.assertEqual(logs[2].render_description(), "Thêm thành viên 'member' vào dự án 'Dự án'")
+
+    def test_render_description(self):
+        log = create_activity_log(
+            self.owner, ActivityLog.Verb.TASK_UPDATED, project=self.project, task=self.task,
+            changes={'status': ['TODO', 'INPR'], 'assignee': [None, self.member.pk], 'priority': ['LOW', 'HIGH']},
+        )
+        self.assertEqual(
+            log.render_description(),
+            f"đã cập nhật công việc 'Viết báo cáo' (trạng thái: To Do → In Progress, người được giao: — → #{self.member.pk}, "
+            "độ ưu tiên: Low → High)",
+        )
+        # Bản ghi cũ (trước khi có verb): hiển thị nguyên câu mô tả đã lưu
+        legacy = ActivityLog.objects.create(actor=self.owner, project=self.project, action_description='đã tạo công việc X')
+        self.assertEqual(legacy.render_description(), 'đã tạo công việc X')
+        self.assertTrue(str(legacy).startswith('owner đã tạo công việc X at '))
@@ -0,0 +1,182 @@
+"""
+Giới hạn tần suất (token bucket) và cắt tải (load shedding).
+
+TokenBucketThrottle (DEFAULT_THROTTLE_CLASSES): chỉ áp dụng cho view có `throttle_scope`
+(tên scope hoặc {method: scope}). Mỗi (scope, user / IP) có một bucket `N/chu kỳ` trong RATE_LIMITS:
+chứa tối đa N token, hồi đều N token mỗi chu kỳ. Cài bằng GCRA nên mỗi bucket chỉ là 1 khóa cache
+(thời điểm bucket đầy trở lại) -> dùng chung giữa các worker khi có REDIS_URL. Đọc rồi ghi không
+nguyên tử: khi tranh chấp có thể lọt thêm vài request, chấp nhận được cho mục đích chống spam.
+
+LoadSheddingMiddleware: khi số request đang xử lý trong process hoặc độ trễ trung bình gần đây
+vượt ngưỡng, từ chối sớm (503 + Retry-After) theo mức ưu tiên của view (`load_priority`):
+low bị cắt trước, rồi normal, high; critical không bao giờ bị cắt.
+"""
+import math
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60)."""
+    try:
+        count, period = rate.split('/')
+        return int(count), PERIODS[period.strip()]
+    except (ValueError, KeyError):
+        raise ImproperlyConfigured(f"RATE_LIMITS: giá trị '{rate}' không hợp lệ (vd: 10/min, 5/hour).")
+
+
+def scope_for(view, method):
+    scope = getattr(view, 'throttle_scope', None)
+    if isinstance(scope, dict):
+        return scope.get(method)
+    return scope
+
+
+# SECTION: Token bucket
+class TokenBucketThrottle(BaseThrottle):
+    cache_format = 'rl:{scope}:{ident}'
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_cache_key(self, request, scope):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            ident = f'u{user.pk}'
+        else:
+            ident = f'ip{self.get_ident(request)}'
+        return self.cache_format.format(scope=scope, ident=ident)
+
+    def allow_request(self, request, view):
+        scope = scope_for(view, request.method)
+        rate = settings.RATE_LIMITS.get(scope) if scope else None
+        if not rate:
+            return True
+        capacity, period = parse_rate(rate)
+        interval = period / capacity
+        key = self.get_cache_key(request, scope)
+
+        # GCRA: tat = thời điểm bucket đầy lại; còn token nếu tat không vượt quá now + period
+        now = time.time()
+        stored = cache.get(key)
+        metrics.observe_cache('rate_limit', stored is not None)
+        tat = max(stored if stored is not None else now, now)
+        new_tat = tat + interval
+        allow_at = new_tat - period
+        if now < allow_at:
+            self.retry_after = allow_at - now
+            metrics.registry.inc('rate_limited_total', scope=scope)
+            return False
+        cache.set(key, new_tat, timeout=math.ceil(new_tat - now))
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+# SECTION: Cắt tải
+# Ngưỡng (tỉ lệ so với LOAD_SHED_MAX_IN_FLIGHT / LOAD_SHED_LATENCY_TARGET_MS) bắt đầu cắt từng mức
+SHED_THRESHOLDS = {'low': 0.5, 'normal': 0.8, 'high': 1.0}
+# Hệ số làm mượt độ trễ trung bình (EWMA)
+LATENCY_SMOOTHING = 0.1
+
+
+def priority_for(view_class, method):
+    priority = getattr(view_class, 'load_priority', None)
+    if isinstance(priority, dict):
+        priority = priority.get(method)
+    if priority:
+        return priority
+    return 'normal' if method in ('GET', 'HEAD', 'OPTIONS') else 'high'
+
+
+class LoadState:
+    """Số request đang xử lý và độ trễ trung bình (EWMA) của process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.latency = 0.0
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+        return time.perf_counter()
+
+    def leave(self, started):
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.in_flight -= 1
+            self.latency += LATENCY_SMOOTHING * (elapsed - self.latency)
+
+    def load(self):
+        """Mức tải hiện tại (1.0 = chạm ngưỡng), lấy mức cao hơn giữa in-flight và độ trễ."""
+        load = 0.0
+        if settings.LOAD_SHED_MAX_IN_FLIGHT:
+            # Không tính chính request đang được xét
+            load = (self.in_flight - 1) / settings.LOAD_SHED_MAX_IN_FLIGHT
+        if settings.LOAD_SHED_LATENCY_TARGET_MS:
+            load = max(load, self.latency * 1000 / settings.LOAD_SHED_LATENCY_TARGET_MS)
+        return load
+
+
+state = LoadState()
+
+
+@metrics.register_collector
+def _load_gauges(registry):
+    registry.set_gauge('load_shed_latency_ewma_seconds', state.latency)
+
+
+class LoadSheddingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.LOAD_SHED_MAX_IN_FLIGHT and not settings.LOAD_SHED_LATENCY_TARGET_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = state.enter()
+        try:
+            return self.get_response(request)
+        finally:
+            state.leave(started)
+
+    async def __acall__(self, request):
+        started = state.enter()
+        try:
+            return await self.get_response(request)
+        finally:
+            state.leave(started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        priority = priority_for(view_class, request.method)
+        threshold = SHED_THRESHOLDS.get(priority)
+        if threshold is None or state.load() < threshold:
+            return None
+        metrics.registry.inc('load_shed_total', priority=priority)
+        response = JsonResponse(
+            {"error": "Hệ thống đang quá tải, vui lòng thử lại sau ít giây."},
+            status=503,
+        )
+        response['Retry-After'] = str(settings.LOAD_SHED_RETRY_AFTER)
+        return response
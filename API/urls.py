@@ -1,6 +1,23 @@
+from django.conf import settings
 from django.urls import path
 from . import views
-from rest_framework_simplejwt.views import TokenRefreshView
+
+# Dưới ASGI: các endpoint đọc nhiều dùng view async (API/async_views.py), cùng URL / quyền / response
+if settings.ASYNC_VIEWS_ENABLED:
+    from . import async_views as read_views
+    TaskListView = read_views.AsyncTaskListView
+    PersonalTaskListView = read_views.AsyncPersonalTaskListView
+    TaskDetailView = read_views.AsyncTaskDetailView
+    ActivityLogProjectView = read_views.AsyncActivityLogProjectView
+    ActivityLogTaskView = read_views.AsyncActivityLogTaskView
+    NotificationListView = read_views.AsyncNotificationListView
+else:
+    TaskListView = views.TaskListView
+    PersonalTaskListView = views.PersonalTaskListView
+    TaskDetailView = views.TaskDetailView
+    ActivityLogProjectView = views.ActivityLogProjectView
+    ActivityLogTaskView = views.ActivityLogTaskView
+    NotificationListView = views.NotificationListView
 
 urlpatterns = [
     # Xác thực
@@ -9,10 +26,11 @@ urlpatterns = [
     path('set-password/', views.SetPasswordView.as_view(), name='set-password'),
     path('forgot-password/', views.ForgotPasswordView.as_view(), name='forgot-password'),
     path('reset-password/', views.ResetPasswordView.as_view(), name='reset-password'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', views.RefreshTokenView.as_view(), name='token_refresh'),
 
     # Users
     path('users/', views.UserListView.as_view(), name='user-list'),
+    path('users/suggest/', views.UserSuggestView.as_view(), name='user-suggest'),
     path('users/<int:pk>/', views.UserDetailView.as_view(), name='user-detail'),
 
     # Projects
@@ -20,17 +38,26 @@ urlpatterns = [
     path('projects/<int:pk>/', views.ProjectDetailView.as_view(), name='project-detail'),
     path('projects/<int:pk>/add_member/', views.AddMemberView.as_view(), name='project-add-member'),
     path('projects/<int:pk>/remove_member/', views.RemoveMemberView.as_view(), name='project-remove-member'),
+    path('projects/<int:pk>/members/', views.ProjectMembersView.as_view(), name='project-members'),
 
     # --- CẬP NHẬT URLS TASK ---
     
     # 1. Task Dự án (Giữ nguyên)
-    path('projects/<int:pk>/tasks/', views.TaskListView.as_view(), name='project-task-list'),
+    path('projects/<int:pk>/tasks/', TaskListView.as_view(), name='project-task-list'),
+    path('projects/<int:pk>/board/', views.ProjectBoardView.as_view(), name='project-board'),
+    path('projects/<int:pk>/dependencies/', views.ProjectDependencyView.as_view(), name='project-dependencies'),
     
     # 2. Task Cá nhân (MỚI)
-    path('my-tasks/', views.PersonalTaskListView.as_view(), name='personal-task-list'),
+    path('my-tasks/', PersonalTaskListView.as_view(), name='personal-task-list'),
+    # Việc được giao cho mình trên mọi dự án + việc cá nhân
+    path('my-work/', views.MyWorkView.as_view(), name='my-work'),
 
     # 3. Task Detail (Dùng chung cho cả 2 loại, bỏ project_pk ở url)
-    path('tasks/<int:pk>/', views.TaskDetailView.as_view(), name='task-detail'),
+    path('tasks/<int:pk>/', TaskDetailView.as_view(), name='task-detail'),
+    path('tasks/<int:pk>/move/', views.TaskMoveView.as_view(), name='task-move'),
+    path('tasks/<int:pk>/occurrences/', views.TaskOccurrenceView.as_view(), name='task-occurrences'),
+    path('tasks/<int:pk>/dependencies/', views.TaskDependencyListView.as_view(), name='task-dependency-list'),
+    path('tasks/<int:pk>/dependencies/<int:blocked_by_pk>/', views.TaskDependencyDetailView.as_view(), name='task-dependency-detail'),
     # --------------------------
 
     # Comments (hoạt động với cả Task dự án và Task cá nhân)
@@ -42,15 +69,30 @@ urlpatterns = [
     path('tasks/<int:task_pk>/attachments/<int:pk>/', views.AttachmentDetailView.as_view(), name='task-attachment-detail'),
 
     # Activity Logs
-    path('projects/<int:pk>/activity/', views.ActivityLogProjectView.as_view(), name='project-activity-log'),
-    path('tasks/<int:task_pk>/activity/', views.ActivityLogTaskView.as_view(), name='task-activity-log'),
+    path('projects/<int:pk>/activity/', ActivityLogProjectView.as_view(), name='project-activity-log'),
+    path('tasks/<int:task_pk>/activity/', ActivityLogTaskView.as_view(), name='task-activity-log'),
+
+    # Analytics (đọc từ bảng rollup theo ngày)
+    path('projects/<int:pk>/analytics/burndown/', views.ProjectBurndownView.as_view(), name='project-analytics-burndown'),
+    path('projects/<int:pk>/analytics/throughput/', views.ProjectThroughputView.as_view(), name='project-analytics-throughput'),
+    path('projects/<int:pk>/analytics/cycle-time/', views.ProjectCycleTimeView.as_view(), name='project-analytics-cycle-time'),
 
 
     # Google Login
     path('google-login/', views.GoogleLoginView.as_view(), name='google-login'),
 
     # Notifications
-    path('notifications/', views.NotificationListView.as_view(), name='notification-list'),
+    path('notifications/', NotificationListView.as_view(), name='notification-list'),
     path('notifications/<int:pk>/read/', views.NotificationMarkAsReadView.as_view(), name='notification-mark-read'),
     path('notifications/read-all/', views.NotificationMarkAllAsReadView.as_view(), name='notification-mark-all-read'),
+    path('notifications/preferences/', views.NotificationPreferenceView.as_view(), name='notification-preferences'),
+
+    # Tiến độ xóa dự án / task ở nền
+    path('deletion-jobs/<int:pk>/', views.DeletionJobDetailView.as_view(), name='deletion-job-detail'),
+
+    # Đồng bộ delta (mobile / offline)
+    path('sync/', views.SyncView.as_view(), name='sync'),
+
+    # Metrics cho Prometheus
+    path('metrics', views.MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
@@ -2,18 +2,20 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.exceptions import PermissionDenied, NotFound
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import render
-from django.core.mail import send_mail
+from django.http import HttpResponse
+from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_datetime
+from datetime import date, timedelta
 import os
 import uuid
 
-from .models import User, Project, Task, Comment, Attachment, ActivityLog, PasswordResetToken, Notification
+from .models import User, Project, Task, Comment, Attachment, ActivityLog, PasswordResetToken, Notification, SyncChange, DeletionJob, OutboundEmail, TaskDependency
 from .serializers import (
     SignupSerializer, 
     UserSerializer, 
@@ -28,8 +30,12 @@ from .serializers import (
     ForgotPasswordSerializer,
     ResetPasswordSerializer,
     NotificationSerializer,
+    NotificationPreferenceSerializer,
+    DeletionJobSerializer,
+    TaskDependencySerializer,
 )
 from .permissions import (
+    is_project_member,
     CanViewProjectList,
     IsProjectOwnerOrMember,
     CanViewTaskList,
@@ -37,8 +43,11 @@ from .permissions import (
     IsCommentOrAttachmentOwner,
     CanViewActivityLog,
     IsProjectOwnerOnly,
+    CanManageTaskDependencies,
 )
 from .filters import TaskFilter, ProjectFilter, UserFilter
+from .instrumentation import span
+from . import analytics, board, dependencies, members, metrics, my_work, notifications, outbox, purge, ranking, recurrence, search, sync
 
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
@@ -46,32 +55,108 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.conf import settings
 
 
-def create_activity_log(user, action_description, project=None, task=None):
-    ActivityLog.objects.create(
+# APIView gốc cho các view của app: đo thời gian kiểm tra quyền / toàn bộ view (Server-Timing)
+# query_budget: số query tối đa của một request (int hoặc {method: int}), được kiểm tra bởi
+# API/tests.py và QueryBudgetMiddleware khi dev. Tăng ngân sách phải có lý do, không tăng theo dữ liệu.
+# throttle_scope: scope giới hạn tần suất trong RATE_LIMITS (str hoặc {method: str}, không có = không giới hạn)
+# load_priority: low / normal / high / critical khi cắt tải (mặc định: đọc = normal, ghi = high), xem API/throttling.py
+class BaseAPIView(APIView):
+    def dispatch(self, request, *args, **kwargs):
+        with span('view'):
+            return super().dispatch(request, *args, **kwargs)
+
+    def check_permissions(self, request):
+        with span('perm'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with span('perm'):
+            super().check_object_permissions(request, obj)
+
+
+# Các trường của Task được ghi diff vào ActivityLog.changes
+TRACKED_TASK_FIELDS = ('status', 'priority', 'assignee', 'due_date', 'title')
+
+
+def snapshot_task(task):
+    """Chụp giá trị các trường cần theo dõi trước khi cập nhật task."""
+    return {
+        'status': task.status,
+        'priority': task.priority,
+        'assignee': task.assignee_id,
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+        'title': task.title,
+    }
+
+
+def diff_task(before, task):
+    """So sánh snapshot cũ với task sau khi lưu -> {field: [cũ, mới]} (chỉ trường thay đổi)."""
+    after = snapshot_task(task)
+    return {
+        field: [before[field], after[field]]
+        for field in TRACKED_TASK_FIELDS
+        if before[field] != after[field]
+    }
+
+
+def create_activity_log(user, verb, project=None, task=None, target=None, changes=None):
+    """
+    Ghi một sự kiện có cấu trúc.
+    - target: đối tượng bị tác động (Project / Task / User), mặc định là task
+    - changes: diff các trường {field: [cũ, mới]}
+    """
+    target = target if target is not None else task
+    changes = changes or {}
+    to_status = None
+    if 'status' in changes:
+        to_status = changes['status'][1]
+    elif verb == ActivityLog.Verb.TASK_CREATED and task is not None:
+        to_status = task.status
+
+    target_type, target_name = '', ''
+    if isinstance(target, Project):
+        target_type, target_name = ActivityLog.TargetType.PROJECT, target.name
+    elif isinstance(target, Task):
+        target_type, target_name = ActivityLog.TargetType.TASK, target.title
+    elif isinstance(target, User):
+        target_type, target_name = ActivityLog.TargetType.USER, target.username
+
+    log = ActivityLog.objects.create(
         actor=user,
-        action_description=action_description,
+        verb=verb,
+        target_type=target_type,
+        target_id=target.pk if target is not None else None,
+        target_name=target_name,
+        changes=changes,
+        to_status=to_status,
         project=project,
         task=task
     )
+    analytics.record_event(log)
+    return log
+
 
+def log_completed_occurrence(user, series, done):
+    """
+    Lần lặp vừa hoàn thành (recurrence.complete) được ghi như task mới ở trạng thái DONE; task của chuỗi chỉ
+    sang hạn kế tiếp nên nhật ký của nó không có bước chuyển trạng thái (rollup không đếm trùng / đếm sót).
+    """
+    if done is not None and not series.is_personal:
+        create_activity_log(user, ActivityLog.Verb.TASK_CREATED, project=series.project, task=done)
 
-def create_notification(recipient, title, message, project=None, task=None):
+
+def create_notification(recipient, title, message, project=None, task=None, kind=Notification.Kind.OTHER, actor=None):
     """
     Helper function để tạo Notification
-    Tránh tạo ở nhiều nơi, tập trung logic ở một chỗ
+    Tránh tạo ở nhiều nơi, tập trung logic ở một chỗ (gộp / tóm tắt: API/notifications.py)
     """
-    Notification.objects.create(
-        recipient=recipient,
-        title=title,
-        message=message,
-        project=project,
-        task=task
-    )
+    notifications.notify([recipient], kind, title, message, actor=actor, project=project, task=task)
 
 
 # SIGNUP
-class SignupView(APIView):
+class SignupView(BaseAPIView):
     permission_classes = [AllowAny]
+    query_budget = 3
     def post(self, request):
         user = SignupSerializer(data=request.data)
         if user.is_valid():
@@ -83,11 +168,22 @@ class SignupView(APIView):
 # LOGIN
 class LoginView(TokenObtainPairView):
     permission_classes = [AllowAny]
+    query_budget = 2
+    throttle_scope = 'login'
+    load_priority = 'high'
+
+
+# REFRESH TOKEN
+class RefreshTokenView(TokenRefreshView):
+    permission_classes = [AllowAny]
+    query_budget = 13
+    load_priority = 'high'
 
 
 # SET PASSWORD (cho user Google hoặc user muốn set password lần đầu)
-class SetPasswordView(APIView):
+class SetPasswordView(BaseAPIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 2
     
     def post(self, request):
         serializer = SetPasswordSerializer(data=request.data)
@@ -112,8 +208,11 @@ class SetPasswordView(APIView):
 
 
 # FORGOT PASSWORD (Bước 1: User nhập email)
-class ForgotPasswordView(APIView):
+class ForgotPasswordView(BaseAPIView):
     permission_classes = [AllowAny]
+    query_budget = 5
+    throttle_scope = 'password_reset'
+    load_priority = 'low'
     
     def post(self, request):
         serializer = ForgotPasswordSerializer(data=request.data)
@@ -172,20 +271,8 @@ class ForgotPasswordView(APIView):
         Task Management System
         """
         
-        try:
-            send_mail(
-                subject,
-                message,
-                'noreply@taskmanagementsystem.com',
-                [user.email],
-                fail_silently=False,
-            )
-        except Exception as e:
-            print(f"Email sending error: {str(e)}")
-            return Response(
-                {"error": "Không thể gửi email. Vui lòng thử lại sau."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # Gửi qua hàng đợi (lệnh send_queued_mail): mail server chậm / lỗi không ảnh hưởng request
+        outbox.enqueue(user.email, subject, message, kind=OutboundEmail.Kind.PASSWORD_RESET)
         
         return Response(
             {"message": "Email reset mật khẩu đã được gửi. Vui lòng kiểm tra email của bạn."},
@@ -194,8 +281,10 @@ class ForgotPasswordView(APIView):
 
 
 # RESET PASSWORD (Bước 2: User set password mới với token)
-class ResetPasswordView(APIView):
+class ResetPasswordView(BaseAPIView):
     permission_classes = [AllowAny]
+    query_budget = 4
+    throttle_scope = 'password_reset'
     
     def post(self, request):
         serializer = ResetPasswordSerializer(data=request.data)
@@ -236,8 +325,11 @@ class ResetPasswordView(APIView):
 
 
 # USER LIST
-class UserListView(APIView):
+class UserListView(BaseAPIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 2
+    throttle_scope = 'list'
+    load_priority = 'low'
     def get(self, request):
         queryset = User.objects.all().only('id', 'username', 'first_name', 'last_name', 'email')
         filterset = UserFilter(request.GET, queryset=queryset, request=request)
@@ -247,9 +339,36 @@ class UserListView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+# USER SUGGEST (typeahead cho ô chọn thành viên)
+class UserSuggestView(BaseAPIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 4
+    throttle_scope = 'suggest'
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.GET.get('limit', search.SUGGEST_LIMIT)), search.SUGGEST_MAX_LIMIT))
+        except ValueError:
+            return Response({"error": "limit phải là số nguyên."}, status=status.HTTP_400_BAD_REQUEST)
+
+        project = None
+        if request.GET.get('project'):
+            try:
+                project = Project.objects.only('id', 'owner_id').get(pk=request.GET['project'])
+            except (Project.DoesNotExist, ValueError):
+                return Response({"error": "Dự án không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
+            # Chỉ thành viên dự án mới xem được danh sách thành viên
+            if not request.user.is_staff and project.owner_id != request.user.pk and not is_project_member(request.user, project):
+                return Response({"error": "Bạn không có quyền xem thành viên dự án này."}, status=status.HTTP_403_FORBIDDEN)
+
+        users = search.suggest_users(request.GET.get('q', ''), limit=limit, project=project)
+        return Response(UserBasicSerializer(users, many=True).data, status=status.HTTP_200_OK)
+
+
 # USER DETAIL
-class UserDetailView(APIView):
+class UserDetailView(BaseAPIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 2
     def get(self, request, pk):
         try:
             user = User.objects.get(pk=pk)
@@ -260,10 +379,12 @@ class UserDetailView(APIView):
 
 
 # PROJECT LIST / CREATE
-class ProjectListView(APIView):
+class ProjectListView(BaseAPIView):
     permission_classes = [IsAuthenticated, CanViewProjectList]
+    query_budget = {'GET': 3, 'POST': 13}
+    throttle_scope = {'GET': 'list'}
     def get(self, request):
-        project = self.permission_classes[1]().filter_queryset(request)
+        project = self.permission_classes[1]().filter_queryset(request).select_related('owner').prefetch_related('members')
         filterset = ProjectFilter(request.GET, queryset=project, request=request)
         if filterset.is_valid():
             project = filterset.qs
@@ -275,17 +396,18 @@ class ProjectListView(APIView):
         if serializer.is_valid():
             project = serializer.save(owner=request.user)
             project.members.add(request.user)
-            create_activity_log(request.user, f"Tạo dự án mới: {project.name}", project=project)
+            create_activity_log(request.user, ActivityLog.Verb.PROJECT_CREATED, project=project, target=project)
             return Response(ProjectSerializer(project).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 # PROJECT DETAIL
-class ProjectDetailView(APIView):
+class ProjectDetailView(BaseAPIView):
     permission_classes = [IsAuthenticated, IsProjectOwnerOrMember]
+    query_budget = {'GET': 3, 'PUT': 6, 'PATCH': 6, 'DELETE': 14}
     def get(self, request, pk):
         try:
-            project = Project.objects.get(pk=pk)
+            project = Project.objects.select_related('owner').prefetch_related('members').get(pk=pk)
         except Project.DoesNotExist:
             raise NotFound("Dự án không tồn tại.")
         self.check_object_permissions(request, project)
@@ -301,7 +423,7 @@ class ProjectDetailView(APIView):
         serializer = ProjectSerializer(project, data=request.data)
         if serializer.is_valid():
             serializer.save()
-            create_activity_log(request.user, f"đã cập nhật thông tin dự án '{project.name}'", project=project)
+            create_activity_log(request.user, ActivityLog.Verb.PROJECT_UPDATED, project=project, target=project)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -314,7 +436,7 @@ class ProjectDetailView(APIView):
         serializer = ProjectSerializer(project, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            create_activity_log(request.user, f"đã cập nhật một phần dự án '{project.name}'", project=project)
+            create_activity_log(request.user, ActivityLog.Verb.PROJECT_UPDATED, project=project, target=project)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -324,15 +446,17 @@ class ProjectDetailView(APIView):
         except Project.DoesNotExist:
             raise NotFound("Dự án không tồn tại.")
         self.check_object_permissions(request, project)
-        project_name = project.name
-        project.delete()
-        create_activity_log(request.user, f"đã xóa dự án '{project_name}'")
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        # Ghi log trước khi xóa để còn giữ được id/tên dự án trong sự kiện
+        create_activity_log(request.user, ActivityLog.Verb.PROJECT_DELETED, target=project)
+        # Chỉ ẩn dự án + xếp job, dữ liệu con được dọn theo lô ở nền (API/purge.py)
+        job = purge.delete_project(request.user, project)
+        return Response(DeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
 
 # ADD MEMBER
-class AddMemberView(APIView):
+class AddMemberView(BaseAPIView):
     permission_classes = [IsAuthenticated, IsProjectOwnerOnly]
+    query_budget = 17
     def post(self, request, pk):
         try:
             project = Project.objects.get(pk=pk)
@@ -347,26 +471,30 @@ class AddMemberView(APIView):
         except User.DoesNotExist:
             return Response({"error": "Người dùng không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         
-        if user in project.members.all():
+        if is_project_member(user, project):
             return Response({"message": f"{user.username} đã là thành viên."}, status=status.HTTP_200_OK)
               
         project.members.add(user)
-        create_activity_log(request.user, f"Thêm thành viên '{user.username}' vào dự án '{project.name}'", project=project)
+        create_activity_log(request.user, ActivityLog.Verb.MEMBER_ADDED, project=project, target=user)
+        sync.record_project_access(project.pk, [user.pk], SyncChange.Op.UPSERT)
         
         # Tạo thông báo cho user được thêm vào dự án
         create_notification(
             recipient=user,
             title="Bạn đã được thêm vào dự án mới",
             message=f"Bạn vừa được {request.user.username} thêm vào dự án '{project.name}'.",
-            project=project
+            project=project,
+            kind=Notification.Kind.MEMBER_ADDED,
+            actor=request.user,
         )
         
         return Response({"message": f"Đã thêm {user.username} vào dự án."}, status=status.HTTP_200_OK)
 
 
 # REMOVE MEMBER
-class RemoveMemberView(APIView):
+class RemoveMemberView(BaseAPIView):
     permission_classes = [IsAuthenticated, IsProjectOwnerOnly]
+    query_budget = 13
     def post(self, request, pk):
         try:
             project = Project.objects.get(pk=pk)
@@ -380,25 +508,74 @@ class RemoveMemberView(APIView):
             user = User.objects.get(pk=user_id)
         except User.DoesNotExist:
             return Response({"error": "Người dùng không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
-        if user == project.owner:
+        if user.pk == project.owner_id:
             return Response({"error": "Không thể xóa chủ dự án."}, status=status.HTTP_400_BAD_REQUEST)
-        if user not in project.members.all():
+        if not is_project_member(user, project):
             return Response({"message": f"{user.username} không phải là thành viên."}, status=status.HTTP_200_OK)
         project.members.remove(user)
-        create_activity_log(request.user, f"Xóa thành viên '{user.username}' khỏi dự án '{project.name}'", project=project)
+        create_activity_log(request.user, ActivityLog.Verb.MEMBER_REMOVED, project=project, target=user)
+        sync.record_project_access(project.pk, [user.pk], SyncChange.Op.DELETE)
         return Response({"message": f"Đã xóa {user.username} khỏi dự án."}, status=status.HTTP_200_OK)
 
 
+# BULK MEMBERS: PUT = thay cả danh sách ({"member_ids": [...]}), PATCH = {"add": [...], "remove": [...]}
+class ProjectMembersView(BaseAPIView):
+    permission_classes = [IsAuthenticated, IsProjectOwnerOnly]
+    query_budget = 23
+
+    def get_project(self, request, pk):
+        try:
+            project = Project.objects.get(pk=pk)
+        except Project.DoesNotExist:
+            raise NotFound("Dự án không tồn tại.")
+        self.check_object_permissions(request, project)
+        return project
+
+    def put(self, request, pk):
+        project = self.get_project(request, pk)
+        if 'member_ids' not in request.data:
+            return Response({"error": "Thiếu member_ids."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            desired_ids = members.parse_user_ids(request.data.get('member_ids'), 'member_ids')
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self.apply(request, project, *members.member_diff(project, desired_ids=desired_ids))
+
+    def patch(self, request, pk):
+        project = self.get_project(request, pk)
+        try:
+            add_ids = members.parse_user_ids(request.data.get('add'), 'add')
+            remove_ids = members.parse_user_ids(request.data.get('remove'), 'remove')
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not add_ids and not remove_ids:
+            return Response({"error": "Cần ít nhất một trong add / remove."}, status=status.HTTP_400_BAD_REQUEST)
+        return self.apply(request, project, *members.member_diff(project, add_ids=add_ids, remove_ids=remove_ids))
+
+    def apply(self, request, project, to_add, to_remove, unknown):
+        # Có id không tồn tại -> không áp dụng gì cả, tránh thay đổi một nửa
+        if unknown:
+            return Response({"error": "Người dùng không tồn tại.", "unknown_ids": unknown}, status=status.HTTP_404_NOT_FOUND)
+        members.apply_member_changes(request.user, project, to_add, to_remove)
+        return Response({
+            "message": f"Đã thêm {len(to_add)} và xóa {len(to_remove)} thành viên.",
+            "added": [user.pk for user in to_add],
+            "removed": [user.pk for user in to_remove],
+        }, status=status.HTTP_200_OK)
+
 
 # 1. API CHO TASK DỰ ÁN (Project Tasks)
-class TaskListView(APIView):
+class TaskListView(BaseAPIView):
     permission_classes = [IsAuthenticated, CanViewTaskList]
+    query_budget = {'GET': 4, 'POST': 20}
+    throttle_scope = {'GET': 'list'}
     def get(self, request, pk):
         # Lấy task thuộc dự án này VÀ không phải task cá nhân
-        task = self.permission_classes[1]().filter_queryset(request, pk)
+        task = self.permission_classes[1]().filter_queryset(request, pk).select_related('assignee').order_by('status', 'rank', 'id')
         filterset = TaskFilter(request.GET, queryset=task, request=request)
         if filterset.is_valid():
-            task = filterset.qs
+            # Có due_date_before: kèm các lần lặp ảo trong khoảng ngày
+            task = recurrence.with_occurrences(request, task, filterset)
         serializer = TaskSerializer(task, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -409,7 +586,7 @@ class TaskListView(APIView):
             return Response({"error": "Dự án không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         
         # Check quyền: Phải là member hoặc owner mới được tạo task
-        if request.user != project.owner and request.user not in project.members.all():
+        if request.user.pk != project.owner_id and not is_project_member(request.user, project):
              return Response({"error": "Bạn không có quyền tạo task trong dự án này."}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = TaskSerializer(data=request.data, context={'request': request})
@@ -420,22 +597,86 @@ class TaskListView(APIView):
                 is_personal=False,     # BẮT BUỘC FALSE
                 created_by=request.user
             )
-            create_activity_log(request.user, f"Tạo công việc '{task.title}'", project=project, task=task)
+            create_activity_log(request.user, ActivityLog.Verb.TASK_CREATED, project=project, task=task)
             return Response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 
+# BOARD (Kanban): mỗi cột trạng thái gồm tổng số task và `limit` task đầu tiên theo rank, trong một query.
+# Trang tiếp của một cột: ?status=TODO&cursor=<next_cursor>. Nhận cùng bộ lọc với TaskListView (assignee, search...).
+class ProjectBoardView(BaseAPIView):
+    permission_classes = [IsAuthenticated, IsProjectOwnerOrMember]
+    query_budget = 4
+    throttle_scope = 'list'
+
+    def get(self, request, pk):
+        try:
+            project = Project.objects.get(pk=pk)
+        except Project.DoesNotExist:
+            raise NotFound("Dự án không tồn tại.")
+        self.check_object_permissions(request, project)
+
+        column = request.GET.get('status', '').upper()
+        if column and column not in Task.Status.values:
+            return Response({"error": "Trạng thái không hợp lệ."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.GET.get('limit', board.DEFAULT_LIMIT))
+            cursor = board.decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+        except ValueError:
+            return Response({"error": "Tham số limit / cursor không hợp lệ."}, status=status.HTTP_400_BAD_REQUEST)
+        if cursor and not column:
+            return Response({"error": "Cursor chỉ dùng cho một cột (cần tham số status)."}, status=status.HTTP_400_BAD_REQUEST)
+
+        tasks = Task.objects.filter(project=project, is_personal=False).select_related('assignee')
+        filterset = TaskFilter(request.GET, queryset=tasks, request=request)
+        if not filterset.is_valid():
+            return Response({"error": "Bộ lọc không hợp lệ.", "fields": filterset.errors}, status=status.HTTP_400_BAD_REQUEST)
+        tasks = filterset.qs
+        columns = board.build_columns(tasks, limit, cursor, statuses=[column] if column else None)
+        for item in columns:
+            item['tasks'] = TaskSerializer(item['tasks'], many=True).data
+        return Response({'project': project.pk, 'columns': columns}, status=status.HTTP_200_OK)
+
+
+# MY WORK: task được giao cho mình trên mọi dự án + task cá nhân, nhận bộ lọc TaskFilter.
+# ?ordering=due_date|priority, trang tiếp: ?cursor=<next_cursor> (keyset, số query không phụ thuộc số dự án).
+class MyWorkView(BaseAPIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+    throttle_scope = 'list'
+
+    def get(self, request):
+        ordering = request.GET.get('ordering', 'due_date')
+        if ordering not in my_work.ORDERINGS:
+            return Response({"error": "ordering phải là due_date hoặc priority."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.GET.get('limit', my_work.DEFAULT_LIMIT))
+            cursor = my_work.decode_cursor(request.GET['cursor'], ordering) if request.GET.get('cursor') else None
+        except ValueError:
+            return Response({"error": "Tham số limit / cursor không hợp lệ."}, status=status.HTTP_400_BAD_REQUEST)
+
+        tasks = my_work.assigned_tasks(request.user).select_related('assignee')
+        filterset = TaskFilter(request.GET, queryset=tasks, request=request)
+        if filterset.is_valid():
+            tasks = filterset.qs
+        results, next_cursor = my_work.page(tasks, ordering, limit, cursor)
+        return Response({'results': TaskSerializer(results, many=True).data, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)
+
+
 # 2. API CHO TASK CÁ NHÂN (Personal Tasks)
-class PersonalTaskListView(APIView):
+class PersonalTaskListView(BaseAPIView):
     permission_classes = [IsAuthenticated]
+    query_budget = {'GET': 4, 'POST': 12}
+    throttle_scope = {'GET': 'list'}
 
     def get(self, request):
         # Chỉ lấy task do mình tạo VÀ là task cá nhân
-        tasks = Task.objects.filter(created_by=request.user, is_personal=True)
+        tasks = Task.objects.filter(created_by=request.user, is_personal=True).select_related('assignee').order_by('status', 'rank', 'id')
         filterset = TaskFilter(request.GET, queryset=tasks, request=request)
         if filterset.is_valid():
-            tasks = filterset.qs
+            # Có due_date_before: kèm các lần lặp ảo trong khoảng ngày
+            tasks = recurrence.with_occurrences(request, tasks, filterset)
         serializer = TaskSerializer(tasks, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -455,13 +696,14 @@ class PersonalTaskListView(APIView):
 
 
 # 3. GENERIC TASK DETAIL (Dùng chung)
-class TaskDetailView(APIView):
+class TaskDetailView(BaseAPIView):
     permission_classes = [IsAuthenticated, IsTaskPermission]
+    query_budget = {'GET': 3, 'PUT': 16, 'PATCH': 26, 'DELETE': 21}
 
     # Bỏ tham số project_pk, chỉ cần pk của task
     def get(self, request, pk): 
         try:
-            task = Task.objects.get(pk=pk)
+            task = Task.objects.select_related('project', 'assignee').get(pk=pk)
         except Task.DoesNotExist:
             raise NotFound("Công việc không tồn tại.")
         self.check_object_permissions(request, task)
@@ -470,69 +712,254 @@ class TaskDetailView(APIView):
 
     def put(self, request, pk):
         try:
-            task = Task.objects.get(pk=pk)
+            task = Task.objects.select_related('project', 'assignee').get(pk=pk)
         except Task.DoesNotExist:
             raise NotFound("Công việc không tồn tại.")
         self.check_object_permissions(request, task)
         serializer = TaskSerializer(task, data=request.data, context={'request': request})
         if serializer.is_valid():
+            before = snapshot_task(task)
             serializer.save()
+            log_completed_occurrence(request.user, task, serializer.completed_occurrence)
             if not task.is_personal:
-                create_activity_log(request.user, f"đã cập nhật công việc '{task.title}'", project=task.project, task=task)
+                create_activity_log(request.user, ActivityLog.Verb.TASK_UPDATED, project=task.project, task=task, changes=diff_task(before, task))
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def patch(self, request, pk):
         try:
-            task = Task.objects.get(pk=pk)
+            task = Task.objects.select_related('project', 'assignee').get(pk=pk)
         except Task.DoesNotExist:
             raise NotFound("Công việc không tồn tại.")
         self.check_object_permissions(request, task)
         serializer = TaskSerializer(task, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
+            before = snapshot_task(task)
             serializer.save()
+            log_completed_occurrence(request.user, task, serializer.completed_occurrence)
             if not task.is_personal:
-                create_activity_log(request.user, f"đã cập nhật một phần công việc '{task.title}'", project=task.project, task=task)
+                create_activity_log(request.user, ActivityLog.Verb.TASK_UPDATED, project=task.project, task=task, changes=diff_task(before, task))
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, pk):
         try:
-            task = Task.objects.get(pk=pk)
+            task = Task.objects.select_related('project', 'assignee').get(pk=pk)
         except Task.DoesNotExist:
             raise NotFound("Công việc không tồn tại.")
         self.check_object_permissions(request, task)
-        task_title = task.title
         project = task.project
-        task.delete()
         if project:
-            create_activity_log(request.user, f"đã xóa công việc '{task_title}'", project=project)
+            # Ghi log trước khi xóa để còn giữ được id/tên task; task FK sẽ bị SET_NULL
+            create_activity_log(
+                request.user, ActivityLog.Verb.TASK_DELETED, project=project, target=task,
+                changes={'status': [task.status, None]}
+            )
+        job = purge.delete_task(request.user, task)
+        return Response(DeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+# TASK MOVE (kéo thả trên Kanban): {"before_id": id | null, "after_id": id | null, "status": "INPR" (tùy chọn)}
+# before_id = task ngay phía trên, after_id = task ngay phía dưới vị trí mới (null = đầu / cuối cột; cả hai null = cuối cột).
+# Chỉ cập nhật rank (và status nếu đổi cột) của chính task này.
+class TaskMoveView(BaseAPIView):
+    permission_classes = [IsAuthenticated, IsTaskPermission]
+    # Task lặp lại của dự án vào DONE: lần đầu trong ngày còn tạo dòng ProjectDailyStat (+3)
+    query_budget = 16
+
+    def post(self, request, pk):
+        try:
+            task = Task.objects.select_related('project', 'assignee').get(pk=pk)
+        except Task.DoesNotExist:
+            raise NotFound("Công việc không tồn tại.")
+        self.check_object_permissions(request, task)
+
+        new_status = request.data.get('status') or task.status
+        if new_status not in Task.Status.values:
+            return Response({"error": "Trạng thái không hợp lệ."}, status=status.HTTP_400_BAD_REQUEST)
+        neighbour_ids = {}
+        for key in ('before_id', 'after_id'):
+            value = request.data.get(key)
+            if value in (None, ''):
+                neighbour_ids[key] = None
+                continue
+            try:
+                neighbour_ids[key] = int(value)
+            except (TypeError, ValueError):
+                return Response({"error": f"{key} không hợp lệ."}, status=status.HTTP_400_BAD_REQUEST)
+            if neighbour_ids[key] == task.pk:
+                return Response({"error": f"{key} không được là chính task này."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Hàng xóm phải nằm trong cột đích (cùng dự án / người tạo và trạng thái)
+        wanted = [value for value in neighbour_ids.values() if value is not None]
+        found = {neighbour.pk: neighbour for neighbour in ranking.column(task, new_status).filter(pk__in=wanted).only('id', 'rank')}
+        unknown = [value for value in wanted if value not in found]
+        if unknown:
+            return Response(
+                {"error": "Task hàng xóm không tồn tại hoặc không thuộc cột đích.", "unknown_ids": unknown},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        before, after = found.get(neighbour_ids['before_id']), found.get(neighbour_ids['after_id'])
+        if before and after and (before.rank, before.pk) > (after.rank, after.pk):
+            return Response({"error": "before_id phải đứng trước after_id trong cột."}, status=status.HTTP_400_BAD_REQUEST)
+
+        snapshot, old_rank = snapshot_task(task), task.rank
+        try:
+            if before is None and after is None:
+                task.rank = ranking.end_of_column(task, new_status)
+            else:
+                task.rank = ranking.place(task, before, after, new_status)
+        except ValueError:
+            return Response({"error": "Không xếp được vị trí, vui lòng thử lại."}, status=status.HTTP_409_CONFLICT)
+        task.status = new_status
+        # Kéo task lặp lại vào DONE: complete lưu bản đã xong và ghi luôn task của chuỗi (sang lần kế tiếp);
+        # chuỗi đang ở TODO thì giữ nguyên chỗ cũ trong cột
+        if new_status == Task.Status.DONE and snapshot['status'] != Task.Status.DONE and recurrence.is_recurring(task):
+            keep_rank = old_rank if snapshot['status'] == Task.Status.TODO else None
+            log_completed_occurrence(request.user, task, recurrence.complete(task, rank=keep_rank))
+        else:
+            task.save(update_fields=['rank', 'status', 'updated_at'])
+        changes = diff_task(snapshot, task)
+        if changes and not task.is_personal:
+            create_activity_log(request.user, ActivityLog.Verb.TASK_UPDATED, project=task.project, task=task, changes=changes)
+        return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
+
+
+# TASK OCCURRENCES: POST {"due_date": ...} = biến một lần lặp ảo (sau lần kế tiếp) thành task thật để sửa / bình luận
+class TaskOccurrenceView(BaseAPIView):
+    permission_classes = [IsAuthenticated, IsTaskPermission]
+    query_budget = 12
+
+    def post(self, request, pk):
+        try:
+            task = Task.objects.select_related('project', 'assignee').get(pk=pk)
+        except Task.DoesNotExist:
+            raise NotFound("Công việc không tồn tại.")
+        self.check_object_permissions(request, task)
+        if not task.recurrence:
+            return Response({"error": "Công việc này không lặp lại."}, status=status.HTTP_400_BAD_REQUEST)
+        due = parse_datetime(str(request.data.get('due_date') or ''))
+        if due is None:
+            return Response({"error": "due_date không hợp lệ."}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(due):
+            due = timezone.make_aware(due)
+        try:
+            with transaction.atomic():
+                occurrence, created = recurrence.materialize(task, due)
+        except ValueError:
+            return Response({"error": "due_date không phải một lần lặp sắp tới của công việc này."}, status=status.HTTP_400_BAD_REQUEST)
+        if created and not task.is_personal:
+            create_activity_log(request.user, ActivityLog.Verb.TASK_CREATED, project=task.project, task=occurrence)
+        return Response(TaskSerializer(occurrence).data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+# TASK DEPENDENCIES: GET = các task chặn / bị task này chặn, POST {"blocked_by_id": id} = thêm cạnh (từ chối nếu tạo vòng)
+class TaskDependencyListView(BaseAPIView):
+    permission_classes = [IsAuthenticated, CanManageTaskDependencies]
+    query_budget = {'GET': 5, 'POST': 14}
+
+    def get_task(self, request, pk):
+        try:
+            task = Task.objects.select_related('project').get(pk=pk)
+        except Task.DoesNotExist:
+            raise NotFound("Công việc không tồn tại.")
+        self.check_object_permissions(request, task)
+        return task
+
+    def get(self, request, pk):
+        task = self.get_task(request, pk)
+        edges = TaskDependency.objects.select_related('task', 'blocked_by').filter(
+            task__deleted_at__isnull=True, blocked_by__deleted_at__isnull=True,
+        ).order_by('id')
+        return Response({
+            'blocked_by': TaskDependencySerializer(edges.filter(task=task), many=True).data,
+            'blocking': TaskDependencySerializer(edges.filter(blocked_by=task), many=True).data,
+        }, status=status.HTTP_200_OK)
+
+    def post(self, request, pk):
+        task = self.get_task(request, pk)
+        try:
+            blocked_by = Task.objects.get(pk=int(request.data.get('blocked_by_id')))
+        except (TypeError, ValueError):
+            return Response({"error": "blocked_by_id không hợp lệ."}, status=status.HTTP_400_BAD_REQUEST)
+        except Task.DoesNotExist:
+            return Response({"error": "Công việc chặn không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
+        if blocked_by.pk == task.pk:
+            return Response({"error": "Công việc không thể tự chặn chính nó."}, status=status.HTTP_400_BAD_REQUEST)
+        if blocked_by.project_id != task.project_id or blocked_by.is_personal:
+            return Response({"error": "Chỉ được liên kết các công việc trong cùng dự án."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            dependency, created = dependencies.add_dependency(task, blocked_by, request.user)
+        except dependencies.CycleError as e:
+            return Response(
+                {"error": "Không thể thêm: liên kết này tạo vòng phụ thuộc.", "cycle": e.cycle},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        dependency.task, dependency.blocked_by = task, blocked_by
+        return Response(
+            TaskDependencySerializer(dependency).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+# TASK DEPENDENCY DETAIL: DELETE = gỡ liên kết "task bị chặn bởi blocked_by_pk"
+class TaskDependencyDetailView(BaseAPIView):
+    permission_classes = [IsAuthenticated, CanManageTaskDependencies]
+    query_budget = 9
+
+    def delete(self, request, pk, blocked_by_pk):
+        try:
+            task = Task.objects.select_related('project').get(pk=pk)
+        except Task.DoesNotExist:
+            raise NotFound("Công việc không tồn tại.")
+        self.check_object_permissions(request, task)
+        try:
+            dependency = TaskDependency.objects.get(task=task, blocked_by_id=blocked_by_pk)
+        except TaskDependency.DoesNotExist:
+            raise NotFound("Liên kết phụ thuộc không tồn tại.")
+        dependencies.remove_dependency(dependency)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+# PROJECT DEPENDENCIES: đường găng (chuỗi task chưa xong dài nhất) và các task đang bị chặn, cache theo nhóm phụ thuộc
+class ProjectDependencyView(BaseAPIView):
+    permission_classes = [IsAuthenticated, IsProjectOwnerOrMember]
+    query_budget = 6
+
+    def get(self, request, pk):
+        try:
+            project = Project.objects.get(pk=pk)
+        except Project.DoesNotExist:
+            raise NotFound("Dự án không tồn tại.")
+        self.check_object_permissions(request, project)
+        return Response(dependencies.project_analysis(project), status=status.HTTP_200_OK)
+
+
 # COMMENT LIST / CREATE
-class CommentListView(APIView):
+class CommentListView(BaseAPIView):
     permission_classes = [IsAuthenticated, IsTaskPermission]
+    query_budget = {'GET': 4, 'POST': 17}
+    throttle_scope = {'GET': 'list'}
     def get(self, request, task_pk):
         try:
-            task = Task.objects.get(pk=task_pk)
+            task = Task.objects.select_related('project').get(pk=task_pk)
         except Task.DoesNotExist:
             return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         self.check_object_permissions(request, task)
-        comments = Comment.objects.filter(task=task)
+        comments = Comment.objects.filter(task=task).select_related('author')
         serializer = CommentSerializer(comments, many=True)
         return Response(serializer.data)
 
     def post(self, request, task_pk):
         try:
-            task = Task.objects.get(pk=task_pk)
+            task = Task.objects.select_related('project').get(pk=task_pk)
         except Task.DoesNotExist:
             return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         self.check_object_permissions(request, task)
         serializer = CommentSerializer(data=request.data)
         if serializer.is_valid():
             comment = serializer.save(author=request.user, task=task)
-            create_activity_log(request.user, f"Thêm bình luận vào '{task.title}'", project=task.project, task=task)
+            create_activity_log(request.user, ActivityLog.Verb.COMMENT_ADDED, project=task.project, task=task)
             
             # Tối ưu: Dùng set để tracking người nhận notification (tự động loại bỏ trùng lặp)
             recipients_to_notify = set()
@@ -545,42 +972,42 @@ class CommentListView(APIView):
             if task.created_by and task.created_by != request.user:
                 recipients_to_notify.add(task.created_by)
             
-            # Gửi thông báo cho tất cả người trong danh sách (tránh lặp code)
+            # Gửi một lần cho cả danh sách: gộp vào thông báo bình luận chưa đọc gần đây của cùng task
             if recipients_to_notify:
                 comment_preview = comment.body[:50] + ("..." if len(comment.body) > 50 else "")
                 title = f"Bình luận mới trong công việc '{task.title}'"
                 message = f"{request.user.username} đã bình luận: \"{comment_preview}\""
-                
-                for recipient in recipients_to_notify:
-                    create_notification(
-                        recipient=recipient,
-                        title=title,
-                        message=message,
-                        project=task.project,
-                        task=task
-                    )
+                notifications.notify(
+                    recipients_to_notify, Notification.Kind.COMMENT, title, message,
+                    actor=request.user, project=task.project, task=task,
+                )
             
             return Response(CommentSerializer(comment).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 # COMMENT DETAIL
-class CommentDetailView(APIView):
+class CommentDetailView(BaseAPIView):
     permission_classes = [IsAuthenticated, IsCommentOrAttachmentOwner]
+    query_budget = {'GET': 3, 'PUT': 8, 'DELETE': 8}
     def get(self, request, task_pk, pk):
         try:
-            comment = Comment.objects.get(pk=pk, task__pk=task_pk)
+            comment = Comment.objects.select_related('task__project', 'author').get(pk=pk, task__pk=task_pk)
         except Comment.DoesNotExist:
             raise NotFound("Bình luận không tồn tại.")
+        if comment.task.is_deleted():
+            raise NotFound("Bình luận không tồn tại.")
         self.check_object_permissions(request, comment)
         serializer = CommentSerializer(comment)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     def put(self, request, task_pk, pk):
         try:
-            comment = Comment.objects.get(pk=pk, task__pk=task_pk)
+            comment = Comment.objects.select_related('task__project', 'author').get(pk=pk, task__pk=task_pk)
         except Comment.DoesNotExist:
             raise NotFound("Bình luận không tồn tại.")
+        if comment.task.is_deleted():
+            raise NotFound("Bình luận không tồn tại.")
         self.check_object_permissions(request, comment)
         serializer = CommentSerializer(comment, data=request.data)
         if serializer.is_valid():
@@ -590,96 +1017,187 @@ class CommentDetailView(APIView):
 
     def delete(self, request, task_pk, pk):
         try:
-            comment = Comment.objects.get(pk=pk, task__pk=task_pk)
+            comment = Comment.objects.select_related('task__project', 'author').get(pk=pk, task__pk=task_pk)
         except Comment.DoesNotExist:
             raise NotFound("Bình luận không tồn tại.")
+        if comment.task.is_deleted():
+            raise NotFound("Bình luận không tồn tại.")
         self.check_object_permissions(request, comment)
         comment.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 # ATTACHMENT LIST / CREATE
-class AttachmentListView(APIView):
+class AttachmentListView(BaseAPIView):
     permission_classes = [IsAuthenticated, IsTaskPermission]
+    query_budget = {'GET': 4, 'POST': 9}
     parser_classes = [MultiPartParser, FormParser]
+    throttle_scope = {'GET': 'list'}
     def get(self, request, task_pk):
         try:
-            task = Task.objects.get(pk=task_pk)
+            task = Task.objects.select_related('project').get(pk=task_pk)
         except Task.DoesNotExist:
             return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         self.check_object_permissions(request, task)
-        attachments = Attachment.objects.filter(task=task)
+        attachments = Attachment.objects.filter(task=task).select_related('uploader')
         serializer = AttachmentSerializer(attachments, many=True)
         return Response(serializer.data)
     
     def post(self, request, task_pk):
         try:
-            task = Task.objects.get(pk=task_pk)
+            task = Task.objects.select_related('project').get(pk=task_pk)
         except Task.DoesNotExist:
             return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         self.check_object_permissions(request, task)
         serializer = AttachmentSerializer(data=request.data)
         if serializer.is_valid():
             attachment = serializer.save(uploader=request.user, task=task)
-            create_activity_log(request.user, f"Tải lên tệp cho '{task.title}'", project=task.project, task=task)
+            create_activity_log(request.user, ActivityLog.Verb.ATTACHMENT_ADDED, project=task.project, task=task)
             return Response(AttachmentSerializer(attachment).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 # ATTACHMENT DETAIL
-class AttachmentDetailView(APIView):
+class AttachmentDetailView(BaseAPIView):
     permission_classes = [IsAuthenticated, IsCommentOrAttachmentOwner]
+    query_budget = {'GET': 3, 'DELETE': 9}
     def get(self, request, task_pk, pk):
         try:
-            attachment = Attachment.objects.get(pk=pk, task__pk=task_pk)
+            attachment = Attachment.objects.select_related('task__project', 'uploader').get(pk=pk, task__pk=task_pk)
         except Attachment.DoesNotExist:
             raise NotFound("Tệp đính kèm không tồn tại.")
+        if attachment.task.is_deleted():
+            raise NotFound("Tệp đính kèm không tồn tại.")
         self.check_object_permissions(request, attachment)
         serializer = AttachmentSerializer(attachment)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     def delete(self, request, task_pk, pk):
         try:
-            attachment = Attachment.objects.get(pk=pk, task__pk=task_pk)
+            attachment = Attachment.objects.select_related('task__project', 'uploader').get(pk=pk, task__pk=task_pk)
         except Attachment.DoesNotExist:
             raise NotFound("Tệp đính kèm không tồn tại.")
+        if attachment.task.is_deleted():
+            raise NotFound("Tệp đính kèm không tồn tại.")
         self.check_object_permissions(request, attachment)
         task = attachment.task
-        if attachment.file:
-            attachment.file.delete(save=False)
+        name = attachment.file.name
         attachment.delete()
-        create_activity_log(request.user, f"đã xóa một tệp đính kèm khỏi công việc '{task.title}'", project=task.project, task=task)
+        if name:
+            # Xóa file sau khi commit: transaction bị rollback thì tệp vẫn còn nguyên
+            transaction.on_commit(lambda: purge.remove_files([name]))
+        create_activity_log(request.user, ActivityLog.Verb.ATTACHMENT_DELETED, project=task.project, task=task)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 # ACTIVITY LOG
-class ActivityLogProjectView(APIView):
+class ActivityLogProjectView(BaseAPIView):
     permission_classes = [IsAuthenticated, IsProjectOwnerOrMember]
+    query_budget = 4
+    throttle_scope = 'list'
+    load_priority = 'low'
     def get(self, request, pk):
         try:
             project = Project.objects.get(pk=pk)
         except Project.DoesNotExist:
             return Response({"error": "Dự án không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         self.check_object_permissions(request, project)
-        logs = ActivityLog.objects.filter(project=project).order_by('-timestamp')
+        logs = ActivityLog.objects.filter(project=project).select_related('actor', 'project').order_by('-timestamp')
         return Response(ActivityLogSerializer(logs, many=True).data)
 
 
-class ActivityLogTaskView(APIView):
+class ActivityLogTaskView(BaseAPIView):
     permission_classes = [IsAuthenticated, IsTaskPermission]
+    query_budget = 4
+    throttle_scope = 'list'
+    load_priority = 'low'
     def get(self, request, task_pk):
         try:
-            task = Task.objects.get(pk=task_pk)
+            task = Task.objects.select_related('project').get(pk=task_pk)
         except Task.DoesNotExist:
             return Response({"error": "Công việc không tồn tại."}, status=status.HTTP_404_NOT_FOUND)
         self.check_object_permissions(request, task)
-        logs = ActivityLog.objects.filter(task=task).order_by('-timestamp')
+        logs = ActivityLog.objects.filter(task=task).select_related('actor', 'project').order_by('-timestamp')
         return Response(ActivityLogSerializer(logs, many=True).data)
     
     
+# ANALYTICS (burndown / throughput / cycle time) - đọc từ bảng rollup
+def parse_date_range(request, default_days):
+    """Đọc ?start=&end= (YYYY-MM-DD). Mặc định: default_days ngày gần nhất. Trả về (start, end, error)."""
+    today = timezone.localdate()
+    try:
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else today
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else end - timedelta(days=default_days - 1)
+    except ValueError:
+        return None, None, "Ngày không hợp lệ, dùng định dạng YYYY-MM-DD."
+    if start > end:
+        return None, None, "start phải nhỏ hơn hoặc bằng end."
+    if (end - start).days > 366 * 3:
+        return None, None, "Khoảng thời gian tối đa là 3 năm."
+    return start, end, None
+
+
+class ProjectAnalyticsBaseView(BaseAPIView):
+    permission_classes = [IsAuthenticated, IsProjectOwnerOrMember]
+    load_priority = 'low'
+    default_days = 30
+
+    def get_project(self, request, pk):
+        try:
+            project = Project.objects.get(pk=pk)
+        except Project.DoesNotExist:
+            raise NotFound("Dự án không tồn tại.")
+        self.check_object_permissions(request, project)
+        return project
+
+
+class ProjectBurndownView(ProjectAnalyticsBaseView):
+    query_budget = 5
+
+    def get(self, request, pk):
+        project = self.get_project(request, pk)
+        start, end, error = parse_date_range(request, self.default_days)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'start': start,
+            'end': end,
+            'series': analytics.burndown_series(project, start, end),
+        }, status=status.HTTP_200_OK)
+
+
+class ProjectThroughputView(ProjectAnalyticsBaseView):
+    default_days = 7 * 12
+    query_budget = 4
+
+    def get(self, request, pk):
+        project = self.get_project(request, pk)
+        start, end, error = parse_date_range(request, self.default_days)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'start': start,
+            'end': end,
+            'weeks': analytics.throughput_series(project, start, end),
+        }, status=status.HTTP_200_OK)
+
+
+class ProjectCycleTimeView(ProjectAnalyticsBaseView):
+    query_budget = 5
+
+    def get(self, request, pk):
+        project = self.get_project(request, pk)
+        start, end, error = parse_date_range(request, self.default_days)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        data = analytics.cycle_time_summary(project, start, end)
+        return Response({'start': start, 'end': end, **data}, status=status.HTTP_200_OK)
+
+
 # LOGIN GOOGLE
-class GoogleLoginView(APIView):
+class GoogleLoginView(BaseAPIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'google_login'
 
     def post(self, request):
         serializer = GoogleLoginSerializer(data=request.data)
@@ -758,16 +1276,20 @@ class GoogleLoginView(APIView):
             )
 
 # NOTIFICATION LIST
-class NotificationListView(APIView):
+class NotificationListView(BaseAPIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
+    throttle_scope = 'list'
     
     def get(self, request):
         # Lấy tất cả notification của user, order by created_at desc
-        notifications = Notification.objects.filter(recipient=request.user).order_by('-created_at')
-        serializer = NotificationSerializer(notifications, many=True)
+        queryset = Notification.objects.filter(recipient=request.user, pending_digest=False).select_related('project', 'task').order_by('-created_at')
+        # Cột `read` tính từ mốc đã đọc của user ngay trong query danh sách
+        items = list(notifications.with_read_state(queryset, notifications.read_state(request.user)))
+        serializer = NotificationSerializer(items, many=True)
         
         # Trả về cùng lúc số lượng chưa đọc
-        unread_count = notifications.filter(is_read=False).count()
+        unread_count = sum(not notification.read for notification in items)
         
         return Response({
             'unread_count': unread_count,
@@ -776,20 +1298,20 @@ class NotificationListView(APIView):
 
 
 # NOTIFICATION MARK AS READ
-class NotificationMarkAsReadView(APIView):
+class NotificationMarkAsReadView(BaseAPIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 12
     
     def post(self, request, pk):
         try:
-            notification = Notification.objects.get(pk=pk, recipient=request.user)
+            notification = Notification.objects.get(pk=pk, recipient=request.user, pending_digest=False)
         except Notification.DoesNotExist:
             return Response(
                 {"error": "Thông báo không tồn tại."},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        notification.is_read = True
-        notification.save()
+        notifications.mark_read(request.user, notification)
         
         return Response(
             {"message": "Thông báo đã được đánh dấu là đã đọc."},
@@ -798,17 +1320,81 @@ class NotificationMarkAsReadView(APIView):
 
 
 # NOTIFICATION MARK ALL AS READ
-class NotificationMarkAllAsReadView(APIView):
+class NotificationMarkAllAsReadView(BaseAPIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 7
     
     def post(self, request):
-        # Đánh dấu tất cả notification của user là đã đọc
-        updated_count = Notification.objects.filter(
-            recipient=request.user, 
-            is_read=False
-        ).update(is_read=True)
+        # Chỉ dời mốc đã đọc của user, không cập nhật từng notification
+        notifications.mark_all_read(request.user)
         
         return Response(
-            {"message": f"Đã đánh dấu {updated_count} thông báo là đã đọc."},
+            {"message": "Đã đánh dấu tất cả thông báo là đã đọc."},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+
+# NOTIFICATION PREFERENCES (nhận ngay / tóm tắt định kỳ)
+class NotificationPreferenceView(BaseAPIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = {'GET': 1, 'PUT': 6}
+
+    def get(self, request):
+        return Response(NotificationPreferenceSerializer(request.user).data, status=status.HTTP_200_OK)
+
+    def put(self, request):
+        serializer = NotificationPreferenceSerializer(request.user, data=request.data)
+        if serializer.is_valid():
+            serializer.save()
+            if request.user.digest_frequency == User.DigestFrequency.OFF:
+                notifications.release_pending(request.user)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+# DELETION JOB (tiến độ xóa dự án / task ở nền)
+class DeletionJobDetailView(BaseAPIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+
+    def get(self, request, pk):
+        jobs = DeletionJob.objects.all()
+        if not request.user.is_staff:
+            jobs = jobs.filter(requested_by=request.user)
+        try:
+            job = jobs.get(pk=pk)
+        except DeletionJob.DoesNotExist:
+            raise NotFound("Không tìm thấy yêu cầu xóa.")
+        return Response(DeletionJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+# SYNC (đồng bộ delta cho mobile / offline)
+class SyncView(BaseAPIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 9
+    load_priority = 'low'
+
+    def get(self, request):
+        try:
+            since = sync.parse_token(request.GET.get('since'))
+            limit = int(request.GET.get('limit', sync.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"error": "Tham số since / limit không hợp lệ."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(sync.build_feed(request.user, since, limit), status=status.HTTP_200_OK)
+
+
+# METRICS (Prometheus text format)
+class MetricsView(BaseAPIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    query_budget = 1
+    load_priority = 'critical'
+
+    def get(self, request):
+        token = settings.METRICS_TOKEN
+        # Production (DEBUG=False) chưa cấu hình METRICS_TOKEN: không công khai số liệu
+        if not token and not settings.DEBUG:
+            return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
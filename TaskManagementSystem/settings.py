@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 try:
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'API',
     'rest_framework',
     'rest_framework_simplejwt.token_blacklist',
@@ -60,6 +62,8 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Chỉ giới hạn view có throttle_scope (xem RATE_LIMITS)
+    'DEFAULT_THROTTLE_CLASSES': ['API.throttling.TokenBucketThrottle'],
 }
 
 from datetime import timedelta
@@ -99,6 +103,11 @@ STATICFILES_DIRS = [
 ]
 
 MIDDLEWARE = [
+    'API.metrics.MetricsMiddleware',
+    'API.throttling.LoadSheddingMiddleware',
+    'API.instrumentation.ServerTimingMiddleware',
+    'API.instrumentation.QueryBudgetMiddleware',
+    'API.db_router.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -155,6 +164,66 @@ DATABASES = {
     }
 }
 
+# Connection pool (psycopg 3 + psycopg-pool): mỗi process giữ một pool, kết nối được trả về pool
+# khi request kết thúc (an toàn cho cả WSGI lẫn ASGI). Không có psycopg-pool / DB_POOL_ENABLED=False:
+# dùng kết nối bền (CONN_MAX_AGE) + kiểm tra kết nối trước khi dùng lại.
+DB_POOL_ENABLED = os.getenv('DB_POOL_ENABLED', 'True') == 'True'
+try:
+    import psycopg_pool  # noqa: F401
+    HAS_PSYCOPG_POOL = True
+except ImportError:
+    HAS_PSYCOPG_POOL = False
+
+# Kiểm tra kết nối còn sống trước khi đưa cho request (cả pool lẫn kết nối bền)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+if DB_POOL_ENABLED and HAS_PSYCOPG_POOL:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            # Thời gian tối đa (giây) chờ lấy kết nối trước khi báo lỗi
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+            # Thay kết nối sau khoảng này (giây) để cân bằng lại sau failover / tránh rò bộ nhớ phía server
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+        },
+    }
+else:
+    # ASGI không có pool: đặt DB_CONN_MAX_AGE=0 (mỗi request chạy ở thread khác, kết nối bền không được dùng lại)
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
+# Replica chỉ đọc: DATABASE_REPLICAS="host1:5432,host2:5432" -> alias replica_1, replica_2...
+# (cùng tên DB / user / mật khẩu với default). Định tuyến: API/db_router.py
+for _index, _address in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(','))):
+    _host, _, _port = _address.strip().partition(':')
+    DATABASES[f'replica_{_index + 1}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'OPTIONS': {
+            **DATABASES['default'].get('OPTIONS', {}),
+            'connect_timeout': int(os.getenv('REPLICA_CONNECT_TIMEOUT', '2')),
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['API.db_router.ReplicaRouter']
+# Sau khi ghi, user đọc từ primary trong khoảng này (giây) để luôn thấy dữ liệu mình vừa ghi
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+# Replica trễ quá ngưỡng này (giây) bị loại khỏi vòng quay
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '10'))
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv('REPLICA_HEALTH_CHECK_INTERVAL', '5'))
+
+
+# ===== CACHE =====
+# Mặc định: bộ nhớ của từng process. Chạy nhiều worker thì nên dùng Redis (cần cài gói redis)
+# để dữ liệu dùng chung (vd: ghim read-your-writes của db_router)
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
 
 
 # Password validation
@@ -175,6 +244,23 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# ===== PASSWORD HASHING =====
+# Hash PBKDF2 được tính trong process pool riêng (API/hashing.py) để không chiếm thread request.
+# Không khai báo thêm PBKDF2PasswordHasher gốc: cùng thuật toán, Django sẽ dùng bản đứng sau khi verify
+PASSWORD_HASHERS = [
+    'API.hashing.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# Số process băm mật khẩu mỗi worker web (0 = băm ngay trên thread request)
+HASH_POOL_WORKERS = int(os.getenv('HASH_POOL_WORKERS', '2'))
+# Số việc được xếp hàng chờ thêm; vượt quá -> 503 ngay
+HASH_POOL_MAX_QUEUE = int(os.getenv('HASH_POOL_MAX_QUEUE', '16'))
+# Thời gian tối đa (giây) chờ một lần băm, kể cả thời gian xếp hàng
+HASH_POOL_TIMEOUT = float(os.getenv('HASH_POOL_TIMEOUT', '5'))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -200,7 +286,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ===== EMAIL CONFIGURATION =====
 # Dev: In email ra màn hình console (Terminal)
 # Production: Gửi email thực tế qua SMTP
-if DEBUG:
+# Dev với SMTP giả lập cục bộ: EMAIL_BACKEND=django.core.mail.backends.smtp.EmailBackend + EMAIL_HOST/EMAIL_PORT
+if os.getenv('EMAIL_BACKEND'):
+    EMAIL_BACKEND = os.getenv('EMAIL_BACKEND')
+    EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+    EMAIL_PORT = int(os.getenv('EMAIL_PORT', 1025))
+    EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+    EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+    EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+elif DEBUG:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 else:
     # Cấu hình SMTP cho production (Gmail, SendGrid, AWS SES...)
@@ -212,3 +306,124 @@ else:
     EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@taskmanagement.com')
+# Timeout (giây) mỗi thao tác SMTP - worker không bị treo vô hạn khi mail server chậm
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '10'))
+
+# ===== HÀNG ĐỢI EMAIL (python manage.py send_queued_mail --watch) =====
+# Số email gửi trên một kết nối SMTP
+MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE', '50'))
+# Thử lại sau BASE * 2^(lần thử - 1) giây, tối đa MAX giây; quá MAIL_MAX_ATTEMPTS lần -> failed
+MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', '6'))
+MAIL_RETRY_BASE_SECONDS = int(os.getenv('MAIL_RETRY_BASE_SECONDS', '30'))
+MAIL_RETRY_MAX_SECONDS = int(os.getenv('MAIL_RETRY_MAX_SECONDS', '3600'))
+# Email đang gửi mà worker chết được gửi lại sau số giây này
+MAIL_LEASE_SECONDS = int(os.getenv('MAIL_LEASE_SECONDS', '300'))
+# Email đã gửi / lỗi hẳn được xóa sau số ngày này (0 = giữ mãi); nội dung bị xóa ngay khi gửi xong
+MAIL_RETENTION_DAYS = int(os.getenv('MAIL_RETENTION_DAYS', '30'))
+
+
+# ===== RATE LIMIT / LOAD SHEDDING =====
+# Token bucket theo (scope, user hoặc IP): "số request / chu kỳ" (s, min, hour, day), lưu trong cache
+# (REDIS_URL để dùng chung giữa các worker). Ghi đè bằng env: RATE_LIMITS=login=5/min,list=60/min
+RATE_LIMITS = {
+    'login': '10/min',
+    'google_login': '10/min',
+    'password_reset': '5/hour',
+    'list': '120/min',
+    'suggest': '300/min',
+}
+RATE_LIMITS.update(
+    item.split('=', 1) for item in filter(None, os.getenv('RATE_LIMITS', '').split(',')) if '=' in item
+)
+# Cắt tải theo mức ưu tiên khi số request đang xử lý của 1 process / độ trễ trung bình vượt ngưỡng
+# (0 = không dùng tiêu chí đó; cả hai bằng 0 = tắt)
+LOAD_SHED_MAX_IN_FLIGHT = int(os.getenv('LOAD_SHED_MAX_IN_FLIGHT', '0'))
+LOAD_SHED_LATENCY_TARGET_MS = float(os.getenv('LOAD_SHED_LATENCY_TARGET_MS', '0'))
+LOAD_SHED_RETRY_AFTER = int(os.getenv('LOAD_SHED_RETRY_AFTER', '2'))
+
+# ===== THÔNG BÁO =====
+# Bình luận cùng task, chưa đọc, cách sự kiện trước không quá số giây này được gộp vào một thông báo
+NOTIFICATION_COALESCE_WINDOW = int(os.getenv('NOTIFICATION_COALESCE_WINDOW', '3600'))
+# Số user mỗi lô khi tạo bản tóm tắt (python manage.py send_notification_digests, chạy bằng cron)
+NOTIFICATION_DIGEST_BATCH = int(os.getenv('NOTIFICATION_DIGEST_BATCH', '500'))
+
+# ===== XÓA DỮ LIỆU Ở NỀN (python manage.py purge_deleted --watch) =====
+# Số dòng xóa trong mỗi transaction khi dọn dự án / task đã xóa
+PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', '500'))
+# Job RUNNING không cập nhật tiến độ quá số giây này được coi là worker đã chết và được nhận lại
+PURGE_JOB_TIMEOUT = int(os.getenv('PURGE_JOB_TIMEOUT', '600'))
+
+# ===== ĐỒNG BỘ DELTA (/sync/) =====
+# Token không vượt quá các thay đổi ghi cách đây hơn số giây này (transaction commit muộn không bị bỏ qua);
+# phải lớn hơn thời gian của transaction dài nhất có ghi SyncChange
+SYNC_COMMIT_MARGIN = int(os.getenv('SYNC_COMMIT_MARGIN', '10'))
+
+# ===== KANBAN (python manage.py rebalance_ranks, chạy bằng cron) =====
+# Cột có khóa vị trí (Task.rank) dài hơn số ký tự này được viết lại thành các khóa ngắn, cách đều
+TASK_RANK_REBALANCE_LENGTH = int(os.getenv('TASK_RANK_REBALANCE_LENGTH', '24'))
+
+# ===== PHỤ THUỘC GIỮA TASK =====
+# Thời gian cache đường găng / task bị chặn của mỗi nhóm phụ thuộc (cache bị xóa ngay khi nhóm thay đổi)
+TASK_DEPENDENCY_CACHE_SECONDS = int(os.getenv('TASK_DEPENDENCY_CACHE_SECONDS', '86400'))
+
+# ===== NHẮC HẠN (python manage.py send_due_reminders --watch, hoặc cron mỗi vài phút) =====
+# Nhắc task có hạn trong vòng N giờ tới
+REMINDER_DUE_SOON_HOURS = int(os.getenv('REMINDER_DUE_SOON_HOURS', '24'))
+# Nhắc task quá hạn trong vòng N giờ qua (quá hạn lâu hơn không nhắc lại khi scheduler ngừng chạy một thời gian)
+REMINDER_OVERDUE_LOOKBACK_HOURS = int(os.getenv('REMINDER_OVERDUE_LOOKBACK_HOURS', '24'))
+# Số task mỗi lô / số lô tối đa mỗi lần chạy cho mỗi loại nhắc
+REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', '500'))
+REMINDER_MAX_BATCHES = int(os.getenv('REMINDER_MAX_BATCHES', '20'))
+
+# ===== CÔNG VIỆC LẶP LẠI =====
+# Số lần lặp ảo tối đa kèm theo một danh sách task (?due_date_before=...)
+RECURRENCE_MAX_OCCURRENCES = int(os.getenv('RECURRENCE_MAX_OCCURRENCES', '200'))
+
+# ===== ASYNC VIEWS (ASGI) =====
+# Dùng view async (ORM async) cho các endpoint đọc nhiều: danh sách / chi tiết task, thông báo,
+# nhật ký hoạt động. Chỉ bật khi chạy ASGI (uvicorn / daphne); dưới WSGI mỗi request async phải
+# dựng event loop riêng nên chậm hơn view đồng bộ
+ASYNC_VIEWS_ENABLED = os.getenv('ASYNC_VIEWS_ENABLED', 'False') == 'True'
+
+# ===== PERFORMANCE INSTRUMENTATION =====
+# Header Server-Timing + 1 dòng log JSON cho mỗi request được lấy mẫu (logger 'API.performance')
+# Tắt (mặc định): middleware không được nạp, gần như không tốn gì
+PERF_INSTRUMENTATION_ENABLED = os.getenv('PERF_INSTRUMENTATION_ENABLED', 'False') == 'True'
+# Tỉ lệ request được lấy mẫu (0.0 - 1.0)
+PERF_SAMPLE_RATE = float(os.getenv('PERF_SAMPLE_RATE', '1.0'))
+
+# ===== QUERY BUDGET (chỉ dùng khi dev) =====
+# off: tắt | warn: ghi cảnh báo (logger 'API.performance') | raise: ném QueryBudgetExceeded
+# So số query mỗi request với `query_budget` khai báo trên view + phát hiện N+1
+# `manage.py test` mặc định raise: view vượt ngân sách làm test fail thay vì chỉ ghi cảnh báo
+TESTING = sys.argv[1:2] == ['test']
+QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'raise' if TESTING else 'warn' if DEBUG else 'off')
+# Cùng một dạng SQL lặp quá số lần này trong 1 request -> coi là N+1
+QUERY_REPEAT_LIMIT = int(os.getenv('QUERY_REPEAT_LIMIT', '5'))
+
+# ===== METRICS (/metrics - Prometheus text format) =====
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+# Thư mục dùng chung cho các worker trên cùng node để gộp số liệu (để trống = chỉ process hiện tại)
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+# Chu kỳ tối thiểu (giây) giữa 2 lần một worker ghi số liệu ra METRICS_DIR
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '1.0'))
+# Số giây giữ kết quả các gauge đếm từ DB (vd: thông báo chưa đọc) giữa các lần scrape
+METRICS_DATABASE_GAUGES_TTL = int(os.getenv('METRICS_DATABASE_GAUGES_TTL', '60'))
+# Scraper phải gửi header "Authorization: Bearer <METRICS_TOKEN>". Bắt buộc khi DEBUG=False
+# (để trống thì /metrics trả 403), khi DEBUG=True để trống = không cần token
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'API.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}